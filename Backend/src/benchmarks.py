@@ -0,0 +1,388 @@
+"""
+Microbenchmarks for the per-packet hot path.
+
+Times calculate_risk_index (on packet dicts and on decoded
+TelemetryRecords), parse_packet, the MapplsGeospace lookups, simulated
+weather, the windowed risk aggregator, main.py's per-packet evaluation
+and server.py's ingest (ingest.TelemetryIngest, the code behind
+update_global_state, with its own collaborators; server.py itself is
+not imported, so no watcher threads or history spool are started) over
+representative inputs (healthy,
+degraded GPS, RED zone, bad weather) and reports ns/op plus the peak
+bytes allocated per call (tracemalloc). Results are compared with the
+baseline stored in Backend/bench_baseline.json; the run fails when a
+benchmark is slower, or allocates more, than the baseline by more than
+the configured threshold.
+
+Each benchmark is timed alternately with a fixed calibration loop, and
+the gate compares the median ratio of the two ("calib" column, stored
+in the baseline), so a baseline recorded on a faster or slower
+machine still gates code changes, not hardware.
+
+Usage:
+    python benchmarks.py                    # run and gate against the baseline
+    python benchmarks.py --update           # record a new baseline
+    python benchmarks.py -k risk --threshold 1.5
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(os.path.dirname(current_dir), 'bench_baseline.json')
+
+# Allowed slowdown (ratio to baseline) before a benchmark counts as a regression
+DEFAULT_THRESHOLD = 1.25
+
+# Allocation growth below this many bytes is noise, not a regression
+ALLOC_SLACK_BYTES = 64
+
+# Drone positions relative to the default airport (8.4821, 76.92)
+POSITIONS = {
+    'green': (8.70, 77.10),
+    'yellow': (8.54, 76.92),
+    'red': (8.49, 76.93)
+}
+
+# Representative packets as main.py forwards them
+CASES = {
+    'healthy': {
+        'gps': {'latitude': 8.70, 'longitude': 77.10, 'satellites': 11, 'hdop': 90, 'speed': 4.2},
+        'mpu': {'ax': 0.01, 'ay': -0.02, 'az': 0.99, 'vibration_rms': 0.08, 'tilt_angle': 2.5},
+        'motor': {'rpm': 1450, 'hall_detected': True},
+        'environment': {'temperature': 28.4, 'humidity': 62, 'light_percent': 70},
+        'system': {'scan_triggered': False}
+    },
+    'degraded_gps': {
+        'gps': {'latitude': 8.70, 'longitude': 77.10, 'satellites': 5, 'hdop': 1450, 'speed': 4.2},
+        'mpu': {'ax': 0.01, 'ay': -0.02, 'az': 0.99, 'vibration_rms': 0.12, 'tilt_angle': 4.0},
+        'motor': {'rpm': 1400, 'hall_detected': True},
+        'environment': {'temperature': 28.4, 'humidity': 62, 'light_percent': 70},
+        'system': {'scan_triggered': False}
+    },
+    'red_zone': {
+        'gps': {'latitude': 8.49, 'longitude': 76.93, 'satellites': 10, 'hdop': 110, 'speed': 6.0},
+        'mpu': {'ax': 0.01, 'ay': -0.02, 'az': 0.99, 'vibration_rms': 0.09, 'tilt_angle': 3.0},
+        'motor': {'rpm': 1500, 'hall_detected': True},
+        'environment': {'temperature': 28.4, 'humidity': 62, 'light_percent': 70},
+        'system': {'scan_triggered': False}
+    },
+    'bad_weather': {
+        'gps': {'latitude': 8.54, 'longitude': 76.92, 'satellites': 7, 'hdop': 420, 'speed': 9.5},
+        'mpu': {'ax': 0.05, 'ay': 0.07, 'az': 0.95, 'vibration_rms': 0.6, 'tilt_angle': 18.0},
+        'motor': {'rpm': 800, 'hall_detected': False},
+        'environment': {'temperature': 24.0, 'humidity': 94, 'light_percent': 15},
+        'system': {'scan_triggered': False}
+    }
+}
+
+WEATHER = {
+    'healthy': {'temp': 28.0, 'humidity': 60, 'wind_speed': 3.5, 'visibility': 10000, 'weather_main': 'Clear'},
+    'degraded_gps': {'temp': 28.0, 'humidity': 60, 'wind_speed': 3.5, 'visibility': 10000, 'weather_main': 'Clear'},
+    'red_zone': {'temp': 28.0, 'humidity': 60, 'wind_speed': 3.5, 'visibility': 10000, 'weather_main': 'Clear'},
+    'bad_weather': {'temp': 24.0, 'humidity': 94, 'wind_speed': 15.0, 'visibility': 800, 'weather_main': 'Thunderstorm'}
+}
+
+ZONES = {'healthy': 'GREEN', 'degraded_gps': 'GREEN', 'red_zone': 'RED', 'bad_weather': 'YELLOW'}
+
+# ============================================
+# MEASUREMENT
+# ============================================
+
+def _loops_for(fn, min_time_s):
+    """Loop count that makes one timing of fn last at least min_time_s."""
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time_s * 1e9:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time_s * 1e9 / elapsed) + 1))
+
+
+def _per_op(fn, loops):
+    start = time.perf_counter_ns()
+    for _ in range(loops):
+        fn()
+    return (time.perf_counter_ns() - start) / loops
+
+
+def _calibration_workload():
+    # Fixed mix of dict lookups, float math and small allocations, like the hot path
+    d = {'a': 1.5, 'b': 2.5, 'c': 3.5}
+    total = 0.0
+    for i in range(50):
+        total += d['a'] * i + math.sqrt(d['b'] + i) - d.get('c', 0)
+        pair = (total, i)
+    return pair
+
+
+def time_per_op(fn, min_time_s=0.05, repeat=7):
+    """
+    Time fn and the calibration loop alternately, so each pair sees the
+    same machine state (frequency scaling, noisy neighbours).
+    Returns (best ns/op, loops, best calibration ns/op, relative), where
+    relative is the median over repeats of fn time / calibration time.
+    """
+    loops = _loops_for(fn, min_time_s)
+    ref_loops = _loops_for(_calibration_workload, min_time_s)
+    times, ref_times = [], []
+    for _ in range(repeat):
+        times.append(_per_op(fn, loops))
+        ref_times.append(_per_op(_calibration_workload, ref_loops))
+    ratios = sorted(t / r for t, r in zip(times, ref_times))
+    return min(times), loops, min(ref_times), ratios[len(ratios) // 2]
+
+
+def alloc_per_op(fn, calls=20):
+    """Median peak bytes allocated during one call (tracemalloc)."""
+    fn()  # warm caches so one-time setup is not counted
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2]
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def build_benchmarks():
+    """Returns dict name -> zero-argument callable."""
+    from mappls_client import MapplsGeospace
+    from risk_engine import calculate_risk_index, risk_level
+    from risk_window import RiskWindowStore
+    from weather_client import OpenWeatherClient
+    from telemetry_record import parse_packet, gps_quality, ESP32_HDOP_SCALE
+    from telemetry_history import TelemetryHistory
+    from sensor_stats import SensorStatsStore
+    from event_bus import EventBus, TransitionDetector
+    from tracing import Tracer
+    from vibration_analysis import VibrationAnalyzer
+    from ingest import TelemetryIngest, initial_sensor_data
+
+    # Simulation only, so network weather stays out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        weather = OpenWeatherClient(prefetch=False)
+    mappls = MapplsGeospace()
+    benches = {}
+
+    for case, packet in CASES.items():
+        zone, wx = ZONES[case], WEATHER[case]
+        benches[f'risk_index[{case}]'] = (
+            lambda p=packet, z=zone, w=wx: calculate_risk_index(p, z, w))
+        benches[f'risk_index_record[{case}]'] = (
+            lambda r=parse_packet(packet), z=zone, w=wx: calculate_risk_index(r, z, w))
+        benches[f'parse_packet[{case}]'] = lambda p=packet: parse_packet(p)
+
+    for name, (lat, lng) in POSITIONS.items():
+        benches[f'check_airspace[{name}]'] = lambda a=lat, b=lng: mappls.check_airspace(a, b)
+    benches['haversine_distance'] = lambda: mappls.haversine_distance(8.70, 77.10, 8.4821, 76.92)
+    benches['get_zone_info'] = lambda: mappls.get_zone_info(8.54, 76.92)
+    benches['simulate_weather'] = lambda: weather._simulate_weather(8.70, 77.10)
+
+    # Score hovering at the SAFE/CAUTION threshold, 10 Hz on a synthetic clock
+    windows = RiskWindowStore()
+    hover = itertools.cycle([(score, risk_level(score)) for score in (38, 41, 39, 42)])
+    clock = itertools.count(step=0.1)
+    benches['risk_window_update'] = lambda: windows.update('bench', *next(hover), next(clock))
+    benches['risk_window_snapshot'] = lambda: windows.snapshot('bench', 0.0)
+
+    # main.py per packet: position lookups, geofence, local and refined verdicts
+    def evaluate_dict(packet, wx):
+        lat = packet.get('gps', {}).get('latitude', 0)
+        lng = packet.get('gps', {}).get('longitude', 0)
+        packet.get('gps', {}).get('satellites', 0)
+        zone = mappls.check_airspace(lat, lng)
+        calculate_risk_index(packet, zone)
+        return calculate_risk_index(packet, zone, wx)
+
+    # server.py ingest: fold the packet into state, GPS quality, stats inputs, risk
+    def ingest_dict(packet, state, zone, wx):
+        for cat in ("mpu", "environment", "motor", "gps", "system"):
+            if cat in packet:
+                for key, value in packet[cat].items():
+                    if value is not None:
+                        state[cat][key] = value
+        gps = packet.get('gps', {})
+        hdop_raw = gps.get('hdop', 9999)
+        hdop = hdop_raw / 100.0 if hdop_raw > 50 else hdop_raw
+        state['gps']['hdop'] = hdop
+        state['gps']['gps_quality'] = gps_quality(hdop)
+        (packet.get('mpu', {}).get('vibration_rms'), packet.get('mpu', {}).get('tilt_angle'),
+         packet.get('motor', {}).get('rpm'), packet.get('system', {}).get('scan_triggered'))
+        return calculate_risk_index(state, zone, wx)
+
+    def ingest_record(packet, base, state, zone, wx):
+        # server.py keeps the record as its state; environment goes to sensor_data now,
+        # the carried blocks when read
+        record = parse_packet(packet, base, into=base, hdop_scale=ESP32_HDOP_SCALE)
+        if 'environment' in record.categories:
+            record.apply_to(state, ('environment',))
+        (record.vibration_rms, record.tilt_angle, record.rpm, record.scan_triggered)
+        return calculate_risk_index(record, zone, wx)
+
+    for case, packet in CASES.items():
+        zone, wx = ZONES[case], WEATHER[case]
+        benches[f'evaluate_dict[{case}]'] = lambda p=packet, w=wx: evaluate_dict(p, w)
+        state = initial_sensor_data()
+        benches[f'ingest_dict[{case}]'] = (
+            lambda p=packet, s=state, z=zone, w=wx: ingest_dict(p, s, z, w))
+        benches[f'ingest_record[{case}]'] = (
+            lambda p=packet, b=parse_packet(packet), s=initial_sensor_data(), z=zone, w=wx:
+            ingest_record(p, b, s, z, w))
+
+    # server.py update_global_state itself (logging included, printed to
+    # os.devnull by run()), with in-memory history and simulated weather
+    collaborators = dict(mappls=mappls, weather_api=weather, stats_store=SensorStatsStore(),
+                         risk_windows=RiskWindowStore(), vibration=VibrationAnalyzer(),
+                         transitions=TransitionDetector(EventBus()), tracer=Tracer(0.0),
+                         history=TelemetryHistory(memory_chunks=2))
+    for case, packet in CASES.items():
+        ingest = TelemetryIngest(**collaborators)
+        benches[f'server_ingest[{case}]'] = lambda p=packet, i=ingest: i.update(p, "ESP32")
+
+    return benches
+
+
+def run(selected=None, min_time_s=0.05):
+    """Run benchmarks (optionally filtered by substring); returns dict name -> result."""
+    results = {}
+    # server_ingest logs every packet like the live server; keep it off the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for name, fn in build_benchmarks().items():
+            if selected and not any(s in name for s in selected):
+                continue
+            ns, loops, calibration, relative = time_per_op(fn, min_time_s)
+            results[name] = {
+                'ns_per_op': round(ns, 1),
+                'calibration_ns': round(calibration, 1),
+                'relative': round(relative, 5),
+                'alloc_bytes': alloc_per_op(fn),
+                'loops': loops
+            }
+    return results
+
+# ============================================
+# BASELINE
+# ============================================
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, threshold, path=BASELINE_PATH):
+    baseline = {
+        'threshold': threshold,
+        'recorded': time.strftime('%Y-%m-%d'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': {name: {key: r[key] for key in ('ns_per_op', 'calibration_ns', 'relative', 'alloc_bytes')
+                              if key in r}
+                       for name, r in sorted(results.items())}
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def compare(results, baseline, threshold=None):
+    """
+    Gate results against the baseline.
+    ns/op is compared relative to the calibration loop timed alongside
+    each benchmark, so the gate measures code changes, not machine speed.
+    A benchmark's own "threshold" in the baseline overrides the global one.
+    Returns list of (name, metric, baseline, current, ratio) regressions.
+    """
+    regressions = []
+    default = threshold or baseline.get('threshold', DEFAULT_THRESHOLD)
+    for name, current in results.items():
+        base = baseline['benchmarks'].get(name)
+        if not base:
+            continue
+        limit = base.get('threshold', default)
+
+        if 'relative' in base:
+            ratio = current['relative'] / base['relative']
+        else:
+            ratio = current['ns_per_op'] / base['ns_per_op']
+        current['vs_baseline'] = round(ratio, 3)
+        if ratio > limit:
+            regressions.append((name, 'ns_per_op', base['ns_per_op'], current['ns_per_op'], ratio))
+
+        allowed = base['alloc_bytes'] * limit + ALLOC_SLACK_BYTES
+        if current['alloc_bytes'] > allowed:
+            ratio = current['alloc_bytes'] / max(base['alloc_bytes'], 1)
+            regressions.append((name, 'alloc_bytes', base['alloc_bytes'], current['alloc_bytes'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroGuard hot-path microbenchmarks")
+    parser.add_argument('-k', dest='selected', action='append',
+                        help="Only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument('--threshold', type=float,
+                        help=f"Allowed ratio to baseline (default from baseline, else {DEFAULT_THRESHOLD})")
+    parser.add_argument('--min-time', type=float, default=0.05, help="Seconds per timing repeat")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.selected, args.min_time)
+    baseline = load_baseline(args.baseline)
+
+    if args.update:
+        if args.selected and baseline:
+            baseline_results = {name: dict(r) for name, r in baseline['benchmarks'].items()}
+            baseline_results.update(results)
+            results = baseline_results
+        save_baseline(results, args.threshold or (baseline or {}).get('threshold', DEFAULT_THRESHOLD),
+                      args.baseline)
+        print(f"✅ Baseline saved to {args.baseline} ({len(results)} benchmarks)")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold) if baseline else []
+
+    if args.json:
+        print(json.dumps({'results': results, 'regressions': [
+            {'name': n, 'metric': m, 'baseline': b, 'current': c, 'ratio': round(r, 3)}
+            for n, m, b, c, r in regressions]}, indent=2))
+    else:
+        print(f"{'benchmark':<34}{'ns/op':>12}{'calib':>8}{'alloc B':>10}{'vs base':>10}")
+        print("-" * 74)
+        for name, r in results.items():
+            ratio = f"{r['vs_baseline']:.2f}x" if 'vs_baseline' in r else "-"
+            print(f"{name:<34}{r['ns_per_op']:>12,.0f}{r['relative']:>8.3f}{r['alloc_bytes']:>10}{ratio:>10}")
+        if baseline is None:
+            print(f"\n⚠️  No baseline at {args.baseline}; run with --update to record one")
+        for name, metric, base, current, ratio in regressions:
+            print(f"❌ REGRESSION {name}: {metric} {base} → {current} ({ratio:.2f}x)")
+        if baseline and not regressions:
+            print("\n✅ No regressions")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+"""
+Central configuration service.
+
+Loads config.json once into an immutable, validated AppConfig, watches the
+file's mtime and atomically swaps in a new version on change. Modules
+subscribe to receive precompiled settings for their section (risk
+thresholds, geofence, weather) whenever a new version is loaded.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, field, fields, replace
+from types import MappingProxyType
+from typing import Optional, Tuple
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+class ConfigError(ValueError):
+    """Raised when config.json fails validation."""
+
+
+# Placeholder keys shipped in config.json (and server.py's default config);
+# they count as no key, so the simulation / synthetic field is used
+PLACEHOLDER_API_KEYS = frozenset({'your_api_key_here', 'YOUR_KEY_HERE', 'your_mappls_key_here'})
+
+# ============================================
+# TYPED SETTINGS
+# ============================================
+
+@dataclass(frozen=True)
+class RiskSettings:
+    """Risk thresholds with defaults applied, as used by calculate_risk_index."""
+    sats_safe: float = 8
+    sats_critical: float = 4
+    sats_penalty_per_missing: float = 5
+    vib_critical: float = 0.8
+    vib_warning: float = 0.5
+    vib_penalty_critical: float = 40
+    vib_penalty_warning: float = 20
+    spectral_peak_g: float = 0.3
+    spectral_penalty: float = 15
+    rpm_minimum_safe: float = 500
+    rpm_penalty_low: float = 30
+    wind_critical: float = 15.0
+    wind_caution: float = 10.0
+    wind_penalty_critical: float = 25
+    wind_penalty_caution: float = 15
+    vis_critical: float = 1000
+    vis_caution: float = 5000
+    vis_penalty_critical: float = 20
+    vis_penalty_caution: float = 15
+    # Treat as read-only; a plain dict so settings stay picklable
+    dangerous_conditions: dict = field(default_factory=dict)
+    temp_critical_low: float = -20
+    temp_critical_high: float = 45
+    temp_penalty: float = 15
+    # Level boundaries: config uses inclusive max scores, defaults are strict
+    safe_max: float = 40
+    caution_max: float = 75
+    level_inclusive: bool = False
+
+
+@dataclass(frozen=True)
+class GeofenceSettings:
+    """Airport restricted zones for MapplsGeospace."""
+    airport_lat: float = 8.4821
+    airport_lng: float = 76.9200
+    red_radius_km: float = 5.0
+    yellow_radius_km: float = 10.0
+
+
+@dataclass(frozen=True)
+class WeatherFieldSettings:
+    """Seeded synthetic weather field used for simulation when there is no API key."""
+    seed: int = 0
+    min_lat: float = 8.0
+    min_lng: float = 76.5
+    max_lat: float = 9.0
+    max_lng: float = 77.5
+    cell_deg: float = 0.01
+    step_s: float = 60
+    duration_s: float = 3600
+
+
+@dataclass(frozen=True)
+class WeatherSettings:
+    """Weather client provider and area cache settings."""
+    api_key: str = ''
+    cell_deg: float = 0.1
+    ttl_s: float = 600
+    max_workers: int = 4
+    timeout_s: float = 5
+    budget_ms: float = 5
+    breaker_window: int = 20
+    breaker_min_calls: int = 5
+    breaker_failure_rate: float = 0.5
+    breaker_open_s: float = 30
+    breaker_max_open_s: float = 300
+    synthetic_field: Optional[WeatherFieldSettings] = None
+
+
+@dataclass(frozen=True)
+class SensorStatsSettings:
+    """Streaming per-drone sensor statistics (EWMA and rolling window)."""
+    window_s: float = 10.0
+    ewma_alpha: float = 0.3
+
+
+@dataclass(frozen=True)
+class RiskWindowSettings:
+    """Windowed risk aggregation and level hysteresis."""
+    windows_s: Tuple[float, ...] = (10.0, 60.0)
+    hysteresis: float = 5.0
+    min_dwell_s: float = 3.0
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """One immutable, validated version of config.json."""
+    raw: MappingProxyType
+    risk: RiskSettings
+    geofence: GeofenceSettings
+    weather: WeatherSettings
+    sensor_stats: SensorStatsSettings
+    risk_window: RiskWindowSettings
+    version: int = 0
+    mtime: float = 0.0
+    path: str = ''
+
+# ============================================
+# COMPILATION & VALIDATION
+# ============================================
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_numbers(settings, problems):
+    for f in fields(settings):
+        value = getattr(settings, f.name)
+        if f.type in (float, int) and not _is_number(value):
+            problems.append(f"{type(settings).__name__}.{f.name} must be a number, got {value!r}")
+
+
+def api_key(raw, name):
+    """
+    API key `name` from the environment, else from config.json; '' when
+    neither holds a real key (placeholders count as absent).
+    """
+    key = os.environ.get(name) or raw.get(name) or ''
+    if not isinstance(key, str) or key.strip() in PLACEHOLDER_API_KEYS:
+        return ''
+    return key.strip()
+
+
+def resolve_thresholds(raw=None):
+    """
+    Flatten the risk_thresholds / alerts sections of a config into
+    RiskSettings, applying the same defaults as calculate_risk_index.
+    raw=None uses the currently loaded config.json.
+    """
+    if raw is None:
+        raw = get_config_service().current.raw
+    thresholds = raw.get('risk_thresholds', {})
+
+    sats = thresholds.get('gps', {}).get('min_satellites', {})
+    vib = thresholds.get('vibration', {})
+    rpm = thresholds.get('motor_rpm', {})
+    weather = thresholds.get('weather', {})
+    wind = weather.get('wind_speed', {})
+    vis = weather.get('visibility', {})
+    temp = weather.get('temperature', {})
+    d = RiskSettings()
+
+    level_bounds = {}
+    if 'alerts' in raw:
+        alert_levels = raw['alerts']['risk_levels']
+        level_bounds = {
+            'safe_max': alert_levels['safe']['max_score'],
+            'caution_max': alert_levels['caution']['max_score'],
+            'level_inclusive': True
+        }
+
+    return RiskSettings(
+        sats_safe=sats.get('safe', d.sats_safe),
+        sats_critical=sats.get('critical', d.sats_critical),
+        sats_penalty_per_missing=sats.get('penalty_per_missing', d.sats_penalty_per_missing),
+        vib_critical=vib.get('critical', d.vib_critical),
+        vib_warning=vib.get('warning', d.vib_warning),
+        vib_penalty_critical=vib.get('penalty_points', {}).get('critical', d.vib_penalty_critical),
+        vib_penalty_warning=vib.get('penalty_points', {}).get('warning', d.vib_penalty_warning),
+        spectral_peak_g=vib.get('spectral', {}).get('peak_g', d.spectral_peak_g),
+        spectral_penalty=vib.get('spectral', {}).get('penalty_points', d.spectral_penalty),
+        rpm_minimum_safe=rpm.get('minimum_safe', d.rpm_minimum_safe),
+        rpm_penalty_low=rpm.get('penalty_points', {}).get('low', d.rpm_penalty_low),
+        wind_critical=wind.get('critical', d.wind_critical),
+        wind_caution=wind.get('caution', d.wind_caution),
+        wind_penalty_critical=wind.get('penalty_points', {}).get('critical', d.wind_penalty_critical),
+        wind_penalty_caution=wind.get('penalty_points', {}).get('caution', d.wind_penalty_caution),
+        vis_critical=vis.get('critical', d.vis_critical),
+        vis_caution=vis.get('caution', d.vis_caution),
+        vis_penalty_critical=vis.get('penalty_points', {}).get('critical', d.vis_penalty_critical),
+        vis_penalty_caution=vis.get('penalty_points', {}).get('caution', d.vis_penalty_caution),
+        dangerous_conditions=dict(weather.get('dangerous_conditions', {})),
+        temp_critical_low=temp.get('critical_low', d.temp_critical_low),
+        temp_critical_high=temp.get('critical_high', d.temp_critical_high),
+        temp_penalty=temp.get('penalty_points', d.temp_penalty),
+        **level_bounds
+    )
+
+
+def _check_polygons(polygons):
+    """Problems in 'geofence_polygons' (list of {name, zone, polygon: [[lat, lng], ...]})."""
+    if not isinstance(polygons, list):
+        return ["geofence_polygons must be a list"]
+    problems = []
+    for i, zone in enumerate(polygons):
+        where = f"geofence_polygons[{i}]"
+        if not isinstance(zone, dict):
+            problems.append(f"{where} must be an object")
+            continue
+        if not isinstance(zone.get('name'), str) or not zone['name']:
+            problems.append(f"{where}.name must be a non-empty string")
+        if zone.get('zone') not in ('RED', 'YELLOW'):
+            problems.append(f"{where}.zone must be RED or YELLOW")
+        vertices = zone.get('polygon')
+        if not (isinstance(vertices, list) and len(vertices) >= 3 and
+                all(isinstance(v, list) and len(v) == 2 and all(_is_number(c) for c in v)
+                    for v in vertices)):
+            problems.append(f"{where}.polygon must be a list of at least 3 [lat, lng] pairs")
+        elif not all(-90 <= lat <= 90 and -180 <= lng <= 180 for lat, lng in vertices):
+            problems.append(f"{where}.polygon: vertex out of range")
+    return problems
+
+
+def compile_config(raw, version=0, mtime=0.0, path=''):
+    """
+    Validate a parsed config.json and build an AppConfig.
+    Raises ConfigError listing every problem found.
+    """
+    if not isinstance(raw, dict):
+        raise ConfigError("config.json must contain a JSON object")
+
+    problems = []
+    try:
+        risk = resolve_thresholds(raw)
+    except (AttributeError, KeyError, TypeError) as e:
+        raise ConfigError(f"Malformed risk_thresholds/alerts section: {e!r}")
+
+    geo = raw.get('geofence', {})
+    geofence = GeofenceSettings(**{k: geo[k] for k in
+                                   ('airport_lat', 'airport_lng', 'red_radius_km', 'yellow_radius_km')
+                                   if k in geo})
+
+    weather_raw = raw.get('weather_settings', {})
+    field_raw = weather_raw.get('synthetic_field')
+    weather_field = None
+    if field_raw is not None:
+        if not isinstance(field_raw, dict):
+            raise ConfigError("weather_settings.synthetic_field must be an object")
+        weather_field = WeatherFieldSettings(**{k: field_raw[k] for k in
+                                                ('seed', 'min_lat', 'min_lng', 'max_lat', 'max_lng',
+                                                 'cell_deg', 'step_s', 'duration_s')
+                                                if k in field_raw})
+    weather = WeatherSettings(
+        api_key=api_key(raw, 'OPENWEATHER_API_KEY'),
+        synthetic_field=weather_field,
+        **{k: weather_raw[k] for k in ('cell_deg', 'ttl_s', 'max_workers', 'timeout_s', 'budget_ms',
+                                       'breaker_window', 'breaker_min_calls', 'breaker_failure_rate',
+                                       'breaker_open_s', 'breaker_max_open_s')
+           if k in weather_raw}
+    )
+
+    stats_raw = raw.get('sensor_stats', {})
+    sensor_stats = SensorStatsSettings(**{k: stats_raw[k] for k in ('window_s', 'ewma_alpha')
+                                          if k in stats_raw})
+
+    window_raw = raw.get('risk_window', {})
+    risk_window = RiskWindowSettings(**{k: window_raw[k] for k in ('hysteresis', 'min_dwell_s')
+                                        if k in window_raw})
+    if 'windows_s' in window_raw:
+        windows = window_raw['windows_s']
+        if isinstance(windows, list) and windows and all(_is_number(w) and w > 0 for w in windows):
+            risk_window = replace(risk_window, windows_s=tuple(sorted(set(windows))))
+        else:
+            problems.append("risk_window.windows_s must be a non-empty list of positive numbers")
+
+    for settings in (risk, geofence, weather, sensor_stats, risk_window, weather_field):
+        if settings is not None:
+            _check_numbers(settings, problems)
+
+    if not problems:
+        if not all(_is_number(v) for v in risk.dangerous_conditions.values()):
+            problems.append("dangerous_conditions penalties must be numbers")
+        if risk.safe_max > risk.caution_max:
+            problems.append("alerts: safe max_score exceeds caution max_score")
+        if risk.sats_critical > risk.sats_safe:
+            problems.append("gps.min_satellites: critical exceeds safe")
+        if risk.vib_warning > risk.vib_critical:
+            problems.append("vibration: warning exceeds critical")
+        if risk.wind_caution > risk.wind_critical:
+            problems.append("weather.wind_speed: caution exceeds critical")
+        if risk.vis_critical > risk.vis_caution:
+            problems.append("weather.visibility: critical exceeds caution")
+        if not -90 <= geofence.airport_lat <= 90 or not -180 <= geofence.airport_lng <= 180:
+            problems.append("geofence: airport coordinates out of range")
+        if not 0 < geofence.red_radius_km <= geofence.yellow_radius_km:
+            problems.append("geofence: need 0 < red_radius_km <= yellow_radius_km")
+        if weather.cell_deg <= 0 or weather.ttl_s < 0 or weather.max_workers < 1:
+            problems.append("weather_settings: cell_deg/max_workers must be positive")
+        if weather.budget_ms < 0 or weather.timeout_s <= 0:
+            problems.append("weather_settings: need budget_ms >= 0 and timeout_s > 0")
+        if not (1 <= weather.breaker_min_calls <= weather.breaker_window and
+                0 < weather.breaker_failure_rate <= 1 and
+                0 < weather.breaker_open_s <= weather.breaker_max_open_s):
+            problems.append("weather_settings: need 1 <= breaker_min_calls <= breaker_window, "
+                            "0 < breaker_failure_rate <= 1 and 0 < breaker_open_s <= breaker_max_open_s")
+        if weather_field and not (weather_field.min_lat < weather_field.max_lat and
+                                  weather_field.min_lng < weather_field.max_lng):
+            problems.append("weather_settings.synthetic_field: need min_lat < max_lat and min_lng < max_lng")
+        if weather_field and (weather_field.cell_deg <= 0 or weather_field.step_s <= 0 or
+                              weather_field.duration_s < weather_field.step_s):
+            problems.append("weather_settings.synthetic_field: need cell_deg, step_s > 0 and duration_s >= step_s")
+        if sensor_stats.window_s <= 0 or not 0 < sensor_stats.ewma_alpha <= 1:
+            problems.append("sensor_stats: need window_s > 0 and 0 < ewma_alpha <= 1")
+        problems.extend(_check_polygons(raw.get('geofence_polygons', [])))
+        if risk_window.hysteresis < 0 or risk_window.min_dwell_s < 0:
+            problems.append("risk_window: need hysteresis >= 0 and min_dwell_s >= 0")
+
+    if problems:
+        raise ConfigError("; ".join(problems))
+
+    return AppConfig(
+        raw=MappingProxyType(raw),
+        risk=risk,
+        geofence=geofence,
+        weather=weather,
+        sensor_stats=sensor_stats,
+        risk_window=risk_window,
+        version=version,
+        mtime=mtime,
+        path=path
+    )
+
+# ============================================
+# SERVICE
+# ============================================
+
+class ConfigService:
+    """
+    Holds the current AppConfig and reloads it when config.json changes.
+
+    Readers take service.current (a single reference read, always a
+    complete version). Subscribers are called with every new version.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_PATH):
+        self.path = os.path.abspath(path)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self.reloads = 0
+
+        try:
+            self.current = self._load(version=1)
+            print(f"[Config] Loaded v1 from: {self.path}")
+        except FileNotFoundError:
+            print(f"[Config] Warning: {self.path} not found, using defaults")
+            self.current = compile_config({}, version=1, path=self.path)
+
+    def _load(self, version):
+        mtime = os.path.getmtime(self.path)
+        with open(self.path) as f:
+            raw = json.load(f)
+        return compile_config(raw, version=version, mtime=mtime, path=self.path)
+
+    def subscribe(self, callback):
+        """Register callback(app_config); it is called immediately with the current version."""
+        with self._lock:
+            self._subscribers.append(callback)
+        callback(self.current)
+
+    def reload(self, force=False):
+        """
+        Reload config.json if its mtime changed (or force=True).
+        An invalid file is rejected and the current version kept.
+        Returns True if a new version was swapped in.
+        """
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return False
+            if not force and mtime == self.current.mtime:
+                return False
+
+            try:
+                new = self._load(version=self.current.version + 1)
+            except (OSError, json.JSONDecodeError, ConfigError) as e:
+                print(f"[Config] ❌ Reload rejected, keeping v{self.current.version}: {e}")
+                # Remember the mtime so a bad file is not re-parsed every poll
+                self.current = replace(self.current, mtime=mtime)
+                return False
+
+            self.current = new
+            self.reloads += 1
+            subscribers = list(self._subscribers)
+
+        print(f"[Config] ✅ Reloaded v{new.version} from: {self.path}")
+        for callback in subscribers:
+            try:
+                callback(new)
+            except Exception as e:
+                print(f"[Config] ⚠️  Subscriber {callback!r} failed: {e}")
+        return True
+
+    def start_watching(self, interval_s=1.0):
+        """Poll config.json's mtime from a daemon thread."""
+        if self._watcher:
+            return
+
+        def watch():
+            while not self._stop.wait(interval_s):
+                self.reload()
+
+        self._watcher = threading.Thread(target=watch, name='config-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path=None):
+    """Shared ConfigService per config file (defaults to Backend/config.json)."""
+    path = os.path.abspath(path or DEFAULT_CONFIG_PATH)
+    with _services_lock:
+        if path not in _services:
+            _services[path] = ConfigService(path)
+        return _services[path]
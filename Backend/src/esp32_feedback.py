@@ -0,0 +1,121 @@
+"""
+Verdict commands from main.py back to the ESP32.
+
+Each packet is judged twice: a local verdict from on-board inputs only
+(geofence, GPS quality, vibration, tilt, motor) is written straight
+away, then a refined verdict that adds weather. Weather only adds risk,
+so the local verdict is a lower bound: it is written when it escalates
+the current command and otherwise left for the refined verdict to
+settle, which keeps the ESP32 from flapping between the two.
+
+Verdicts are due deadline_ms after the serial read. A late local verdict
+is dropped, since the refined one follows. A late refined verdict is
+still written (it may escalate) and counted in deadline_misses.
+
+An unchanged command is not re-sent every sample; a timer thread repeats
+it as a heartbeat every heartbeat_s, whether or not packets arrive, so
+the ESP32 can tell the link is alive. Serial-read-to-write latency is
+recorded per phase.
+"""
+import threading
+import time
+
+from latency import LatencyRecorder
+
+# Command severity, lowest first (names match risk_engine levels)
+COMMANDS = ('SAFE', 'CAUTION', 'ABORT')
+_SEVERITY = {command: i for i, command in enumerate(COMMANDS)}
+
+PHASES = ('local', 'refined')
+
+
+class FeedbackWriter:
+    """Deduplicating ESP32 command writer with deadline, heartbeat and latency stats."""
+
+    def __init__(self, ser, heartbeat_s=1.0, deadline_ms=10.0, history=1000, clock=time.perf_counter):
+        self.ser = ser
+        self.heartbeat_s = heartbeat_s
+        self.deadline_ms = deadline_ms
+        self.clock = clock
+        self.command = None
+        self._sent_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.latency = {phase: LatencyRecorder(history) for phase in PHASES}
+        self.deadline_misses = {phase: 0 for phase in PHASES}
+        self.writes = 0
+        self.heartbeats = 0
+        self.suppressed = 0
+        self.dropped_late = 0
+        self.errors = 0
+
+    def start(self):
+        """Start the heartbeat timer thread; returns self."""
+        if self._thread is None and self.heartbeat_s > 0:
+            self._thread = threading.Thread(target=self._heartbeat, name='esp32-heartbeat', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat(self):
+        # Wake a few times per period so a heartbeat is never much later than heartbeat_s
+        while not self._stop.wait(self.heartbeat_s / 4):
+            with self._lock:
+                if self.command is not None and self.clock() - self._sent_at >= self.heartbeat_s:
+                    if self._write(self.command):
+                        self.heartbeats += 1
+
+    def _write(self, level):
+        # Caller holds self._lock
+        try:
+            self.ser.write(f"{level}\n".encode())
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  Feedback write failed: {e}")
+            return False
+        self.command = level
+        self._sent_at = self.clock()
+        return True
+
+    def send(self, level, read_at, phase='refined'):
+        """
+        Offer a verdict for the packet read at read_at (clock() timestamp).
+        Returns True if a command was written to the serial port.
+        """
+        if level not in _SEVERITY:
+            return False
+        if (self.clock() - read_at) * 1000 > self.deadline_ms:
+            self.deadline_misses[phase] += 1
+            if phase == 'local':
+                self.dropped_late += 1
+                return False
+
+        with self._lock:
+            if level == self.command:
+                self.suppressed += 1
+                return False
+            if phase == 'local' and self.command is not None and \
+                    _SEVERITY[level] < _SEVERITY[self.command]:
+                # De-escalation waits for the refined verdict
+                return False
+            if not self._write(level):
+                return False
+            self.writes += 1
+        self.latency[phase].record((self.clock() - read_at) * 1000)
+        return True
+
+    def stats(self):
+        return {
+            'command': self.command,
+            'writes': self.writes,
+            'heartbeats': self.heartbeats,
+            'suppressed': self.suppressed,
+            'deadline_ms': self.deadline_ms,
+            'deadline_misses': dict(self.deadline_misses),
+            'dropped_late': self.dropped_late,
+            'errors': self.errors,
+            'latency': {phase: recorder.summary() for phase, recorder in self.latency.items()}
+        }
@@ -0,0 +1,341 @@
+"""
+Risk transition events.
+
+The ingest path feeds each drone's latest state to a TransitionDetector,
+which emits typed events (risk level change, zone entry/exit, GPS fix
+lost/regained, diagnostic scan start/end) onto an in-process EventBus.
+Subscribers get bounded queues; WebhookDispatcher forwards batches to an
+HTTP endpoint with retry. Every event carries the packet's receipt time so
+packet-to-delivery latency is measured per subscriber.
+"""
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from latency import LatencyRecorder
+
+LEVEL_CHANGED = "level_changed"
+ZONE_ENTERED = "zone_entered"
+ZONE_EXITED = "zone_exited"
+GPS_FIX_LOST = "gps_fix_lost"
+GPS_FIX_REGAINED = "gps_fix_regained"
+SCAN_STARTED = "scan_started"
+SCAN_ENDED = "scan_ended"
+
+EVENT_TYPES = (LEVEL_CHANGED, ZONE_ENTERED, ZONE_EXITED, GPS_FIX_LOST,
+               GPS_FIX_REGAINED, SCAN_STARTED, SCAN_ENDED)
+
+
+@dataclass(frozen=True)
+class TransitionEvent:
+    """One state transition for one drone."""
+    seq: int
+    type: str
+    drone_id: str
+    previous: object
+    current: object
+    timestamp: float      # wall clock (time.time) when emitted
+    received_at: float    # time.perf_counter() when the packet arrived
+
+    def to_dict(self):
+        data = asdict(self)
+        data.pop('received_at')
+        return data
+
+# ============================================
+# DETECTION
+# ============================================
+
+class TransitionDetector:
+    """Compares each drone's new state with the last one it saw."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._last = {}   # drone_id -> (level, zone, gps_valid, scan)
+        self._lock = threading.Lock()
+
+    def observe(self, drone_id, level, zone, gps_valid, scan_active, received_at=None):
+        """
+        Record a drone's state and publish any transitions.
+        Returns list of events emitted.
+        """
+        received_at = received_at if received_at is not None else time.perf_counter()
+        current = (level, zone, gps_valid, scan_active)
+
+        with self._lock:
+            previous = self._last.get(drone_id)
+            self._last[drone_id] = current
+
+        if previous is None or previous == current:
+            return []
+
+        prev_level, prev_zone, prev_gps, prev_scan = previous
+        changes = []
+
+        if gps_valid != prev_gps:
+            changes.append((GPS_FIX_REGAINED if gps_valid else GPS_FIX_LOST, prev_gps, gps_valid))
+        if zone != prev_zone:
+            if prev_zone in ("RED", "YELLOW"):
+                changes.append((ZONE_EXITED, prev_zone, zone))
+            if zone in ("RED", "YELLOW"):
+                changes.append((ZONE_ENTERED, prev_zone, zone))
+        if level != prev_level:
+            changes.append((LEVEL_CHANGED, prev_level, level))
+        if scan_active != prev_scan:
+            changes.append((SCAN_STARTED if scan_active else SCAN_ENDED, prev_scan, scan_active))
+
+        return [self.bus.publish(kind, drone_id, before, after, received_at)
+                for kind, before, after in changes]
+
+# ============================================
+# BUS
+# ============================================
+
+class Subscription:
+    """
+    Bounded queue of events for one consumer.
+    When full, the oldest event is dropped so a slow consumer never blocks
+    ingest.
+    """
+
+    def __init__(self, name, maxsize=1000, types=None):
+        self.name = name
+        self.types = frozenset(types) if types else None
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.latency = LatencyRecorder()
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event):
+        if self.types and event.type not in self.types:
+            return
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event (or None on timeout); records packet-to-delivery latency."""
+        try:
+            event = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.mark_delivered(event)
+        return event
+
+    def mark_delivered(self, event):
+        self.latency.record((time.perf_counter() - event.received_at) * 1000)
+
+    def stats(self):
+        return {
+            'pending': self.queue.qsize(),
+            'dropped': self.dropped,
+            'delivery_latency': self.latency.summary()
+        }
+
+
+class EventBus:
+    """In-process publish/subscribe with per-subscriber bounded queues."""
+
+    def __init__(self, history=200):
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self.published = 0
+        self.recent = deque(maxlen=history)   # for polling clients
+
+    def subscribe(self, name, maxsize=1000, types=None):
+        sub = Subscription(name, maxsize, types)
+        with self._lock:
+            self._subscriptions.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.closed = True
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+
+    def publish(self, kind, drone_id, previous, current, received_at):
+        event = TransitionEvent(
+            seq=next(self._seq),
+            type=kind,
+            drone_id=drone_id,
+            previous=previous,
+            current=current,
+            timestamp=time.time(),
+            received_at=received_at
+        )
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self.published += 1
+            self.recent.append(event)
+
+        for sub in subscriptions:
+            sub.offer(event)
+        return event
+
+    def events_since(self, seq):
+        with self._lock:
+            return [e for e in self.recent if e.seq > seq]
+
+    def stats(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            'published': self.published,
+            'subscribers': {sub.name: sub.stats() for sub in subscriptions}
+        }
+
+# ============================================
+# WEBHOOK DELIVERY
+# ============================================
+
+class WebhookDispatcher:
+    """
+    Forwards bus events to an HTTP endpoint in batches.
+
+    A batch is sent when max_batch events are queued or max_wait_s has
+    passed since the first one. Failed posts are retried with jittered
+    exponential backoff; a batch that exhausts its retries is counted as
+    failed and dropped.
+    """
+
+    def __init__(self, bus, url, max_batch=50, max_wait_s=0.05, max_retries=3,
+                 backoff_s=0.1, timeout=2, maxsize=5000):
+        import requests
+
+        self.url = url
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.subscription = bus.subscribe(f"webhook:{url}", maxsize=maxsize)
+        self.batches_sent = 0
+        self.batches_failed = 0
+        self.retries = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='webhook', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _collect(self):
+        sub = self.subscription
+        try:
+            first = sub.queue.get(timeout=0.2)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(sub.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _post(self, batch):
+        body = {'events': [event.to_dict() for event in batch]}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, json=body, timeout=self.timeout)
+                if response.status_code < 300:
+                    return True
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    return False
+            except Exception as e:
+                print(f"[Events] Webhook {self.url} failed: {e}")
+            if attempt < self.max_retries:
+                self.retries += 1
+                delay = self.backoff_s * (2 ** attempt)
+                if self._stop.wait(delay * random.uniform(0.5, 1.5)):
+                    return False
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            if self._post(batch):
+                self.batches_sent += 1
+                for event in batch:
+                    self.subscription.mark_delivered(event)
+            else:
+                self.batches_failed += 1
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'batches_sent': self.batches_sent,
+            'batches_failed': self.batches_failed,
+            'retries': self.retries,
+            **self.subscription.stats()
+        }
+
+
+class LocalWebhookReceiver:
+    """
+    Stand-in webhook endpoint on localhost that records received batches.
+    fail_first makes the first N posts return 503 to exercise retries.
+    """
+
+    def __init__(self, port=0, fail_first=0):
+        self.batches = []
+        self.fail_first = fail_first
+        self.posts = 0
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = self.rfile.read(length)
+                receiver.posts += 1
+                if receiver.posts <= receiver.fail_first:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                receiver.batches.append(json.loads(payload)['events'])
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/hook"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
@@ -0,0 +1,249 @@
+"""
+Flight-plan pre-validation against the geofence.
+
+Checks every segment of a waypoint polyline against the restricted zones
+using exact segment-circle and segment-polygon intersection in a local
+planar projection (km) around each zone. All segments of a plan are
+processed at once with NumPy, so plans with thousands of vertices validate
+in milliseconds.
+"""
+import math
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Zone severity, used to pick the worst zone a segment touches
+ZONE_LEVELS = {'GREEN': 0, 'YELLOW': 1, 'RED': 2}
+
+# Segments per batch for polygon tests (bounds S x E memory)
+POLYGON_BATCH = 4096
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_waypoints(raw):
+    """
+    Accept [[lat, lng], ...] or [{'lat': .., 'lng': ..}, ...].
+    Returns: (N, 2) float array of lat/lng in degrees
+    Raises ValueError for anything else.
+    """
+    if not isinstance(raw, (list, tuple)):
+        raise ValueError("waypoints must be a list")
+    if len(raw) < 2:
+        raise ValueError("Flight plan needs at least 2 waypoints")
+
+    if all(isinstance(p, dict) for p in raw):
+        points = [(p.get('lat', p.get('latitude')), p.get('lng', p.get('longitude')))
+                  for p in raw]
+    elif all(isinstance(p, (list, tuple)) and len(p) == 2 for p in raw):
+        points = [(p[0], p[1]) for p in raw]
+    else:
+        raise ValueError("Waypoints must all be [lat, lng] pairs or all {lat, lng} objects")
+    if not all(_is_number(v) for point in points for v in point):
+        raise ValueError("Waypoints must be numeric lat/lng pairs")
+
+    waypoints = np.asarray(points, dtype=float)
+    if not np.isfinite(waypoints).all():
+        raise ValueError("Waypoints must be numeric lat/lng pairs")
+    if (np.abs(waypoints[:, 0]) > 90).any() or (np.abs(waypoints[:, 1]) > 180).any():
+        raise ValueError("Waypoint out of range")
+    return waypoints
+
+
+def _project(waypoints, lat0, lng0):
+    """Equirectangular projection to km around (lat0, lng0)."""
+    x = np.radians(waypoints[:, 1] - lng0) * math.cos(math.radians(lat0)) * EARTH_RADIUS_KM
+    y = np.radians(waypoints[:, 0] - lat0) * EARTH_RADIUS_KM
+    return x, y
+
+
+def _circle_intervals(x, y, radius):
+    """
+    Intersect every segment with a circle at the origin.
+
+    Solves |P0 + t*D|^2 = r^2 per segment.
+    Returns: (t_enter, t_exit) arrays clipped to [0, 1]; (1, 0) where the
+             segment misses the circle
+    """
+    px, py = x[:-1], y[:-1]
+    dx, dy = np.diff(x), np.diff(y)
+
+    a = dx * dx + dy * dy
+    b = 2 * (px * dx + py * dy)
+    c = px * px + py * py - radius * radius
+    disc = b * b - 4 * a * c
+
+    # Strictly inside, matching check_airspace (distance < radius);
+    # a zero-length segment is inside iff its point is
+    safe_a = np.where(a > 0, a, 1.0)
+    root = np.sqrt(np.maximum(disc, 0))
+    t1 = np.where(a > 0, (-b - root) / (2 * safe_a), 0.0)
+    t2 = np.where(a > 0, (-b + root) / (2 * safe_a), 1.0)
+    hit = np.where(a > 0, (disc > 0) & (t1 < 1) & (t2 > 0), c < 0)
+
+    t_enter = np.where(hit, np.clip(t1, 0, 1), 1.0)
+    t_exit = np.where(hit, np.clip(t2, 0, 1), 0.0)
+    return t_enter, t_exit
+
+
+def _points_in_polygon(px, py, vx, vy):
+    """Vectorized even-odd ray casting; px/py any shape, vx/vy polygon vertices."""
+    px = px[..., None]
+    py = py[..., None]
+    x1, y1 = vx, vy
+    x2, y2 = np.roll(vx, -1), np.roll(vy, -1)
+
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    crossings = straddles & (px < x_cross)
+    return (np.count_nonzero(crossings, axis=-1) % 2) == 1
+
+
+def _polygon_intervals(x, y, vx, vy):
+    """
+    Intersect every segment with a polygon.
+
+    Returns: (t_enter, t_exit, inside_fraction) arrays, where t_enter/t_exit
+             are the first entry and last exit parameters (t_enter > t_exit
+             on a miss) and inside_fraction is the share of the segment
+             inside the polygon.
+    """
+    n_seg = len(x) - 1
+    t_enter = np.ones(n_seg)
+    t_exit = np.zeros(n_seg)
+    fraction = np.zeros(n_seg)
+
+    ex1, ey1 = vx, vy
+    edx, edy = np.roll(vx, -1) - vx, np.roll(vy, -1) - vy
+
+    for lo in range(0, n_seg, POLYGON_BATCH):
+        hi = min(lo + POLYGON_BATCH, n_seg)
+        px, py = x[lo:hi, None], y[lo:hi, None]
+        dx, dy = x[lo + 1:hi + 1, None] - px, y[lo + 1:hi + 1, None] - py
+
+        # Segment-edge intersection parameters (S x E)
+        denom = dx * edy - dy * edx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((ex1 - px) * edy - (ey1 - py) * edx) / denom
+            u = ((ex1 - px) * dy - (ey1 - py) * dx) / denom
+        crosses = (denom != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+
+        # Split each segment at its crossings and test the piece midpoints
+        cuts = np.where(crosses, t, np.nan)
+        cuts = np.concatenate([np.zeros((hi - lo, 1)), cuts, np.ones((hi - lo, 1))], axis=1)
+        cuts.sort(axis=1)
+        cuts = np.where(np.isnan(cuts), 1.0, cuts)
+
+        starts, ends = cuts[:, :-1], cuts[:, 1:]
+        mids = (starts + ends) / 2
+        inside = _points_in_polygon(px + mids * dx, py + mids * dy, vx, vy)
+        inside &= ends > starts
+
+        fraction[lo:hi] = np.sum(np.where(inside, ends - starts, 0), axis=1)
+        any_inside = inside.any(axis=1)
+        first = np.argmax(inside, axis=1)
+        last = inside.shape[1] - 1 - np.argmax(inside[:, ::-1], axis=1)
+        rows = np.arange(hi - lo)
+        t_enter[lo:hi] = np.where(any_inside, starts[rows, first], 1.0)
+        t_exit[lo:hi] = np.where(any_inside, ends[rows, last], 0.0)
+
+    return t_enter, t_exit, fraction
+
+
+class FlightPlanValidator:
+    """
+    Validates waypoint polylines against circular and polygonal zones.
+
+    Zones are dicts with 'name', 'zone' (RED/YELLOW) and either
+    'lat'/'lng'/'radius_km' (circle) or 'polygon': [[lat, lng], ...].
+    """
+
+    def __init__(self, geospace, polygons=None):
+        self.geospace = geospace
+        self.polygons = list(polygons or [])
+
+    def apply_config(self, app_config):
+        """Config subscriber: pick up polygon zones from 'geofence_polygons'."""
+        self.polygons = list(app_config.raw.get('geofence_polygons', []))
+
+    def zones(self):
+        return self.geospace.get_zones() + self.polygons
+
+    def validate(self, raw_waypoints):
+        """
+        Validate a flight plan.
+
+        Returns dict with:
+            - valid: False if any segment enters a RED zone
+            - first_violation: earliest RED entry along the route (or None)
+            - segments: per-segment length_km, max_zone and km inside each zone
+        """
+        started = time.perf_counter()
+        waypoints = parse_waypoints(raw_waypoints)
+        n_seg = len(waypoints) - 1
+
+        max_level = np.zeros(n_seg, dtype=np.int8)
+        exposure = {}
+        violation = None
+
+        for zone in self.zones():
+            if 'polygon' in zone:
+                poly = np.asarray(zone['polygon'], dtype=float)
+                lat0, lng0 = poly[:, 0].mean(), poly[:, 1].mean()
+                x, y = _project(waypoints, lat0, lng0)
+                vx, vy = _project(poly, lat0, lng0)
+                t_enter, t_exit, fraction = _polygon_intervals(x, y, vx, vy)
+            else:
+                lat0, lng0 = zone['lat'], zone['lng']
+                x, y = _project(waypoints, lat0, lng0)
+                t_enter, t_exit = _circle_intervals(x, y, zone['radius_km'])
+                fraction = np.maximum(t_exit - t_enter, 0)
+
+            seg_len = np.hypot(np.diff(x), np.diff(y))
+            hit = t_enter < t_exit
+            inside_km = fraction * seg_len
+            exposure[zone['name']] = inside_km
+
+            level = ZONE_LEVELS.get(zone['zone'], 0)
+            max_level = np.where(hit, np.maximum(max_level, level), max_level)
+
+            if level == ZONE_LEVELS['RED'] and hit.any():
+                seg = int(np.argmax(hit))
+                if violation is None or (seg, t_enter[seg]) < (violation['segment'], violation['t']):
+                    a, b = waypoints[seg], waypoints[seg + 1]
+                    point = a + t_enter[seg] * (b - a)
+                    violation = {
+                        'segment': seg,
+                        't': float(t_enter[seg]),
+                        'zone': zone['name'],
+                        'lat': round(float(point[0]), 6),
+                        'lng': round(float(point[1]), 6),
+                    }
+
+        # Segment lengths from the first projection are accurate enough for reporting
+        x, y = _project(waypoints, waypoints[0, 0], waypoints[0, 1])
+        lengths = np.hypot(np.diff(x), np.diff(y))
+
+        if violation is not None:
+            seg = violation['segment']
+            violation['distance_along_km'] = round(
+                float(lengths[:seg].sum() + violation['t'] * lengths[seg]), 3)
+
+        zone_names = list(ZONE_LEVELS)
+        return {
+            'valid': violation is None,
+            'waypoints': len(waypoints),
+            'total_km': round(float(lengths.sum()), 3),
+            'first_violation': violation,
+            'segments': {
+                'length_km': np.round(lengths, 4).tolist(),
+                'max_zone': [zone_names[level] for level in max_level],
+                'exposure_km': {name: np.round(km, 4).tolist() for name, km in exposure.items()},
+            },
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
@@ -0,0 +1,326 @@
+"""
+Telemetry ingest: the body of server.py's update_global_state.
+
+TelemetryIngest folds each packet into the dashboard state (sensor_data
+and the running TelemetryRecord), then runs streaming stats, weather,
+geofence, risk, the history row and transition events through the
+collaborators it is given. server.py builds one from its module
+singletons; importing this module starts nothing, so benchmarks.py can
+drive the same code with its own collaborators.
+"""
+import time
+from datetime import datetime
+
+from risk_engine import calculate_risk_index
+from telemetry_history import row_from_record
+from telemetry_record import TelemetryRecord, parse_packet, ESP32_HDOP_SCALE
+from tracing import mark
+
+# Spectral features older than this are ignored by the risk engine
+SPECTRUM_MAX_AGE_S = 30
+
+
+def initial_sensor_data():
+    """Dashboard state before the first packet (the /api/current shape)."""
+    return {
+        "mpu": {
+            "ax": 0.0, 
+            "ay": 0.0, 
+            "az": 1.0, 
+            "vibration_rms": 0.0, 
+            "tilt_angle": 0.0
+        },
+        "environment": {
+            "temperature": None,  # None = sensor not connected
+            "humidity": None, 
+            "light_percent": None
+        },
+        "motor": {
+            "rpm": 0, 
+            "hall_detected": False
+        },
+        "gps": {
+            "latitude": None,  # None = no GPS fix
+            "longitude": None,
+            "speed": 0.0, 
+            "satellites": 0, 
+            "geo_zone": "UNKNOWN", 
+            "hdop": 99.9,
+            "raw_signal": 0,
+            "gps_quality": "UNKNOWN"
+        },
+        "weather": {
+            "wind_speed": None,
+            "visibility": None,
+            "condition": "No Data"
+        },
+        "system": {
+            "risk_score": 0,
+            "risk_level": "STANDBY",
+            "blocked_reason": "Waiting for Hardware...",
+            "scan_triggered": False,
+            "source": "NONE",
+            "timestamp": datetime.now().isoformat(),
+            "gps_valid": False,
+            "sensors_valid": False
+        },
+        # Streaming per-drone aggregates (EWMA, mean/std, rolling min/max)
+        "stats": {},
+        # FFT features from the latest raw accelerometer burst
+        "spectrum": None,
+        # Rolling risk aggregates and hysteresis-filtered level (system.risk_level)
+        "risk_window": None
+    }
+
+
+class TelemetryIngest:
+    """
+    Dashboard state plus the per-packet ingest path.
+
+    sensor_data: the /api/current dict (updated in place, never rebound)
+    state_record: latest sensor readings, merged across partial packets;
+    the risk engine, geofence and history read it directly
+    """
+
+    def __init__(self, mappls, weather_api, stats_store, risk_windows, vibration,
+                 transitions, tracer, history, spectrum_max_age_s=SPECTRUM_MAX_AGE_S):
+        self.mappls = mappls
+        self.weather_api = weather_api
+        self.stats_store = stats_store
+        self.risk_windows = risk_windows
+        self.vibration = vibration
+        self.transitions = transitions
+        self.tracer = tracer
+        self.history = history
+        self.spectrum_max_age_s = spectrum_max_age_s
+        self.sensor_data = initial_sensor_data()
+        self.state_record = TelemetryRecord()
+        self.scan_reset_time = 0
+
+    def update(self, incoming, source="UNKNOWN", received_at=None):
+        """
+        Fold one packet into the state: decode, stats, weather, geofence,
+        risk, history row and transition events.
+        received_at: time.perf_counter() at packet arrival, for event latency
+        Returns: (success: bool, message: str)
+        """
+        sensor_data = self.sensor_data
+        state_record = self.state_record
+        
+        if received_at is None:
+            received_at = time.perf_counter()
+        
+        trace = self.tracer.begin(incoming)
+        
+        print("\n" + "="*70)
+        print(f"📡 INCOMING DATA FROM {source} @ {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
+        print("="*70)
+        
+        has_valid_gps = False
+        has_valid_sensors = False
+        
+        # ============================================
+        # UPDATE SENSOR DATA
+        # ============================================
+        
+        # Decode once, folding the packet into the running state record.
+        # ESP32 HDOP is always HDOP * 100; other senders' units are guessed.
+        # Carried blocks are copied into sensor_data when read (/api/current);
+        # environment readings are per packet, so they are stored now
+        record = parse_packet(incoming, state_record, into=state_record,
+                              hdop_scale=ESP32_HDOP_SCALE if source == "ESP32" else None)
+        categories = record.categories
+        if 'environment' in categories:
+            record.apply_to(sensor_data, ('environment',))
+        if record.scan_triggered is not None:
+            sensor_data['system']['scan_triggered'] = record.scan_triggered
+        
+        # Log received data
+        if 'mpu' in categories:
+            print(f"📊 MPU6050:")
+            print(f"   Vibration: {record.vibration_rms or 0:.3f}G")
+            print(f"   Tilt: {record.tilt_angle or 0:.1f}°")
+            has_valid_sensors = True
+        
+        if 'environment' in categories:
+            print(f"🌡️  Environment:")
+            if record.temperature is not None:
+                print(f"   Temp: {record.temperature:.1f}°C")
+                has_valid_sensors = True
+            else:
+                print(f"   Temp: N/A")
+            
+            if record.humidity is not None:
+                print(f"   Humidity: {record.humidity:.0f}%")
+                has_valid_sensors = True
+            else:
+                print(f"   Humidity: N/A")
+            
+            if record.light_percent is not None:
+                print(f"   💡 Light: {record.light_percent}%")
+                has_valid_sensors = True
+            else:
+                print(f"   💡 Light: N/A")
+        
+        if 'motor' in categories:
+            print(f"⚙️  Motor:")
+            print(f"   RPM: {record.rpm or 0:.0f}")
+            print(f"   Hall: {'✅ OK' if record.hall_detected else '❌ FAULT'}")
+            has_valid_sensors = True
+        
+        if 'gps' in categories:
+            print(f"🛰️  GPS:")
+            if record.has_fix:
+                print(f"   Location: {record.latitude:.6f}, {record.longitude:.6f}")
+                print(f"   Satellites: {record.satellites or 0}")
+                print(f"   HDOP: {record.hdop:.2f}")
+                has_valid_gps = True
+            else:
+                print(f"   ⚠️  NO FIX (Sats: {record.satellites or 0}, HDOP: {record.hdop:.2f})")
+        
+        # ============================================
+        # UPDATE SYSTEM FLAGS
+        # ============================================
+        
+        sensor_data['system']['source'] = source
+        sensor_data['system']['gps_valid'] = has_valid_gps
+        sensor_data['system']['sensors_valid'] = has_valid_sensors
+        
+        # ============================================
+        # STREAMING SENSOR STATISTICS
+        # ============================================
+        
+        drone_id = incoming.get('drone_id') or source
+        sensor_data['system']['drone_id'] = drone_id
+        sensor_data['spectrum'] = self.vibration.latest(drone_id, self.spectrum_max_age_s)
+        # Only channels this packet carried (the record also holds earlier values)
+        mpu_carried = 'mpu' in categories
+        sensor_data['stats'] = self.stats_store.update(drone_id, {
+            'vibration_rms': record.vibration_rms if mpu_carried else None,
+            'tilt_angle': record.tilt_angle if mpu_carried else None,
+            'rpm': record.rpm if 'motor' in categories else None
+        })
+        
+        # ============================================
+        # HANDLE DIAGNOSTIC SCAN
+        # ============================================
+        
+        if record.scan_triggered:
+            sensor_data['system']['scan_triggered'] = True
+            self.scan_reset_time = time.time() + 5
+            print(f"🔍 DIAGNOSTIC SCAN TRIGGERED (5s duration)")
+        
+        # Auto-reset scan after timeout
+        if sensor_data['system']['scan_triggered'] and time.time() > self.scan_reset_time:
+            sensor_data['system']['scan_triggered'] = False
+            print(f"✅ Diagnostic scan completed")
+        
+        # ============================================
+        # FETCH WEATHER DATA
+        # ============================================
+        
+        weather_data = None
+        
+        if has_valid_gps:
+            try:
+                # Keeps the fleet's area warm so other drones' lookups hit the cache
+                self.weather_api.track(drone_id, state_record.latitude, state_record.longitude)
+                weather_data = self.weather_api.get_weather(
+                    state_record.latitude, 
+                    state_record.longitude,
+                    budget_ms=self.weather_api.settings.budget_ms
+                )
+            
+                if weather_data:
+                    sensor_data['weather'] = {
+                        "wind_speed": weather_data.get('wind_speed', 0),
+                        "visibility": weather_data.get('visibility', 10000),
+                        "condition": weather_data.get('weather_main', 'Clear')
+                    }
+                    print(f"🌤️  Weather:")
+                    print(f"   Condition: {weather_data.get('weather_main', 'Unknown')}")
+                    print(f"   Wind: {weather_data.get('wind_speed', 0):.1f} m/s")
+                    print(f"   Visibility: {weather_data.get('visibility', 10000)/1000:.1f} km")
+            except Exception as e:
+                print(f"⚠️  Weather fetch failed: {e}")
+                sensor_data['weather'] = {
+                    "wind_speed": None,
+                    "visibility": None,
+                    "condition": "Unavailable"
+                }
+            mark(trace, 'weather_done')
+        else:
+            sensor_data['weather'] = {
+                "wind_speed": None,
+                "visibility": None,
+                "condition": "No GPS Fix"
+            }
+        
+        # ============================================
+        # GEOFENCE & RISK ASSESSMENT
+        # ============================================
+        
+        if has_valid_gps:
+            # Check airspace zone
+            zone = self.mappls.check_airspace(state_record.latitude, state_record.longitude)
+            sensor_data['gps']['geo_zone'] = zone
+            mark(trace, 'geofence_done')
+        
+            # Calculate risk
+            score, reason, level = calculate_risk_index(
+                state_record, 
+                zone, 
+                weather_data,
+                sensor_data['stats'],
+                sensor_data['spectrum']
+            )
+        
+            # Instantaneous score, level held steady by the drone's risk window
+            held = self.risk_windows.update(drone_id, score, level)
+            sensor_data['system']['risk_score'] = score
+            sensor_data['system']['blocked_reason'] = reason
+            sensor_data['system']['risk_level'] = held
+            mark(trace, 'risk_done')
+        
+            print(f"\n⚠️  Risk Assessment:")
+            print(f"   Zone: {zone}")
+            print(f"   Level: {held} (instant: {level})")
+            print(f"   Score: {score}%")
+            print(f"   Reason: {reason}")
+        else:
+            # No GPS = No geofence, no risk calculation
+            sensor_data['gps']['geo_zone'] = "UNKNOWN"
+            sensor_data['system']['risk_score'] = 0
+            sensor_data['system']['blocked_reason'] = "Waiting for GPS Fix..."
+            sensor_data['system']['risk_level'] = "STANDBY"
+        
+            print(f"\n⚠️  Risk Assessment:")
+            print(f"   Status: STANDBY (No GPS Fix)")
+        
+        # Update timestamp
+        sensor_data["system"]["timestamp"] = datetime.now().isoformat()
+        
+        self.history.append(row_from_record(record, sensor_data))
+        self.publish_transitions(drone_id, received_at)
+        
+        # Dashboard reports back when it renders this packet's verdict
+        sensor_data['system']['trace_id'] = trace['id'] if trace else None
+        self.tracer.published(trace)
+        
+        print("="*70 + "\n")
+        
+        return True, "Data updated successfully"
+
+    def publish_transitions(self, drone_id, received_at=None):
+        """Emit transition events for the drone's current state."""
+        sensor_data = self.sensor_data
+        system = sensor_data['system']
+        for event in self.transitions.observe(
+            drone_id,
+            system['risk_level'],
+            sensor_data['gps']['geo_zone'],
+            system['gps_valid'],
+            system['scan_triggered'],
+            received_at
+        ):
+            print(f"🔔 EVENT {event.type}: {event.previous} → {event.current}")
@@ -0,0 +1,52 @@
+"""
+Bounded latency recorder shared by the weather providers, event bus and
+load/trace tooling.
+"""
+import threading
+from collections import deque
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list (q in 0-100)."""
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, int(len(sorted_samples) * q / 100))
+    return sorted_samples[index]
+
+
+class LatencyRecorder:
+    """Keeps the most recent samples (ms) and a running count."""
+
+    def __init__(self, history=1000):
+        self._samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, ms):
+        with self._lock:
+            self._samples.append(ms)
+            self.count += 1
+
+    def summary(self):
+        """
+        Returns dict with: count, last_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms
+        (only count when nothing has been recorded yet)
+        """
+        with self._lock:
+            samples = list(self._samples)
+            count = self.count
+
+        if not samples:
+            return {'count': count}
+
+        last = samples[-1]
+        samples.sort()
+        return {
+            'count': count,
+            'last_ms': round(last, 3),
+            'mean_ms': round(sum(samples) / len(samples), 3),
+            'p50_ms': round(percentile(samples, 50), 3),
+            'p95_ms': round(percentile(samples, 95), 3),
+            'p99_ms': round(percentile(samples, 99), 3),
+            'max_ms': round(samples[-1], 3)
+        }
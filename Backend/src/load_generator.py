@@ -0,0 +1,355 @@
+"""
+Synthetic fleet load generator for server.py.
+
+Simulates N drones posting realistic telemetry to /data at a fixed rate
+and M dashboards polling /api/current (or holding /api/events/stream
+open), all from one asyncio loop over a pool of keep-alive connections.
+Prints and optionally saves a JSON report with throughput, p50/p95/p99
+latency and error rate per endpoint, so runs can be compared.
+
+Latency is measured from each request's scheduled send time, so a slow
+server shows up as latency rather than as silently fewer requests.
+
+Usage:
+    python load_generator.py --drones 50 --rate 5 --dashboards 5 --duration 30
+    python load_generator.py --spawn --out report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+from latency import percentile
+
+# ============================================
+# MINIMAL KEEP-ALIVE HTTP CLIENT
+# ============================================
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpPool:
+    """
+    Bounded pool of persistent HTTP/1.1 connections to one host.
+    Each request (including waiting for a slot and connecting) is limited
+    to timeout_s; a timed-out connection is closed, not reused.
+    """
+
+    def __init__(self, host, port, size, timeout_s=10.0):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except BaseException:
+            # Failed or cancelled connect: give the slot back
+            self._slots.release()
+            raise
+        return _Connection(reader, writer)
+
+    def _release(self, conn, reusable):
+        if reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    async def request(self, method, path, body=None):
+        """Returns (status, body bytes). Raises asyncio.TimeoutError after timeout_s."""
+        return await asyncio.wait_for(self._request(method, path, body), self.timeout_s)
+
+    async def _request(self, method, path, body):
+        conn = await self._acquire()
+        reusable = False
+        try:
+            payload = json.dumps(body).encode() if body is not None else b''
+            head = (f"{method} {path} HTTP/1.1\r\n"
+                    f"Host: {self.host}:{self.port}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "Connection: keep-alive\r\n")
+            if body is not None:
+                head += "Content-Type: application/json\r\n"
+            conn.writer.write(head.encode() + b"\r\n" + payload)
+            await conn.writer.drain()
+
+            status_line = await conn.reader.readline()
+            if not status_line:
+                raise ConnectionError("Connection closed by server")
+            version, status = status_line.split()[:2]
+
+            headers = {}
+            while True:
+                line = await conn.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if 'content-length' in headers:
+                data = await conn.reader.readexactly(int(headers['content-length']))
+                reusable = (version == b"HTTP/1.1" and
+                            headers.get('connection', '').lower() != 'close')
+            else:
+                data = await conn.reader.read()
+            return int(status), data
+        finally:
+            self._release(conn, reusable)
+
+    def close(self):
+        for conn in self._idle:
+            conn.close()
+        self._idle.clear()
+
+# ============================================
+# METRICS
+# ============================================
+
+class EndpointMetrics:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.events = 0
+        self.statuses = {}
+
+    def record(self, ms, status=None, error=False):
+        self.latencies.append(ms)
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        if error:
+            self.errors += 1
+
+    def report(self, duration_s):
+        samples = sorted(self.latencies)
+        count = len(samples)
+        result = {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': round(self.errors / count, 4) if count else 0.0,
+            'throughput_rps': round(count / duration_s, 2) if duration_s else 0.0,
+            'status_codes': {str(k): v for k, v in sorted(self.statuses.items())}
+        }
+        if self.events:
+            result['events'] = self.events
+            result['events_per_s'] = round(self.events / duration_s, 2) if duration_s else 0.0
+        if samples:
+            result.update({
+                'mean_ms': round(sum(samples) / count, 3),
+                'p50_ms': round(percentile(samples, 50), 3),
+                'p95_ms': round(percentile(samples, 95), 3),
+                'p99_ms': round(percentile(samples, 99), 3),
+                'max_ms': round(samples[-1], 3)
+            })
+        return result
+
+# ============================================
+# SIMULATED CLIENTS
+# ============================================
+
+def drone_packet(drone_id, state, rng):
+    """Advance a drone's random walk and build a /data packet."""
+    state['lat'] += rng.gauss(0, 0.0002)
+    state['lng'] += rng.gauss(0, 0.0002)
+    state['vib'] = min(1.2, max(0.0, state['vib'] + rng.gauss(0, 0.02)))
+    return {
+        'drone_id': drone_id,
+        'gps': {
+            'latitude': round(state['lat'], 6),
+            'longitude': round(state['lng'], 6),
+            'satellites': rng.randint(6, 14),
+            'hdop': rng.randint(80, 400),
+            'speed': round(abs(rng.gauss(5, 2)), 1)
+        },
+        'mpu': {
+            'ax': round(rng.gauss(0, 0.05), 3),
+            'ay': round(rng.gauss(0, 0.05), 3),
+            'az': round(rng.gauss(1, 0.05), 3),
+            'vibration_rms': round(state['vib'], 3),
+            'tilt_angle': round(abs(rng.gauss(3, 2)), 1)
+        },
+        'motor': {'rpm': rng.randint(1200, 1600), 'hall_detected': True},
+        'environment': {
+            'temperature': round(rng.gauss(28, 1), 1),
+            'humidity': rng.randint(50, 80),
+            'light_percent': rng.randint(40, 90)
+        },
+        'system': {'source': 'LOADGEN', 'scan_triggered': False}
+    }
+
+
+async def _fixed_rate(rate_hz, deadline, action):
+    """Call action(scheduled_time) at rate_hz until deadline, with a random phase."""
+    interval = 1.0 / rate_hz
+    next_at = time.perf_counter() + random.uniform(0, interval)
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await action(next_at)
+        next_at += interval
+
+
+async def run_drone(pool, drone_id, rate_hz, deadline, metrics, seed, base):
+    rng = random.Random(seed)
+    state = {'lat': base[0] + rng.uniform(-0.05, 0.05),
+             'lng': base[1] + rng.uniform(-0.05, 0.05),
+             'vib': rng.uniform(0.02, 0.2)}
+
+    async def send(scheduled):
+        try:
+            status, _ = await pool.request('POST', '/data', drone_packet(drone_id, state, rng))
+            metrics.record((time.perf_counter() - scheduled) * 1000, status, status >= 400)
+        except Exception:
+            metrics.record((time.perf_counter() - scheduled) * 1000, error=True)
+
+    await _fixed_rate(rate_hz, deadline, send)
+
+
+async def run_dashboard_poll(pool, rate_hz, deadline, metrics):
+    async def poll(scheduled):
+        try:
+            status, _ = await pool.request('GET', f'/api/current?_={int(time.time() * 1000)}')
+            metrics.record((time.perf_counter() - scheduled) * 1000, status, status >= 400)
+        except Exception:
+            metrics.record((time.perf_counter() - scheduled) * 1000, error=True)
+
+    await _fixed_rate(rate_hz, deadline, poll)
+
+
+async def run_dashboard_stream(host, port, deadline, metrics):
+    """Hold an SSE connection open and count events received (no latency per event)."""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                max(deadline - time.perf_counter(), 0))
+        writer.write(f"GET /api/events/stream HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode())
+        await writer.drain()
+        while time.perf_counter() < deadline:
+            try:
+                line = await asyncio.wait_for(reader.readline(), deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                metrics.errors += 1
+                break
+            if line.startswith(b"event:"):
+                metrics.events += 1
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        metrics.errors += 1
+
+# ============================================
+# DRIVER
+# ============================================
+
+async def run_load(url, drones, rate_hz, dashboards, poll_hz, duration_s, pool_size,
+                   stream=False, base=(8.7, 77.1), timeout_s=10.0):
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    pool = HttpPool(host, port, pool_size, timeout_s)
+    metrics = {'POST /data': EndpointMetrics(),
+               'GET /api/current': EndpointMetrics(),
+               'SSE /api/events/stream': EndpointMetrics()}
+
+    started = time.perf_counter()
+    deadline = started + duration_s
+    tasks = [run_drone(pool, f"LOAD-{i:04d}", rate_hz, deadline, metrics['POST /data'], i, base)
+             for i in range(drones)]
+    for _ in range(dashboards):
+        if stream:
+            tasks.append(run_dashboard_stream(host, port, deadline, metrics['SSE /api/events/stream']))
+        else:
+            tasks.append(run_dashboard_poll(pool, poll_hz, deadline, metrics['GET /api/current']))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    pool.close()
+
+    return {
+        'config': {
+            'url': url,
+            'drones': drones,
+            'rate_hz': rate_hz,
+            'dashboards': dashboards,
+            'dashboard_mode': 'stream' if stream else 'poll',
+            'poll_hz': poll_hz,
+            'duration_s': duration_s,
+            'pool_size': pool_size,
+            'timeout_s': timeout_s
+        },
+        'elapsed_s': round(elapsed, 3),
+        'offered_rps': round(drones * rate_hz + (0 if stream else dashboards * poll_hz), 2),
+        'endpoints': {name: m.report(elapsed) for name, m in metrics.items() if m.latencies or m.errors or m.events}
+    }
+
+
+def spawn_server(url, timeout_s=20):
+    """Start server.py as a subprocess and wait until it accepts connections."""
+    import socket
+
+    parsed = urlparse(url)
+    server_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+    proc = subprocess.Popen([sys.executable, server_py],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            socket.create_connection((parsed.hostname, parsed.port or 80), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server.py did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroGuard synthetic fleet load generator")
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--drones', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=2.0, help="Packets per second per drone")
+    parser.add_argument('--dashboards', type=int, default=2)
+    parser.add_argument('--poll-hz', type=float, default=2.0, help="Dashboard poll rate (app.js uses 2 Hz)")
+    parser.add_argument('--stream', action='store_true', help="Dashboards hold /api/events/stream instead of polling")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--pool-size', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout (seconds)")
+    parser.add_argument('--spawn', action='store_true', help="Start server.py for the run")
+    parser.add_argument('--out', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    proc = spawn_server(args.url) if args.spawn else None
+    try:
+        report = asyncio.run(run_load(args.url, args.drones, args.rate, args.dashboards,
+                                      args.poll_hz, args.duration, args.pool_size, args.stream,
+                                      timeout_s=args.timeout))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+        print(f"✅ Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,50 @@
 import serial
 import json
+import atexit
 import os
 import sys
+import time
 from mappls_client import MapplsGeospace
 from risk_engine import calculate_risk_index
 from weather_client import OpenWeatherClient
+from config_service import get_config_service
+from telemetry_ipc import TelemetryPublisher, DEFAULT_SOCKET_PATH
+from esp32_feedback import FeedbackWriter
+from risk_window import RiskWindowStore
+import tracing
 import requests
 
 
 # Load config
 config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
-try:
-    with open(config_path) as f:
-        config = json.load(f)
-    print(f"✅ Config loaded from: {config_path}")
-except FileNotFoundError:
+if not os.path.exists(config_path):
     print("❌ config.json not found")
     sys.exit(1)
+config_service = get_config_service(config_path)
+config = config_service.current.raw
+print(f"✅ Config loaded from: {config_path}")
+
+# Initialize clients (settings hot-reload when config.json changes)
+mappls = MapplsGeospace(config_service.current.geofence)
+weather_client = OpenWeatherClient(settings=config_service.current.weather)
+risk_windows = RiskWindowStore(config_service.current.risk_window)
+for module in (mappls, weather_client, risk_windows):
+    config_service.subscribe(module.apply_config)
+config_service.start_watching()
+
+# Local socket to server.py; HTTP is used whenever it is not connected
+publisher = TelemetryPublisher(config.get('ipc', {}).get('socket_path', DEFAULT_SOCKET_PATH))
+
+# Fraction of packets traced end to end (serial receipt → dashboard render)
+trace_rate = config.get('tracing', {}).get('sample_rate', 0.0)
 
-# Initialize clients
-mappls = MapplsGeospace(config_path)
-weather_client = OpenWeatherClient(config.get('OPENWEATHER_API_KEY', ''))
+def send_to_server(data):
+    """Forward a packet to the web server. Returns True if it was handed off."""
+    tracing.mark(data.get('trace'), 'forwarded')
+    if publisher.publish(data):
+        return True
+    response = requests.post('http://localhost:5000/data', json=data, timeout=1)
+    return response.ok
 
 # Try to connect to ESP32
 serial_config = config.get('hardware_config', {}).get('serial', {})
@@ -39,6 +63,48 @@ except serial.SerialException as e:
     print("  4. Try alternative ports:", serial_config.get('alternative_ports', []))
     sys.exit(1)
 
+# Verdict commands back to the ESP32 (deduplicated, deadline-checked, timer heartbeat)
+feedback_config = config.get('esp32_feedback', {})
+feedback = FeedbackWriter(ser,
+                          heartbeat_s=feedback_config.get('heartbeat_s', 1.0),
+                          deadline_ms=feedback_config.get('deadline_ms', 10)).start()
+atexit.register(feedback.stop)
+atexit.register(lambda: print(f"📊 ESP32 feedback: {json.dumps(feedback.stats())}"))
+
+def read_gps(data):
+    """
+    Decode a packet's GPS block once: returns (gps, lat, lng, satellites).
+    A packet without one gets an empty block, which evaluate_packet tags
+    with the zone.
+    """
+    gps = data.get('gps')
+    if not isinstance(gps, dict):
+        gps = data['gps'] = {}
+    return gps, gps.get('latitude', 0), gps.get('longitude', 0), gps.get('satellites', 0)
+
+def evaluate_packet(data, gps, lat, lng, read_at):
+    """
+    Two-phase verdict for one packet (gps, lat, lng from read_gps). The
+    local-only verdict is offered to the ESP32 first; the weather-refined
+    verdict follows once the weather lookup (bounded by
+    weather_settings.budget_ms) returns, passed through the drone's risk
+    window so a score hovering at a threshold does not flip the command.
+    Returns (risk_score, reason, level, zone) with the windowed level.
+    """
+    zone = mappls.check_airspace(lat, lng)
+    gps['geo_zone'] = zone
+
+    # Phase 1: geofence, GPS quality, vibration, tilt, motor
+    _, _, level = calculate_risk_index(data, zone)
+    feedback.send(level, read_at, phase='local')
+
+    # Phase 2: add weather
+    weather = weather_client.get_weather(lat, lng, budget_ms=weather_client.settings.budget_ms)
+    risk_score, reason, level = calculate_risk_index(data, zone, weather)
+    level = risk_windows.update(data.get('drone_id') or 'ESP32', risk_score, level)
+    feedback.send(level, read_at)
+    return risk_score, reason, level, zone
+
 print("\n" + "=" * 60)
 print("🚁 AeroGuard - Real-Time ESP32 Data Stream Active")
 print("=" * 60)
@@ -50,6 +116,8 @@ while True:
     if ser.in_waiting > 0:
         try:
             raw_line = ser.readline().decode('utf-8').strip()
+            read_at = time.perf_counter()
+            trace = tracing.sample(trace_rate)
             
             # Skip debug messages
             if not raw_line.startswith('{'):
@@ -58,11 +126,11 @@ while True:
             
             # Parse JSON data
             data = json.loads(raw_line)
+            if trace:
+                data['trace'] = trace
             
             # Extract GPS coordinates
-            lat = data.get('gps', {}).get('latitude', 0)
-            lng = data.get('gps', {}).get('longitude', 0)
-            sats = data.get('gps', {}).get('satellites', 0)
+            gps, lat, lng, sats = read_gps(data)
             
             # Check for valid GPS fix
             if lat != 0 and lng != 0 and not gps_fix_obtained:
@@ -70,54 +138,35 @@ while True:
                 print(f"📡 Satellites: {sats}\n")
                 gps_fix_obtained = True
             
-            # Get weather data
-            weather = weather_client.get_weather(lat, lng)
-            
-            # Check airspace zone
-            zone = mappls.check_airspace(lat, lng)
-            data['gps']['geo_zone'] = zone
-            
-            # Calculate risk
-            risk_score, reason, level = calculate_risk_index(data, zone, weather)
+            # Zone and risk (verdicts are written to the ESP32 as they are known)
+            risk_score, reason, level, zone = evaluate_packet(data, gps, lat, lng, read_at)
+            status_led = {'ABORT': "🔴", 'CAUTION': "🟡"}.get(level, "🟢")
 
             # After calculating risk, send to web server
             try:
-                response = requests.post('http://localhost:5000/data', json=data, timeout=1)
+                send_to_server(data)
             except:
                 pass  # Web server offline, continue with serial
-            
-            # Send feedback to ESP32
-            if risk_score >= 75:
-                ser.write(b"ABORT\n")
-                status_led = "🔴"
-            elif risk_score >= 40:
-                ser.write(b"CAUTION\n")
-                status_led = "🟡"
-            else:
-                ser.write(b"SAFE\n")
-                status_led = "🟢"
 
             while True:
                 if ser.in_waiting > 0:
                     try:
                         raw_line = ser.readline().decode('utf-8').strip()
+                        read_at = time.perf_counter()
+                        trace = tracing.sample(trace_rate)
                         
                         if not raw_line.startswith('{'):
                             print(f"[ESP32] {raw_line}")
                             continue
                         
                         data = json.loads(raw_line)
+                        if trace:
+                            data['trace'] = trace
                         
-                        # Get weather and calculate risk
-                        lat = data.get('gps', {}).get('latitude', 0)
-                        lng = data.get('gps', {}).get('longitude', 0)
-                        sats = data.get('gps', {}).get('satellites', 0)
-                        
-                        weather = weather_client.get_weather(lat, lng)
-                        zone = mappls.check_airspace(lat, lng)
-                        data['gps']['geo_zone'] = zone
+                        # Zone, weather and risk (verdicts go to the ESP32 as they are known)
+                        gps, lat, lng, sats = read_gps(data)
                         
-                        risk_score, reason, level = calculate_risk_index(data, zone, weather)
+                        risk_score, reason, level, zone = evaluate_packet(data, gps, lat, lng, read_at)
                         
                         # Add system data
                         if 'system' not in data:
@@ -130,20 +179,11 @@ while True:
                         
                         # ✅ SEND TO WEB SERVER
                         try:
-                            response = requests.post('http://localhost:5000/data', json=data,timeout=1)
-                            if response.ok:
+                            if send_to_server(data):
                                 print(f"✅ Data sent to web server")
                         except:
                             print("⚠️  Web server offline")
                         
-                        # Send feedback to ESP32
-                        if risk_score >= 75:
-                            ser.write(b"ABORT\n")
-                        elif risk_score >= 40:
-                            ser.write(b"CAUTION\n")
-                        else:
-                            ser.write(b"SAFE\n")
-                        
                         print(f"🟢 GPS:[{lat:.5f}, {lng:.5f}] Zone:{zone} | Risk:{risk_score}%")
                         
                     except Exception as e:
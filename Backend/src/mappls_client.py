@@ -1,24 +1,49 @@
+import math
+
+from config_service import GeofenceSettings
+
 
 class MapplsGeospace:
     """
     Geofencing system for drone airspace restrictions.
     ✅ FIXED: Updated with safe coordinates away from Trivandrum Airport
+    Zone settings come from the 'geofence' section of config.json and are
+    swapped atomically on reload via apply_config().
     """
     
-    def __init__(self):
-        # ✅ FIXED: Trivandrum Airport actual coordinates
-        self.AIRPORT_LAT = 8.4821
-        self.AIRPORT_LNG = 76.9200
-        
-        # Restricted zones (in kilometers)
-        self.RED_ZONE_RADIUS = 5.0    # 5km no-fly zone
-        self.YELLOW_ZONE_RADIUS = 10.0  # 10km caution zone
+    def __init__(self, settings=None):
+        # Defaults: Trivandrum Airport, 5km no-fly zone, 10km caution zone
+        self.settings = settings or GeofenceSettings()
         
         print("[Geofence] Initialized with:")
         print(f"  🔴 RED Zone: {self.RED_ZONE_RADIUS}km radius around airport")
         print(f"  🟡 YELLOW Zone: {self.YELLOW_ZONE_RADIUS}km radius around airport")
         print(f"  📍 Airport: {self.AIRPORT_LAT}°N, {self.AIRPORT_LNG}°E")
     
+    def apply_config(self, app_config):
+        """Config subscriber: swap in the new geofence settings."""
+        if app_config.geofence != self.settings:
+            self.settings = app_config.geofence
+            print(f"[Geofence] Reloaded: RED {self.RED_ZONE_RADIUS}km / "
+                  f"YELLOW {self.YELLOW_ZONE_RADIUS}km around "
+                  f"{self.AIRPORT_LAT}°N, {self.AIRPORT_LNG}°E")
+    
+    @property
+    def AIRPORT_LAT(self):
+        return self.settings.airport_lat
+    
+    @property
+    def AIRPORT_LNG(self):
+        return self.settings.airport_lng
+    
+    @property
+    def RED_ZONE_RADIUS(self):
+        return self.settings.red_radius_km
+    
+    @property
+    def YELLOW_ZONE_RADIUS(self):
+        return self.settings.yellow_radius_km
+    
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         """
         Calculate distance between two GPS coordinates using Haversine formula.
@@ -49,20 +74,46 @@ class MapplsGeospace:
             "YELLOW" - Caution zone (5-10km from airport)
             "GREEN"  - Safe to fly (> 10km from airport)
         """
+        s = self.settings
+        
         # Calculate distance from airport
         distance_km = self.haversine_distance(
             lat, lon, 
-            self.AIRPORT_LAT, self.AIRPORT_LNG
+            s.airport_lat, s.airport_lng
         )
         
         # Determine zone
-        if distance_km < self.RED_ZONE_RADIUS:
+        if distance_km < s.red_radius_km:
             return "RED"
-        elif distance_km < self.YELLOW_ZONE_RADIUS:
+        elif distance_km < s.yellow_radius_km:
             return "YELLOW"
         else:
             return "GREEN"
     
+    def get_zones(self):
+        """
+        Describe the restricted zones as circles.
+
+        Returns list of dicts with: name, zone, lat, lng, radius_km
+        """
+        s = self.settings
+        return [
+            {
+                'name': 'airport_red',
+                'zone': 'RED',
+                'lat': s.airport_lat,
+                'lng': s.airport_lng,
+                'radius_km': s.red_radius_km
+            },
+            {
+                'name': 'airport_yellow',
+                'zone': 'YELLOW',
+                'lat': s.airport_lat,
+                'lng': s.airport_lng,
+                'radius_km': s.yellow_radius_km
+            }
+        ]
+    
     def get_zone_info(self, lat, lon):
         """
         Get detailed airspace information.
@@ -72,17 +123,18 @@ class MapplsGeospace:
             - distance_km: distance from airport
             - direction: compass bearing to airport
         """
+        s = self.settings
         distance_km = self.haversine_distance(
             lat, lon,
-            self.AIRPORT_LAT, self.AIRPORT_LNG
+            s.airport_lat, s.airport_lng
         )
         
         zone = self.check_airspace(lat, lon)
         
         # Calculate bearing (compass direction)
         lat1 = math.radians(lat)
-        lat2 = math.radians(self.AIRPORT_LAT)
-        delta_lon = math.radians(self.AIRPORT_LNG - lon)
+        lat2 = math.radians(s.airport_lat)
+        delta_lon = math.radians(s.airport_lng - lon)
         
         x = math.sin(delta_lon) * math.cos(lat2)
         y = (math.cos(lat1) * math.sin(lat2) - 
@@ -98,8 +150,8 @@ class MapplsGeospace:
             'zone': zone,
             'distance_km': round(distance_km, 2),
             'direction': direction,
-            'airport_lat': self.AIRPORT_LAT,
-            'airport_lng': self.AIRPORT_LNG
+            'airport_lat': s.airport_lat,
+            'airport_lng': s.airport_lng
         }
 
 
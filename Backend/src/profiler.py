@@ -0,0 +1,131 @@
+"""
+On-demand stack-sampling profiler for the live server.
+
+While a run is active, a background thread snapshots every thread's
+stack via sys._current_frames() at a fixed interval and counts identical
+stacks. Nothing is installed when no run is active: no trace/profile
+hooks, no extra threads. Output is flame-graph-compatible collapsed
+stacks ("thread;file:func;file:func count") and a top-functions table
+with self and total sample counts.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_DURATION_S = 60
+MIN_INTERVAL_S = 0.001
+MAX_DEPTH = 128
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another is running."""
+
+
+def _label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """One profiling run at a time; run() blocks its caller for the duration."""
+
+    def __init__(self):
+        self._running = threading.Lock()
+        self.runs = 0
+
+    @property
+    def active(self):
+        return self._running.locked()
+
+    def run(self, duration_s=5.0, interval_s=0.005, exclude=()):
+        """
+        Sample all threads (except the sampler, the caller and `exclude`
+        thread idents) for duration_s.
+        Returns dict with: duration_s, interval_s, samples, threads,
+        collapsed (list of (stack, count)), top (list of per-function rows).
+        """
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            duration_s = min(max(float(duration_s), 0.0), MAX_DURATION_S)
+            interval_s = max(float(interval_s), MIN_INTERVAL_S)
+            result = {}
+            sampler = threading.Thread(target=self._sample, name='profiler',
+                                       args=(duration_s, interval_s,
+                                             {threading.get_ident(), *exclude}, result),
+                                       daemon=True)
+            sampler.start()
+            sampler.join()
+            self.runs += 1
+            return result
+        finally:
+            self._running.release()
+
+    def _sample(self, duration_s, interval_s, skip, result):
+        skip = skip | {threading.get_ident()}
+        stacks = Counter()
+        names = {}
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + duration_s
+        next_at = started
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_at:
+                time.sleep(next_at - now)
+            next_at += interval_s
+
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident in skip:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stacks[tuple(reversed(stack))] += 1
+            samples += 1
+            del frames
+
+        result.update(self._summarize(stacks, samples, time.perf_counter() - started, interval_s))
+
+    @staticmethod
+    def _summarize(stacks, samples, elapsed, interval_s):
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in stacks.items():
+            self_counts[stack[-1]] += count
+            for function in set(stack[1:]):
+                total_counts[function] += count
+
+        thread_samples = sum(stacks.values()) or 1
+        top = [{
+            'function': function,
+            'self': self_counts[function],
+            'total': total,
+            'self_pct': round(100 * self_counts[function] / thread_samples, 2),
+            'total_pct': round(100 * total / thread_samples, 2)
+        } for function, total in total_counts.items()]
+        top.sort(key=lambda row: (row['self'], row['total']), reverse=True)
+
+        return {
+            'duration_s': round(elapsed, 3),
+            'interval_s': interval_s,
+            'samples': samples,
+            'threads': len({stack[0] for stack in stacks}),
+            'collapsed': sorted(((';'.join(stack), count) for stack, count in stacks.items()),
+                                key=lambda item: item[1], reverse=True),
+            'top': top
+        }
+
+
+def collapsed_text(result):
+    """Collapsed stacks in the format flamegraph.pl / speedscope import."""
+    return ''.join(f"{stack} {count}\n" for stack, count in result['collapsed'])
@@ -1,32 +1,55 @@
-import json
-import os
+from config_service import get_config_service, RiskSettings
+from telemetry_record import TelemetryRecord, NO_HDOP
 
-def load_config():
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(os.path.dirname(current_dir), 'config.json')
-    
-    try:
-        with open(config_path) as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("[Risk Engine] Warning: config.json not found, using defaults")
-        return None
+# Precompiled thresholds, swapped atomically on config reload
+_RISK = RiskSettings()
 
-CONFIG = load_config()
+def apply_config(app_config):
+    """Config subscriber: install the precompiled risk thresholds."""
+    global _RISK
+    _RISK = app_config.risk
 
-def calculate_risk_index(sensor_data, zone, weather=None):
+get_config_service().subscribe(apply_config)
+
+def _smoothed(stats, channel, raw):
+    """EWMA from the drone's streaming stats when available, else the raw sample.
+    Used for warning tiers only; critical tiers always judge the raw sample."""
+    if stats and channel in stats:
+        return stats[channel]['ewma']
+    return raw
+
+def risk_level(score, t=None):
+    """Level for a score under the alert thresholds (current config by default)."""
+    t = t or _RISK
+    if t.level_inclusive:
+        if score <= t.safe_max:
+            return "SAFE"
+        if score <= t.caution_max:
+            return "CAUTION"
+        return "ABORT"
+    if score < t.safe_max:
+        return "SAFE"
+    if score < t.caution_max:
+        return "CAUTION"
+    return "ABORT"
+
+def calculate_risk_index(sensor_data, zone, weather=None, stats=None, spectrum=None):
     """
     Calculate risk index with HDOP-based GPS quality assessment.
+    sensor_data: a TelemetryRecord (HDOP already in real units) or a
+                 sensor_data-shaped dict (raw ESP32 HDOP * 100).
+    stats: optional SensorStatsStore snapshot; the warning tiers of
+           vibration and tilt, and low RPM, are then judged on the EWMA so
+           a single noisy packet is damped. Critical vibration and tilt
+           are always judged on the raw sample, so a real spike counts at once.
+    spectrum: optional VibrationAnalyzer features from a recent raw burst.
     Returns: (score, reason, level)
     """
     score = 0
     reasons = []
     
-    # Load thresholds
-    if CONFIG and 'risk_thresholds' in CONFIG:
-        thresholds = CONFIG['risk_thresholds']
-    else:
-        thresholds = {}
+    # Precompiled thresholds (one reference read per call)
+    t = _RISK
     
     # 1. GEOSPACE PENALTY (Hard Rule)
     if zone == "RED":
@@ -35,17 +58,29 @@ def calculate_risk_index(sensor_data, zone, weather=None):
         score += 30
         reasons.append("Caution: Near Airport")
     
-    # 2. GPS QUALITY ASSESSMENT (HDOP-based)
-    gps = sensor_data.get('gps', {})
-    hdop_raw = gps.get('hdop', 9999)
-    satellites = gps.get('satellites', 0)
-    
-    # Convert HDOP (TinyGPS++ gives value * 100)
-    hdop = hdop_raw / 100.0 if hdop_raw < 9999 else 99.99
+    # Inputs, from a decoded record or a nested dict
+    if isinstance(sensor_data, TelemetryRecord):
+        hdop = sensor_data.hdop if sensor_data.hdop is not None else NO_HDOP
+        satellites = sensor_data.satellites or 0
+        raw_vibration = sensor_data.vibration_rms or 0
+        raw_rpm = sensor_data.rpm or 0
+        hall_detected = sensor_data.hall_detected is not False
+        raw_tilt = sensor_data.tilt_angle or 0
+    else:
+        gps = sensor_data.get('gps', {})
+        mpu = sensor_data.get('mpu', {})
+        motor = sensor_data.get('motor', {})
+        hdop_raw = gps.get('hdop', 9999)
+        satellites = gps.get('satellites', 0)
+        # Convert HDOP (TinyGPS++ gives value * 100)
+        hdop = hdop_raw / 100.0 if hdop_raw < 9999 else NO_HDOP
+        raw_vibration = mpu.get('vibration_rms', 0)
+        raw_rpm = motor.get('rpm', 0)
+        hall_detected = motor.get('hall_detected', True)
+        raw_tilt = mpu.get('tilt_angle', 0)
     
+    # 2. GPS QUALITY ASSESSMENT (HDOP-based)
     # HDOP Penalties
-    gps_thresholds = thresholds.get('gps', {}).get('hdop', {})
-    
     if hdop > 20.0:
         score += 50
         reasons.append(f"Critical GPS Accuracy (HDOP: {hdop:.1f})")
@@ -60,16 +95,12 @@ def calculate_risk_index(sensor_data, zone, weather=None):
         reasons.append(f"Fair GPS Accuracy (HDOP: {hdop:.1f})")
     
     # Satellite Count Penalties
-    min_sats_config = thresholds.get('gps', {}).get('min_satellites', {})
-    min_sats = min_sats_config.get('safe', 8)
-    critical_sats = min_sats_config.get('critical', 4)
-    
-    if satellites < critical_sats:
+    if satellites < t.sats_critical:
         score += 40
         reasons.append(f"Critical Satellite Count ({satellites})")
-    elif satellites < min_sats:
-        sat_deficit = min_sats - satellites
-        penalty = sat_deficit * min_sats_config.get('penalty_per_missing', 5)
+    elif satellites < t.sats_safe:
+        sat_deficit = t.sats_safe - satellites
+        penalty = sat_deficit * t.sats_penalty_per_missing
         score += penalty
         reasons.append(f"Low Satellite Count ({satellites})")
     
@@ -82,38 +113,38 @@ def calculate_risk_index(sensor_data, zone, weather=None):
     # ============================================
     # 3. HARDWARE PENALTIES
     # ============================================
-    mpu = sensor_data.get('mpu', {})
-    motor = sensor_data.get('motor', {})
+    # Vibration (critical on the raw sample, warning on the EWMA)
+    vibration = _smoothed(stats, 'vibration_rms', raw_vibration)
     
-    # Vibration
-    vibration = mpu.get('vibration_rms', 0)
-    vib_thresholds = thresholds.get('vibration', {})
-    
-    if vibration > vib_thresholds.get('critical', 0.8):
-        score += vib_thresholds.get('penalty_points', {}).get('critical', 40)
+    if raw_vibration > t.vib_critical:
+        score += t.vib_penalty_critical
         reasons.append("Critical Vibration")
-    elif vibration > vib_thresholds.get('warning', 0.5):
-        score += vib_thresholds.get('penalty_points', {}).get('warning', 20)
+    elif vibration > t.vib_warning:
+        score += t.vib_penalty_warning
         reasons.append("High Vibration")
     
+    # Spectral peak from raw accelerometer bursts (prop imbalance, bearings)
+    if spectrum and spectrum.get('dominant_amplitude_g', 0) > t.spectral_peak_g:
+        score += t.spectral_penalty
+        reasons.append(f"Vibration Peak ({spectrum['dominant_hz']:.0f}Hz)")
+    
     # Motor RPM
-    rpm = motor.get('rpm', 0)
-    min_rpm = thresholds.get('motor_rpm', {}).get('minimum_safe', 500)
+    rpm = _smoothed(stats, 'rpm', raw_rpm)
     
-    if rpm > 0 and rpm < min_rpm:
-        score += thresholds.get('motor_rpm', {}).get('penalty_points', {}).get('low', 30)
+    if rpm > 0 and rpm < t.rpm_minimum_safe:
+        score += t.rpm_penalty_low
         reasons.append("Motor Efficiency Low")
     
     # Hall sensor
-    if not motor.get('hall_detected', True):
+    if not hall_detected:
         score += 15
         reasons.append("Hall Sensor Fault")
     
-    # Tilt angle
-    tilt = mpu.get('tilt_angle', 0)
-    if tilt > 30:
+    # Tilt angle (critical on the raw sample, warning on the EWMA)
+    tilt = _smoothed(stats, 'tilt_angle', raw_tilt)
+    if raw_tilt > 30:
         score += 25
-        reasons.append(f"Excessive Tilt ({tilt:.1f}°)")
+        reasons.append(f"Excessive Tilt ({raw_tilt:.1f}°)")
     elif tilt > 15:
         score += 10
         reasons.append(f"High Tilt Angle ({tilt:.1f}°)")
@@ -122,33 +153,29 @@ def calculate_risk_index(sensor_data, zone, weather=None):
     # 4. WEATHER PENALTIES
     # ============================================
     if weather:
-        weather_thresholds = thresholds.get('weather', {})
-        
         # Wind speed
         wind_speed = weather.get('wind_speed', 0)
-        wind_limits = weather_thresholds.get('wind_speed', {})
         
-        if wind_speed > wind_limits.get('critical', 15.0):
-            score += wind_limits.get('penalty_points', {}).get('critical', 25)
+        if wind_speed > t.wind_critical:
+            score += t.wind_penalty_critical
             reasons.append(f"Critical Wind ({wind_speed:.1f}m/s)")
-        elif wind_speed > wind_limits.get('caution', 10.0):
-            score += wind_limits.get('penalty_points', {}).get('caution', 15)
+        elif wind_speed > t.wind_caution:
+            score += t.wind_penalty_caution
             reasons.append(f"High Wind ({wind_speed:.1f}m/s)")
         
         # Visibility
         visibility = weather.get('visibility', 10000)
-        vis_limits = weather_thresholds.get('visibility', {})
         
-        if visibility < vis_limits.get('critical', 1000):
-            score += vis_limits.get('penalty_points', {}).get('critical', 20)
+        if visibility < t.vis_critical:
+            score += t.vis_penalty_critical
             reasons.append("Critical Visibility")
-        elif visibility < vis_limits.get('caution', 5000):
-            score += vis_limits.get('penalty_points', {}).get('caution', 15)
+        elif visibility < t.vis_caution:
+            score += t.vis_penalty_caution
             reasons.append("Low Visibility")
         
         # Weather conditions
         weather_condition = weather.get('weather_main', 'Clear')
-        dangerous_conditions = weather_thresholds.get('dangerous_conditions', {})
+        dangerous_conditions = t.dangerous_conditions
         
         if weather_condition in dangerous_conditions:
             penalty = dangerous_conditions[weather_condition]
@@ -157,34 +184,17 @@ def calculate_risk_index(sensor_data, zone, weather=None):
         
         # Temperature
         temp = weather.get('temp')
-        temp_limits = weather_thresholds.get('temperature', {})
         
         if temp is not None:
-            if temp < temp_limits.get('critical_low', -20) or temp > temp_limits.get('critical_high', 45):
-                score += temp_limits.get('penalty_points', 15)
+            if temp < t.temp_critical_low or temp > t.temp_critical_high:
+                score += t.temp_penalty
                 reasons.append(f"Extreme Temperature ({temp:.1f}°C)")
     
     # ============================================
     # 5. FINAL RISK CALCULATION
     # ============================================
     score = min(score, 100)
-    
-    # Determine level
-    if CONFIG and 'alerts' in CONFIG:
-        alert_levels = CONFIG['alerts']['risk_levels']
-        if score <= alert_levels['safe']['max_score']:
-            level = "SAFE"
-        elif score <= alert_levels['caution']['max_score']:
-            level = "CAUTION"
-        else:
-            level = "ABORT"
-    else:
-        if score < 40:
-            level = "SAFE"
-        elif score < 75:
-            level = "CAUTION"
-        else:
-            level = "ABORT"
+    level = risk_level(score, t)
     
     # Format reason text
     reason_text = ', '.join(reasons) if reasons else "All Systems Normal"
@@ -0,0 +1,281 @@
+"""
+Parallel parameter sweep for risk threshold tuning.
+
+Evaluates the risk scoring rules of risk_engine.calculate_risk_index over a
+multi-dimensional grid of inputs (wind, visibility, HDOP, satellites,
+vibration, tilt, zone) for one or more threshold sets. The grid is split
+into blocks of wind rows which are scored with NumPy across a process pool.
+
+Usage:
+    python risk_sweep.py --wind 0:20:41 --hdop 0.5:25:50 --workers 8
+    python risk_sweep.py --thresholds strict.json --thresholds loose.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+import numpy as np
+
+from config_service import resolve_thresholds
+
+# ============================================
+# GRID DEFINITION
+# ============================================
+
+# Axis order of the score/level tables (after the threshold-set axis)
+AXES = ('wind', 'visibility', 'hdop', 'satellites', 'vibration', 'tilt', 'zone')
+
+ZONES = ('GREEN', 'YELLOW', 'RED')
+LEVELS = ('SAFE', 'CAUTION', 'ABORT')
+
+DEFAULT_AXES = {
+    'wind': np.linspace(0.0, 20.0, 21),
+    'visibility': np.array([500, 1000, 2500, 5000, 7500, 10000], dtype=float),
+    'hdop': np.array([0.8, 1.5, 2.5, 4.0, 6.0, 8.0, 12.0, 16.0, 25.0]),
+    'satellites': np.arange(0, 13, dtype=float),
+    'vibration': np.linspace(0.0, 1.0, 21),
+    'tilt': np.array([0.0, 5.0, 10.0, 16.0, 20.0, 25.0, 31.0, 40.0]),
+    'zone': np.arange(len(ZONES), dtype=float),
+}
+
+# Approximate grid cells per worker task
+CHUNK_SIZE = 1 << 20
+
+# Worker-process state, set once by _init_worker
+_worker_axes = None
+_worker_sets = None
+_worker_dtype = None
+
+# ============================================
+# VECTORIZED SCORING
+# ============================================
+
+def score_arrays(t, wind, visibility, hdop, satellites, vibration, tilt, zone,
+                 rpm=0, hall_detected=True, weather_main='Clear', temp=None):
+    """
+    Vectorized equivalent of calculate_risk_index for resolved thresholds.
+
+    All inputs broadcast against each other. hdop is in real units (not the
+    TinyGPS++ x100 value) and zone is an index into ZONES.
+    Returns: (score float64 array, level int8 array)
+    """
+    score = np.zeros(np.broadcast(wind, visibility, hdop, satellites,
+                                  vibration, tilt, zone).shape)
+
+    # Geospace
+    score += np.where(zone == 1, 30, 0)
+
+    # GPS quality
+    score += np.select([hdop > 20.0, hdop > 10.0, hdop > 5.0, hdop > 2.0],
+                       [50, 35, 20, 10], 0)
+    score += np.where(
+        satellites < t.sats_critical, 40,
+        np.where(satellites < t.sats_safe,
+                 (t.sats_safe - satellites) * t.sats_penalty_per_missing, 0))
+    score += np.where((hdop > 10.0) & (satellites < 6), 15, 0)
+
+    # Hardware
+    score += np.where(vibration > t.vib_critical, t.vib_penalty_critical,
+                      np.where(vibration > t.vib_warning, t.vib_penalty_warning, 0))
+    if 0 < rpm < t.rpm_minimum_safe:
+        score += t.rpm_penalty_low
+    if not hall_detected:
+        score += 15
+    score += np.select([tilt > 30, tilt > 15], [25, 10], 0)
+
+    # Weather
+    score += np.where(wind > t.wind_critical, t.wind_penalty_critical,
+                      np.where(wind > t.wind_caution, t.wind_penalty_caution, 0))
+    score += np.where(visibility < t.vis_critical, t.vis_penalty_critical,
+                      np.where(visibility < t.vis_caution, t.vis_penalty_caution, 0))
+    if weather_main in t.dangerous_conditions:
+        score += t.dangerous_conditions[weather_main]
+    if temp is not None and (temp < t.temp_critical_low or temp > t.temp_critical_high):
+        score += t.temp_penalty
+
+    score = np.minimum(score, 100)
+    score = np.where(zone == 2, 100, score)
+
+    if t.level_inclusive:
+        level = np.where(score <= t.safe_max, 0, np.where(score <= t.caution_max, 1, 2))
+    else:
+        level = np.where(score < t.safe_max, 0, np.where(score < t.caution_max, 1, 2))
+
+    return score, level.astype(np.int8)
+
+
+def _init_worker(axes, threshold_sets, score_dtype):
+    global _worker_axes, _worker_sets, _worker_dtype
+    _worker_axes = axes
+    _worker_sets = threshold_sets
+    _worker_dtype = score_dtype
+
+
+def _score_block(set_idx, start, stop):
+    """
+    Score threshold set set_idx for wind rows [start, stop) inside a worker.
+
+    Each axis is reshaped to broadcast along its own dimension, so the
+    per-axis penalties are computed on the 1D values and only summed at
+    full block size.
+    """
+    ndim = len(AXES)
+    values = []
+    for i, name in enumerate(AXES):
+        axis = _worker_axes[name][start:stop] if i == 0 else _worker_axes[name]
+        shape = [1] * ndim
+        shape[i] = len(axis)
+        values.append(axis.reshape(shape))
+
+    score, level = score_arrays(_worker_sets[set_idx], *values)
+    return set_idx, start, score.astype(_worker_dtype), level
+
+# ============================================
+# SWEEP DRIVER
+# ============================================
+
+def _score_dtype(threshold_sets):
+    """uint8 when every penalty is integral (scores 0-100), else float32."""
+    for t in threshold_sets:
+        penalties = [getattr(t, f.name) for f in fields(t) if 'penalty' in f.name]
+        penalties += list(t.dangerous_conditions.values())
+        if any(not float(p).is_integer() for p in penalties):
+            return np.float32
+    return np.uint8
+
+
+def run_sweep(axes=None, configs=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Sweep the full input grid for every threshold set.
+
+    axes:    dict of axis name -> 1D values (missing axes use DEFAULT_AXES)
+    configs: list of config dicts (risk_thresholds/alerts sections);
+             defaults to the loaded config.json
+    Returns dict with:
+        - scores: array shaped (n_sets, *axis sizes)
+        - levels: int8 array of the same shape (index into LEVELS)
+        - axes: the axis values used
+        - boundaries: level transitions per axis (see transition_boundaries)
+        - elapsed_s, cells
+    """
+    axes = {name: np.asarray((axes or {}).get(name, DEFAULT_AXES[name]), dtype=float)
+            for name in AXES}
+    threshold_sets = [resolve_thresholds(c) for c in (configs or [None])]
+    shape = (len(threshold_sets),) + tuple(len(axes[name]) for name in AXES)
+    total = int(np.prod(shape))
+
+    score_dtype = _score_dtype(threshold_sets)
+    scores = np.empty(shape, dtype=score_dtype)
+    levels = np.empty(shape, dtype=np.int8)
+
+    # Split along the threshold-set and wind axes into ~chunk_size blocks
+    workers = workers or os.cpu_count() or 1
+    row_cells = int(np.prod(shape[2:]))
+    rows = max(1, chunk_size // max(row_cells, 1))
+    blocks = [(s, start, min(start + rows, shape[1]))
+              for s in range(shape[0]) for start in range(0, shape[1], rows)]
+
+    started = time.perf_counter()
+    if workers == 1 or len(blocks) == 1:
+        _init_worker(axes, threshold_sets, score_dtype)
+        results = (_score_block(*block) for block in blocks)
+        for set_idx, start, block_scores, block_levels in results:
+            scores[set_idx, start:start + len(block_levels)] = block_scores
+            levels[set_idx, start:start + len(block_levels)] = block_levels
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(axes, threshold_sets, score_dtype)) as pool:
+            futures = [pool.submit(_score_block, *block) for block in blocks]
+            for future in futures:
+                set_idx, start, block_scores, block_levels = future.result()
+                scores[set_idx, start:start + len(block_levels)] = block_scores
+                levels[set_idx, start:start + len(block_levels)] = block_levels
+    elapsed = time.perf_counter() - started
+
+    return {
+        'scores': scores,
+        'levels': levels,
+        'axes': axes,
+        'boundaries': transition_boundaries(levels),
+        'elapsed_s': elapsed,
+        'cells': total,
+    }
+
+
+def transition_boundaries(levels):
+    """
+    Find level changes between neighbouring grid cells along each input axis.
+
+    Returns dict of axis name -> uint16 array (K x ndim) holding the grid
+    coordinates of the lower cell of every transition; the upper cell is the
+    same coordinate +1 along that axis.
+    """
+    coord_dtype = np.uint16 if max(levels.shape) <= np.iinfo(np.uint16).max else np.uint32
+    boundaries = {}
+    for i, name in enumerate(AXES):
+        changed = np.diff(levels, axis=i + 1) != 0
+        boundaries[name] = np.argwhere(changed).astype(coord_dtype)
+    return boundaries
+
+# ============================================
+# COMMAND LINE
+# ============================================
+
+def _parse_axis(spec):
+    """'start:stop:num' -> linspace, 'a,b,c' -> explicit values."""
+    if ':' in spec:
+        start, stop, num = spec.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(v) for v in spec.split(',')])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroGuard risk threshold sweep")
+    for name in AXES:
+        if name == 'zone':
+            continue
+        parser.add_argument(f'--{name}', help="start:stop:num or comma separated values")
+    parser.add_argument('--zones', default=','.join(ZONES),
+                        help="Comma separated zones (default: GREEN,YELLOW,RED)")
+    parser.add_argument('--thresholds', action='append', default=[],
+                        help="JSON file with risk_thresholds/alerts (repeatable)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='risk_sweep.npz')
+    args = parser.parse_args()
+
+    axes = {name: _parse_axis(getattr(args, name))
+            for name in AXES if name != 'zone' and getattr(args, name)}
+    axes['zone'] = [ZONES.index(z.strip().upper()) for z in args.zones.split(',')]
+
+    configs = []
+    for path in args.thresholds:
+        with open(path) as f:
+            configs.append(json.load(f))
+
+    result = run_sweep(axes, configs or None, workers=args.workers)
+
+    print("=" * 60)
+    print(f"🧮 Risk sweep: {result['cells']:,} cells in {result['elapsed_s']:.2f}s "
+          f"({result['cells'] / max(result['elapsed_s'], 1e-9):,.0f} cells/s)")
+    counts = np.bincount(result['levels'].ravel(), minlength=len(LEVELS))
+    for level, count in zip(LEVELS, counts):
+        print(f"   {level}: {count:,} ({100 * count / result['cells']:.1f}%)")
+    for name, coords in result['boundaries'].items():
+        print(f"   Transitions along {name}: {len(coords):,}")
+    print("=" * 60)
+
+    np.savez_compressed(
+        args.out,
+        scores=result['scores'],
+        levels=result['levels'],
+        **{f'axis_{name}': values for name, values in result['axes'].items()},
+        **{f'boundary_{name}': coords for name, coords in result['boundaries'].items()},
+    )
+    print(f"✅ Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
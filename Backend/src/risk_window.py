@@ -0,0 +1,245 @@
+"""
+Windowed per-drone risk aggregation with level hysteresis.
+
+calculate_risk_index() judges each sample on its own, so a reading that
+hovers at a threshold flips the level every packet. Each drone here
+keeps, per configured window, the rolling max and mean risk score and
+the time spent in each level, plus cumulative time in level.
+
+The reported (stable) level escalates immediately, since a worse verdict
+is never delayed. It de-escalates only when the score clears the lower
+level's threshold by `hysteresis` points (judged on score + hysteresis)
+and has stayed there for `min_dwell_s`.
+
+Every update is O(1) amortized: maxima use monotonic deques, means and
+level times keep running totals over deques of samples. update() only
+returns the held level, and peek() computes it without adding a sample
+(for re-scoring a packet already counted); the full snapshot dict is
+built when asked for (/api/current).
+
+A config reload keeps each drone's held level, dwell timer and
+cumulative times; the rolling aggregates restart only if windows_s
+changed.
+"""
+import threading
+import time
+from array import array
+from collections import deque
+
+from config_service import RiskWindowSettings
+from risk_engine import risk_level
+from sensor_stats import RollingExtreme
+
+# Levels in order of severity (the ones calculate_risk_index returns)
+LEVELS = ('SAFE', 'CAUTION', 'ABORT')
+_RANK = {level: i for i, level in enumerate(LEVELS)}
+
+
+class _RollingMean:
+    """Deque of (t, value) with a running sum over the window."""
+    __slots__ = ('window_s', 'items', 'total')
+
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self.items = deque()
+        self.total = 0.0
+
+    def push(self, t, value):
+        self.items.append((t, value))
+        self.total += value
+        self.expire(t)
+
+    def expire(self, now):
+        cutoff = now - self.window_s
+        items = self.items
+        while items and items[0][0] < cutoff:
+            self.total -= items.popleft()[1]
+        if not items:
+            self.total = 0.0
+
+    def value(self):
+        return self.total / len(self.items) if self.items else None
+
+
+class _RollingLevelTime:
+    """Deque of (t, seconds, level rank) with per-level running totals."""
+    __slots__ = ('window_s', 'items', 'totals')
+
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self.items = deque()
+        self.totals = array('d', [0.0] * len(LEVELS))
+
+    def push(self, t, seconds, rank):
+        self.items.append((t, seconds, rank))
+        self.totals[rank] += seconds
+        self.expire(t)
+
+    def expire(self, now):
+        cutoff = now - self.window_s
+        items = self.items
+        while items and items[0][0] < cutoff:
+            _, seconds, rank = items.popleft()
+            self.totals[rank] -= seconds
+        if not items:
+            self.totals = array('d', [0.0] * len(LEVELS))
+
+    def value(self):
+        return {level: round(max(self.totals[i], 0.0), 3) for i, level in enumerate(LEVELS)}
+
+
+class DroneRiskWindow:
+    """Rolling risk aggregates and the hysteresis-filtered level for one drone."""
+    __slots__ = ('hysteresis', 'min_dwell_s', 'windows_s', 'maxima', 'means', 'level_times',
+                 'time_in_level', 'level', 'level_since', 'pending_since', 'raw_level',
+                 'score', 'suppressed', 'updated_at')
+
+    def __init__(self, settings):
+        self.windows_s = None
+        self.reconfigure(settings)
+        self.time_in_level = array('d', [0.0] * len(LEVELS))
+        self.level = None
+        self.level_since = None
+        self.pending_since = None
+        self.raw_level = None
+        self.score = None
+        self.suppressed = 0
+        self.updated_at = None
+
+    def reconfigure(self, settings):
+        """Apply new settings, keeping the held level and cumulative times."""
+        self.hysteresis = settings.hysteresis
+        self.min_dwell_s = settings.min_dwell_s
+        if settings.windows_s != self.windows_s:
+            self.windows_s = settings.windows_s
+            self.maxima = [RollingExtreme(w, True) for w in self.windows_s]
+            self.means = [_RollingMean(w) for w in self.windows_s]
+            self.level_times = [_RollingLevelTime(w) for w in self.windows_s]
+
+    def update(self, score, level, now):
+        """Fold one verdict (level in LEVELS) into the aggregates."""
+        rank = _RANK[level]
+        if self.level is None:
+            self.level, self.level_since = level, now
+        else:
+            # Time since the previous sample counts toward the level held then
+            held = _RANK[self.level]
+            seconds = max(now - self.updated_at, 0.0)
+            self.time_in_level[held] += seconds
+            for level_time in self.level_times:
+                level_time.push(now, seconds, held)
+
+            new_level, self.pending_since = self._next_level(score, rank, now)
+            if new_level != self.level:
+                self.level, self.level_since = new_level, now
+            elif rank < held:
+                self.suppressed += 1
+
+        for i in range(len(self.windows_s)):
+            self.maxima[i].push(now, score)
+            self.means[i].push(now, score)
+        self.score = score
+        self.raw_level = level
+        self.updated_at = now
+
+    def _next_level(self, score, rank, now):
+        """(level, pending_since) after a verdict of the given rank; changes nothing."""
+        held = _RANK[self.level]
+        if rank > held:
+            return LEVELS[rank], None
+        if rank == held:
+            return self.level, None
+        target = _RANK[risk_level(min(score + self.hysteresis, 100))]
+        if target >= held:
+            # Inside the hysteresis band
+            return self.level, None
+        pending_since = self.pending_since if self.pending_since is not None else now
+        if now - pending_since >= self.min_dwell_s:
+            return LEVELS[target], None
+        return self.level, pending_since
+
+    def peek(self, score, level, now):
+        """Level update() would hold after this verdict, without folding it in."""
+        if self.level is None:
+            return level
+        return self._next_level(score, _RANK[level], now)[0]
+
+    def snapshot(self, now=None):
+        """
+        Returns dict with: level (stable), raw_level, score (instantaneous),
+        level_for_s, suppressed (flips held back), time_in_level (seconds,
+        cumulative) and windows: '<w>s' -> {max, mean, samples, time_in_level}.
+        """
+        now = now if now is not None else time.monotonic()
+        windows = {}
+        for i, window_s in enumerate(self.windows_s):
+            self.maxima[i].expire(now)
+            self.means[i].expire(now)
+            self.level_times[i].expire(now)
+            mean = self.means[i].value()
+            windows[f"{window_s:g}s"] = {
+                'max': self.maxima[i].value(),
+                'mean': round(mean, 2) if mean is not None else None,
+                'samples': len(self.means[i].items),
+                'time_in_level': self.level_times[i].value()
+            }
+        return {
+            'level': self.level,
+            'raw_level': self.raw_level,
+            'score': self.score,
+            'level_for_s': round(now - self.level_since, 3) if self.level_since is not None else None,
+            'suppressed': self.suppressed,
+            'time_in_level': {level: round(self.time_in_level[i], 3) for i, level in enumerate(LEVELS)},
+            'windows': windows
+        }
+
+
+class RiskWindowStore:
+    """Per-drone DroneRiskWindow, created on first verdict."""
+
+    def __init__(self, settings=None):
+        self.settings = settings or RiskWindowSettings()
+        self._drones = {}
+        self._lock = threading.Lock()
+
+    def apply_config(self, app_config):
+        """Config subscriber: every drone's window takes the new settings, keeping its level."""
+        settings = app_config.risk_window
+        if settings != self.settings:
+            with self._lock:
+                self.settings = settings
+                for window in self._drones.values():
+                    window.reconfigure(settings)
+
+    def update(self, drone_id, score, level, now=None):
+        """
+        Fold one verdict from calculate_risk_index into the drone's window;
+        returns the held level to act on (the given level until the drone
+        has one). Levels outside LEVELS (e.g. STANDBY) are not aggregated.
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            window = self._drones.get(drone_id)
+            if window is None:
+                window = self._drones[drone_id] = DroneRiskWindow(self.settings)
+            if level in _RANK:
+                window.update(score, level, now)
+            return window.level or level
+
+    def peek(self, drone_id, score, level, now=None):
+        """
+        Held level update() would return for this verdict, without adding a
+        sample: for re-scoring a packet the window has already counted.
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            window = self._drones.get(drone_id)
+            if window is None or level not in _RANK:
+                return level
+            return window.peek(score, level, now)
+
+    def snapshot(self, drone_id, now=None):
+        """DroneRiskWindow.snapshot() for the drone, or None if it has no window."""
+        with self._lock:
+            window = self._drones.get(drone_id)
+            return window.snapshot(now) if window else None
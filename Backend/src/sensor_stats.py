@@ -0,0 +1,143 @@
+"""
+Streaming per-drone sensor statistics.
+
+Each drone keeps, per channel (vibration_rms, tilt_angle, rpm), an EWMA,
+Welford running mean/variance and rolling max/min over a time window. The
+scalar accumulators live in one flat array('d') per drone; the rolling
+extremes use monotonic deques. Every update is O(1) (amortized for the
+deques), so aggregates never require rescanning history.
+"""
+import math
+import threading
+import time
+from array import array
+from collections import deque
+
+from config_service import SensorStatsSettings
+
+CHANNELS = ('vibration_rms', 'tilt_angle', 'rpm')
+
+# Per-channel slots in the accumulator array
+_N, _MEAN, _M2, _EWMA, _LAST = range(5)
+_WIDTH = 5
+
+
+class RollingExtreme:
+    """Monotonic deque of (t, value) giving the window max (or min) in O(1)."""
+    __slots__ = ('window_s', 'sign', 'items')
+
+    def __init__(self, window_s, largest=True):
+        self.window_s = window_s
+        self.sign = 1 if largest else -1
+        self.items = deque()
+
+    def push(self, t, value):
+        key = self.sign * value
+        items = self.items
+        while items and self.sign * items[-1][1] <= key:
+            items.pop()
+        items.append((t, value))
+        self.expire(t)
+
+    def expire(self, now):
+        cutoff = now - self.window_s
+        items = self.items
+        while items and items[0][0] < cutoff:
+            items.popleft()
+
+    def value(self):
+        return self.items[0][1] if self.items else None
+
+
+class DroneSensorStats:
+    """Streaming aggregates for one drone."""
+    __slots__ = ('alpha', 'acc', 'maxima', 'minima', 'updated_at')
+
+    def __init__(self, settings):
+        self.alpha = settings.ewma_alpha
+        self.acc = array('d', [0.0] * (_WIDTH * len(CHANNELS)))
+        self.maxima = [RollingExtreme(settings.window_s, True) for _ in CHANNELS]
+        self.minima = [RollingExtreme(settings.window_s, False) for _ in CHANNELS]
+        self.updated_at = None
+
+    def update(self, values, now):
+        """values: dict channel -> reading (missing/None channels are skipped)."""
+        acc = self.acc
+        for i, channel in enumerate(CHANNELS):
+            x = values.get(channel)
+            if x is None:
+                continue
+            x = float(x)
+            base = i * _WIDTH
+
+            # Welford
+            n = acc[base + _N] + 1
+            delta = x - acc[base + _MEAN]
+            acc[base + _N] = n
+            acc[base + _MEAN] += delta / n
+            acc[base + _M2] += delta * (x - acc[base + _MEAN])
+
+            # EWMA (seeded with the first sample)
+            acc[base + _EWMA] = x if n == 1 else acc[base + _EWMA] + self.alpha * (x - acc[base + _EWMA])
+            acc[base + _LAST] = x
+
+            self.maxima[i].push(now, x)
+            self.minima[i].push(now, x)
+
+        self.updated_at = now
+
+    def snapshot(self, now=None):
+        """
+        Returns dict channel -> {count, ewma, mean, std, min, max}
+        (channels with no samples are omitted)
+        """
+        now = now if now is not None else time.monotonic()
+        acc = self.acc
+        result = {}
+        for i, channel in enumerate(CHANNELS):
+            base = i * _WIDTH
+            n = acc[base + _N]
+            if n == 0:
+                continue
+            self.maxima[i].expire(now)
+            self.minima[i].expire(now)
+            result[channel] = {
+                'count': int(n),
+                'ewma': round(acc[base + _EWMA], 4),
+                'mean': round(acc[base + _MEAN], 4),
+                'std': round(math.sqrt(acc[base + _M2] / (n - 1)), 4) if n > 1 else 0.0,
+                'min': self.minima[i].value(),
+                'max': self.maxima[i].value()
+            }
+        return result
+
+
+class SensorStatsStore:
+    """Per-drone DroneSensorStats, created on first sample."""
+
+    def __init__(self, settings=None):
+        self.settings = settings or SensorStatsSettings()
+        self._drones = {}
+        self._lock = threading.Lock()
+
+    def apply_config(self, app_config):
+        """Config subscriber: new windows/alpha apply to drones seen from now on."""
+        if app_config.sensor_stats != self.settings:
+            self.settings = app_config.sensor_stats
+            with self._lock:
+                self._drones.clear()
+
+    def update(self, drone_id, values, now=None):
+        """Fold one packet's readings into the drone's aggregates; returns the snapshot."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            stats = self._drones.get(drone_id)
+            if stats is None:
+                stats = self._drones[drone_id] = DroneSensorStats(self.settings)
+            stats.update(values, now)
+            return stats.snapshot(now)
+
+    def snapshot(self, drone_id):
+        with self._lock:
+            stats = self._drones.get(drone_id)
+            return stats.snapshot() if stats else {}
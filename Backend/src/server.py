@@ -1,8 +1,11 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import atexit
+import hmac
 import os
 import json
+import math
 import sys
 import time
 
@@ -36,6 +39,19 @@ print(f"📂 Config Path: {config_path}")
 from mappls_client import MapplsGeospace
 from risk_engine import calculate_risk_index
 from weather_client import OpenWeatherClient
+from flight_plan import FlightPlanValidator
+from config_service import get_config_service
+from event_bus import EventBus, TransitionDetector, WebhookDispatcher
+from sensor_stats import SensorStatsStore
+from risk_window import RiskWindowStore
+from vibration_analysis import VibrationAnalyzer, BurstError, parse_burst_json, parse_burst_binary
+from static_assets import StaticAssetCache, asset_response
+from telemetry_ipc import TelemetrySocketServer, DEFAULT_SOCKET_PATH
+from telemetry_history import TelemetryHistory, FORMATS, stream_export
+from tracing import Tracer
+from telemetry_record import CARRIED_CATEGORIES
+from ingest import TelemetryIngest, SPECTRUM_MAX_AGE_S
+from profiler import SamplingProfiler, ProfilerBusy, collapsed_text
 
 # ============================================
 # FLASK APP SETUP
@@ -44,10 +60,15 @@ from weather_client import OpenWeatherClient
 app = Flask(__name__, static_folder=project_root)
 CORS(app)
 
+# Static assets carry their own ETag/Cache-Control (see static_assets.py)
+STATIC_ENDPOINTS = {'index', 'serve_static'}
+
 # CRITICAL: Disable all caching for real-time data
 @app.after_request
 def add_no_cache_headers(response):
     """Prevent caching to ensure real-time updates"""
+    if request.endpoint in STATIC_ENDPOINTS:
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '-1'
@@ -57,11 +78,11 @@ def add_no_cache_headers(response):
 # LOAD CONFIGURATION
 # ============================================
 
-try:
-    with open(config_path) as f:
-        config = json.load(f)
+config_service = get_config_service(config_path)
+
+if os.path.exists(config_path):
     print(f"✅ Config loaded from: {config_path}")
-except FileNotFoundError:
+else:
     print(f"❌ Config not found at: {config_path}")
     print("Creating default config.json...")
     
@@ -84,271 +105,92 @@ except FileNotFoundError:
     with open(config_path, 'w') as f:
         json.dump(config, f, indent=2)
     print(f"✅ Created default config at: {config_path}")
+    config_service.reload(force=True)
+
+# Hot reload: modules receive precompiled settings on every change
+config_service.start_watching()
 
 # ============================================
 # INITIALIZE MODULES
 # ============================================
 
-mappls = MapplsGeospace()
-weather_api = OpenWeatherClient(config.get('OPENWEATHER_API_KEY', ''))
+mappls = MapplsGeospace(config_service.current.geofence)
+weather_api = OpenWeatherClient(settings=config_service.current.weather)
+plan_validator = FlightPlanValidator(mappls)
+stats_store = SensorStatsStore(config_service.current.sensor_stats)
+risk_windows = RiskWindowStore(config_service.current.risk_window)
+vibration = VibrationAnalyzer()
+
+for module in (mappls, weather_api, plan_validator, stats_store, risk_windows):
+    config_service.subscribe(module.apply_config)
+
+# Transition events (level/zone/GPS/scan changes) with optional webhooks
+event_bus = EventBus()
+transitions = TransitionDetector(event_bus)
+webhooks = [WebhookDispatcher(event_bus, url).start()
+            for url in config_service.current.raw.get('event_webhooks', [])]
+
+# Per-packet stage latency (packets traced by main.py, plus server-side sampling)
+tracer = Tracer(config_service.current.raw.get('tracing', {}).get('server_sample_rate', 0.0))
+
+# Columnar per-packet history for post-flight export
+history_config = config_service.current.raw.get('telemetry_history', {})
+history = TelemetryHistory(
+    spool_dir=history_config.get('spool_dir', os.path.join(backend_dir, 'telemetry_history')),
+    chunk_rows=history_config.get('chunk_rows', 4096),
+    memory_chunks=history_config.get('memory_chunks', 16),
+    max_spool_chunks=history_config.get('max_spool_chunks', 1024)
+)
+atexit.register(history.flush)
+
+# On-demand stack sampler for diagnosing a live server (idle unless requested)
+profiler = SamplingProfiler()
+LOOPBACK_ADDRS = {'127.0.0.1', '::1'}
 
 # ============================================
 # GLOBAL STATE (Initial Values)
 # ============================================
 
-sensor_data = {
-    "mpu": {
-        "ax": 0.0, 
-        "ay": 0.0, 
-        "az": 1.0, 
-        "vibration_rms": 0.0, 
-        "tilt_angle": 0.0
-    },
-    "environment": {
-        "temperature": None,  # None = sensor not connected
-        "humidity": None, 
-        "light_percent": None
-    },
-    "motor": {
-        "rpm": 0, 
-        "hall_detected": False
-    },
-    "gps": {
-        "latitude": None,  # None = no GPS fix
-        "longitude": None,
-        "speed": 0.0, 
-        "satellites": 0, 
-        "geo_zone": "UNKNOWN", 
-        "hdop": 99.9,
-        "raw_signal": 0,
-        "gps_quality": "UNKNOWN"
-    },
-    "weather": {
-        "wind_speed": None,
-        "visibility": None,
-        "condition": "No Data"
-    },
-    "system": {
-        "risk_score": 0,
-        "risk_level": "STANDBY",
-        "blocked_reason": "Waiting for Hardware...",
-        "scan_triggered": False,
-        "source": "NONE",
-        "timestamp": datetime.now().isoformat(),
-        "gps_valid": False,
-        "sensors_valid": False
-    }
-}
+ingest = TelemetryIngest(mappls, weather_api, stats_store, risk_windows, vibration,
+                         transitions, tracer, history, SPECTRUM_MAX_AGE_S)
 
-scan_reset_time = 0
+# Shared with the ingest path (updated in place, never rebound)
+sensor_data = ingest.sensor_data
+state_record = ingest.state_record
 
 # ============================================
 # CORE UPDATE FUNCTION
 # ============================================
 
-def update_global_state(incoming, source="UNKNOWN"):
+def update_global_state(incoming, source="UNKNOWN", received_at=None):
     """
-    Update global sensor state with incoming data.
+    Update global sensor state with incoming data (see ingest.TelemetryIngest).
+    received_at: time.perf_counter() at packet arrival, for event latency
     Returns: (success: bool, message: str)
     """
-    global sensor_data, scan_reset_time
-    
-    print("\n" + "="*70)
-    print(f"📡 INCOMING DATA FROM {source} @ {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
-    print("="*70)
-    
-    has_valid_gps = False
-    has_valid_sensors = False
-    
-    # ============================================
-    # UPDATE SENSOR DATA
-    # ============================================
-    
-    for cat in ["mpu", "environment", "motor", "gps", "system"]:
-        if cat in incoming:
-            # Update only non-None values
-            for key, value in incoming[cat].items():
-                if value is not None:
-                    sensor_data[cat][key] = value
-            
-            # Log received data
-            if cat == "environment":
-                temp = incoming[cat].get('temperature')
-                humid = incoming[cat].get('humidity')
-                light = incoming[cat].get('light_percent')
-                
-                print(f"🌡️  Environment:")
-                if temp is not None:
-                    print(f"   Temp: {temp:.1f}°C")
-                    has_valid_sensors = True
-                else:
-                    print(f"   Temp: N/A")
-                    
-                if humid is not None:
-                    print(f"   Humidity: {humid:.0f}%")
-                    has_valid_sensors = True
-                else:
-                    print(f"   Humidity: N/A")
-                    
-                if light is not None:
-                    print(f"   💡 Light: {light}%")
-                    has_valid_sensors = True
-                else:
-                    print(f"   💡 Light: N/A")
-            
-            elif cat == "mpu":
-                vib = incoming[cat].get('vibration_rms', 0)
-                tilt = incoming[cat].get('tilt_angle', 0)
-                print(f"📊 MPU6050:")
-                print(f"   Vibration: {vib:.3f}G")
-                print(f"   Tilt: {tilt:.1f}°")
-                has_valid_sensors = True
-            
-            elif cat == "motor":
-                rpm = incoming[cat].get('rpm', 0)
-                hall = incoming[cat].get('hall_detected', False)
-                print(f"⚙️  Motor:")
-                print(f"   RPM: {rpm:.0f}")
-                print(f"   Hall: {'✅ OK' if hall else '❌ FAULT'}")
-                has_valid_sensors = True
-            
-            elif cat == "gps":
-                lat = incoming[cat].get('latitude')
-                lng = incoming[cat].get('longitude')
-                sats = incoming[cat].get('satellites', 0)
-                hdop_raw = incoming[cat].get('hdop', 9999)
-                
-                # Convert HDOP if needed (ESP32 sends raw * 100)
-                hdop = hdop_raw / 100.0 if hdop_raw > 50 else hdop_raw
-                sensor_data['gps']['hdop'] = hdop
-                
-                print(f"🛰️  GPS:")
-                if lat is not None and lng is not None and lat != 0 and lng != 0:
-                    print(f"   Location: {lat:.6f}, {lng:.6f}")
-                    print(f"   Satellites: {sats}")
-                    print(f"   HDOP: {hdop:.2f}")
-                    has_valid_gps = True
-                    
-                    # Update GPS quality label
-                    if hdop < 1.0:
-                        sensor_data['gps']['gps_quality'] = "IDEAL"
-                    elif hdop < 2.0:
-                        sensor_data['gps']['gps_quality'] = "EXCELLENT"
-                    elif hdop < 5.0:
-                        sensor_data['gps']['gps_quality'] = "GOOD"
-                    elif hdop < 10.0:
-                        sensor_data['gps']['gps_quality'] = "MODERATE"
-                    elif hdop < 20.0:
-                        sensor_data['gps']['gps_quality'] = "FAIR"
-                    else:
-                        sensor_data['gps']['gps_quality'] = "POOR"
-                else:
-                    print(f"   ⚠️  NO FIX (Sats: {sats}, HDOP: {hdop:.2f})")
-                    sensor_data['gps']['gps_quality'] = "NO_FIX"
-    
-    # ============================================
-    # UPDATE SYSTEM FLAGS
-    # ============================================
-    
-    sensor_data['system']['source'] = source
-    sensor_data['system']['gps_valid'] = has_valid_gps
-    sensor_data['system']['sensors_valid'] = has_valid_sensors
-    
-    # ============================================
-    # HANDLE DIAGNOSTIC SCAN
-    # ============================================
-    
-    if incoming.get('system', {}).get('scan_triggered'):
-        sensor_data['system']['scan_triggered'] = True
-        scan_reset_time = time.time() + 5
-        print(f"🔍 DIAGNOSTIC SCAN TRIGGERED (5s duration)")
-    
-    # Auto-reset scan after timeout
-    if sensor_data['system']['scan_triggered'] and time.time() > scan_reset_time:
-        sensor_data['system']['scan_triggered'] = False
-        print(f"✅ Diagnostic scan completed")
-    
-    # ============================================
-    # FETCH WEATHER DATA
-    # ============================================
-    
-    weather_data = None
-    
-    if has_valid_gps:
-        try:
-            weather_data = weather_api.get_weather(
-                sensor_data['gps']['latitude'], 
-                sensor_data['gps']['longitude']
-            )
-            
-            if weather_data:
-                sensor_data['weather'] = {
-                    "wind_speed": weather_data.get('wind_speed', 0),
-                    "visibility": weather_data.get('visibility', 10000),
-                    "condition": weather_data.get('weather_main', 'Clear')
-                }
-                print(f"🌤️  Weather:")
-                print(f"   Condition: {weather_data.get('weather_main', 'Unknown')}")
-                print(f"   Wind: {weather_data.get('wind_speed', 0):.1f} m/s")
-                print(f"   Visibility: {weather_data.get('visibility', 10000)/1000:.1f} km")
-        except Exception as e:
-            print(f"⚠️  Weather fetch failed: {e}")
-            sensor_data['weather'] = {
-                "wind_speed": None,
-                "visibility": None,
-                "condition": "Unavailable"
-            }
-    else:
-        sensor_data['weather'] = {
-            "wind_speed": None,
-            "visibility": None,
-            "condition": "No GPS Fix"
-        }
-    
-    # ============================================
-    # GEOFENCE & RISK ASSESSMENT
-    # ============================================
-    
-    if has_valid_gps:
-        # Check airspace zone
-        zone = mappls.check_airspace(
-            sensor_data['gps']['latitude'], 
-            sensor_data['gps']['longitude']
-        )
-        sensor_data['gps']['geo_zone'] = zone
-        
-        # Calculate risk
-        score, reason, level = calculate_risk_index(
-            sensor_data, 
-            zone, 
-            weather_data
-        )
-        
-        sensor_data['system']['risk_score'] = score
-        sensor_data['system']['blocked_reason'] = reason
-        sensor_data['system']['risk_level'] = level
-        
-        print(f"\n⚠️  Risk Assessment:")
-        print(f"   Zone: {zone}")
-        print(f"   Level: {level}")
-        print(f"   Score: {score}%")
-        print(f"   Reason: {reason}")
-    else:
-        # No GPS = No geofence, no risk calculation
-        sensor_data['gps']['geo_zone'] = "UNKNOWN"
-        sensor_data['system']['risk_score'] = 0
-        sensor_data['system']['blocked_reason'] = "Waiting for GPS Fix..."
-        sensor_data['system']['risk_level'] = "STANDBY"
-        
-        print(f"\n⚠️  Risk Assessment:")
-        print(f"   Status: STANDBY (No GPS Fix)")
-    
-    # Update timestamp
-    sensor_data["system"]["timestamp"] = datetime.now().isoformat()
-    
-    print("="*70 + "\n")
-    
-    return True, "Data updated successfully"
+    return ingest.update(incoming, source, received_at)
+
+def publish_transitions(drone_id, received_at=None):
+    """Emit transition events for the drone's current state."""
+    ingest.publish_transitions(drone_id, received_at)
+
+def packet_source(incoming):
+    """Source named in the packet's system block, else ESP32."""
+    if 'system' in incoming and incoming.get('system', {}).get('source'):
+        return incoming['system']['source']
+    return "ESP32"
+
+def receive_ipc_packet(incoming, received_at):
+    """Frames from main.py over the local socket (same path as POST /data)."""
+    if incoming:
+        update_global_state(incoming, source=packet_source(incoming), received_at=received_at)
+
+# Local transport for main.py; started in __main__ so importing server.py
+# (benchmarks, tooling) never takes over a running server's socket
+ipc_server = TelemetrySocketServer(
+    receive_ipc_packet,
+    config_service.current.raw.get('ipc', {}).get('socket_path', DEFAULT_SOCKET_PATH)
+)
 
 # ============================================
 # API ENDPOINTS
@@ -361,6 +203,7 @@ def receive_data():
     POST /data
     Body: JSON with sensor readings
     """
+    received_at = time.perf_counter()
     try:
         incoming = request.json
         if not incoming: 
@@ -369,14 +212,9 @@ def receive_data():
                 "message": "No data received"
             }), 400
         
-        # Determine source
-        if 'system' in incoming and incoming.get('system', {}).get('source'):
-            source = incoming['system']['source']
-        else:
-            source = "ESP32"
-        
         # Update global state
-        success, message = update_global_state(incoming, source=source)
+        success, message = update_global_state(incoming, source=packet_source(incoming),
+                                               received_at=received_at)
         
         if success:
             return jsonify({
@@ -401,6 +239,47 @@ def receive_data():
             "message": str(e)
         }), 500
 
+@app.route('/data/burst', methods=['POST'])
+def receive_burst():
+    """
+    Receive a raw accelerometer burst for off-thread FFT analysis.
+    POST /data/burst
+    Body: JSON (see vibration_analysis.parse_burst_json), or
+          application/octet-stream of interleaved x,y,z samples with
+          ?drone_id=&sample_rate_hz=&dtype=int16|float32[&scale=]
+    Returns: 202 once queued; features appear in /api/current "spectrum"
+    """
+    try:
+        if request.mimetype == 'application/octet-stream':
+            drone_id = request.args.get('drone_id')
+            rate_hz = request.args.get('sample_rate_hz', 0, type=float)
+            samples = parse_burst_binary(
+                request.get_data(),
+                rate_hz,
+                request.args.get('dtype', 'int16'),
+                request.args.get('scale', None, type=float)
+            )
+        else:
+            drone_id, rate_hz, samples = parse_burst_json(request.get_json(silent=True))
+    except BurstError as e:
+        return jsonify({
+            "status": "error", 
+            "message": str(e)
+        }), 400
+    
+    drone_id = drone_id or sensor_data['system'].get('drone_id') or "ESP32"
+    if not vibration.submit(drone_id, rate_hz, samples):
+        return jsonify({
+            "status": "error", 
+            "message": "Analyzer busy, burst dropped"
+        }), 429
+    
+    return jsonify({
+        "status": "queued", 
+        "drone_id": drone_id,
+        "samples": len(samples)
+    }), 202
+
 @app.route('/api/current', methods=['GET'])
 def get_current():
     """
@@ -411,29 +290,91 @@ def get_current():
     global sensor_data
     
     # Auto-reset scan trigger after timeout
-    if sensor_data['system']['scan_triggered'] and time.time() > scan_reset_time:
+    if sensor_data['system']['scan_triggered'] and time.time() > ingest.scan_reset_time:
         sensor_data['system']['scan_triggered'] = False
+        # Same key as ingest (drone_id, else source)
+        publish_transitions(sensor_data['system'].get('drone_id') or sensor_data['system']['source'])
+    
+    # Risk window aggregates are built on read, not per packet
+    sensor_data['risk_window'] = risk_windows.snapshot(
+        sensor_data['system'].get('drone_id') or sensor_data['system']['source'])
+    
+    # Latest burst analysis (computed off-thread)
+    drone_id = sensor_data['system'].get('drone_id')
+    if drone_id:
+        sensor_data['spectrum'] = vibration.latest(drone_id, SPECTRUM_MAX_AGE_S)
     
     # Always return fresh timestamp
     sensor_data['system']['timestamp'] = datetime.now().isoformat()
     
+    # Carried sensor readings live in state_record between reads
+    state_record.apply_to(sensor_data, CARRIED_CATEGORIES)
+    
     return jsonify(sensor_data)
 
+@app.route('/api/events', methods=['GET'])
+def get_events():
+    """
+    Recent transition events for polling clients.
+    GET /api/events?since=<seq>
+    """
+    since = request.args.get('since', 0, type=int)
+    return jsonify([event.to_dict() for event in event_bus.events_since(since)])
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of transition events.
+    GET /api/events/stream
+    """
+    sub = event_bus.subscribe(f"sse:{request.remote_addr}:{time.time():.0f}", maxsize=256)
+    
+    def generate():
+        try:
+            while True:
+                event = sub.get(timeout=15)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.type}\ndata: {json.dumps(event.to_dict())}\n\n"
+        finally:
+            event_bus.unsubscribe(sub)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+@app.route('/api/events/stats', methods=['GET'])
+def event_stats():
+    """
+    Event counts and packet-to-delivery latency per subscriber.
+    GET /api/events/stats
+    """
+    return jsonify({
+        **event_bus.stats(),
+        'webhooks': [hook.stats() for hook in webhooks]
+    })
+
 @app.route('/weather/set/<condition>', methods=['POST'])
 def set_weather(condition):
     """
     Manually set weather condition for testing.
-    POST /weather/set/<condition>
+    POST /weather/set/<condition>[?lat=..&lng=..&radius_km=..]
     Example: POST /weather/set/Thunderstorm
+    With a synthetic weather field, lat/lng/radius_km apply the
+    scenario to that region only.
     """
     try:
-        weather_api.set_weather_condition(condition)
+        weather_api.set_weather_condition(
+            condition,
+            request.args.get('lat', type=float),
+            request.args.get('lng', type=float),
+            request.args.get('radius_km', type=float)
+        )
         
         # Update weather immediately if GPS is valid
         if sensor_data['system']['gps_valid']:
             weather_data = weather_api.get_weather(
-                sensor_data['gps']['latitude'], 
-                sensor_data['gps']['longitude']
+                state_record.latitude, 
+                state_record.longitude
             )
             
             if weather_data:
@@ -446,14 +387,19 @@ def set_weather(condition):
             # Recalculate risk
             zone = sensor_data['gps']['geo_zone']
             score, reason, level = calculate_risk_index(
-                sensor_data, 
+                state_record, 
                 zone, 
-                weather_data
+                weather_data,
+                sensor_data['stats'],
+                sensor_data['spectrum']
             )
             
+            # The packet is already in the window: re-judge it without a second sample
+            system = sensor_data['system']
+            held = risk_windows.peek(system.get('drone_id') or system['source'], score, level)
             sensor_data['system']['risk_score'] = score
             sensor_data['system']['blocked_reason'] = reason
-            sensor_data['system']['risk_level'] = level
+            sensor_data['system']['risk_level'] = held
             
             print(f"🌤️  Weather set to: {condition} | New risk: {score}%")
         
@@ -470,9 +416,173 @@ def set_weather(condition):
             "message": str(e)
         }), 500
 
+@app.route('/api/plan/validate', methods=['POST'])
+def validate_plan():
+    """
+    Pre-validate a flight plan against the geofence.
+    POST /api/plan/validate
+    Body: {"waypoints": [[lat, lng], ...]} or [{"lat": .., "lng": ..}, ...]
+    Returns: first RED violation and per-segment zone exposure
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({
+            "status": "error", 
+            "message": "Body must be a JSON object with 'waypoints'"
+        }), 400
+    
+    try:
+        result = plan_validator.validate(body.get('waypoints'))
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify({
+            "status": "error", 
+            "message": str(e)
+        }), 400
+    
+    print(f"🗺️  Plan validated: {result['waypoints']} waypoints, "
+          f"{'✅ VALID' if result['valid'] else '⛔ VIOLATION'} ({result['elapsed_ms']}ms)")
+    
+    return jsonify({"status": "success", **result}), 200
+
+@app.route('/api/weather/stats', methods=['GET'])
+def weather_stats():
+    """
+    Weather provider latency and area cache statistics.
+    GET /api/weather/stats
+    """
+    return jsonify(weather_api.stats())
+
+@app.route('/api/export', methods=['GET'])
+def export_history():
+    """
+    Stream telemetry history as columnar chunks.
+    GET /api/export?format=csv|npz|parquet&drone=<id>&start=<unix>&end=<unix>
+    drone may be repeated; start/end are Unix seconds (end exclusive).
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({
+            "status": "error", 
+            "message": f"format must be one of {sorted(FORMATS)}"
+        }), 400
+    if fmt == 'parquet' and not history.stats()['parquet']:
+        return jsonify({
+            "status": "error", 
+            "message": "Parquet export requires pyarrow on the server"
+        }), 501
+    
+    chunks = history.iter_chunks(
+        request.args.get('start', type=float),
+        request.args.get('end', type=float),
+        request.args.getlist('drone') or None
+    )
+    mimetype, extension = FORMATS[fmt]
+    response = Response(stream_with_context(stream_export(chunks, fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="telemetry.{extension}"'
+    return response
+
+@app.route('/api/export/stats', methods=['GET'])
+def export_stats():
+    """
+    Telemetry history size and spool state.
+    GET /api/export/stats
+    """
+    return jsonify(history.stats())
+
+@app.route('/api/trace/render', methods=['POST'])
+def trace_render():
+    """
+    Dashboard render report for a traced packet.
+    POST /api/trace/render
+    Body: {"trace_id": "...", "rendered_at": <unix seconds>}
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"status": "error", "message": "Body must be a JSON object"}), 400
+    try:
+        rendered_at = float(body.get('rendered_at', time.time()))
+    except (TypeError, ValueError):
+        rendered_at = math.nan
+    if not math.isfinite(rendered_at):
+        return jsonify({"status": "error", "message": "rendered_at must be a number"}), 400
+    trace = tracer.rendered_at(str(body.get('trace_id')), rendered_at)
+    if trace is None:
+        return jsonify({"status": "ignored"}), 202
+    return jsonify({"status": "success"}), 200
+
+@app.route('/api/trace/stats', methods=['GET'])
+def trace_stats():
+    """
+    Per-stage and end-to-end latency distributions of traced packets.
+    GET /api/trace/stats
+    """
+    return jsonify(tracer.stats())
+
+@app.route('/api/trace/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    """
+    Stage timestamps of one recent trace.
+    GET /api/trace/<trace_id>
+    """
+    trace = tracer.get(trace_id)
+    if trace is None:
+        return jsonify({"status": "error", "message": "Unknown trace"}), 404
+    return jsonify(trace)
+
+@app.route('/api/ipc/stats', methods=['GET'])
+def ipc_stats():
+    """
+    Local socket transport counters.
+    GET /api/ipc/stats
+    """
+    return jsonify(ipc_server.stats())
+
+@app.route('/api/debug/profile', methods=['POST'])
+def profile_server():
+    """
+    Sample every server thread's stack for a while and report where time goes.
+    POST /api/debug/profile?seconds=5&interval_ms=5&format=json|collapsed&limit=50
+    Requires the X-Debug-Token header when debug.profiler_token is set,
+    otherwise only loopback clients are allowed. Blocks for `seconds`.
+    """
+    debug_config = config_service.current.raw.get('debug', {})
+    token = debug_config.get('profiler_token')
+    if token:
+        if not hmac.compare_digest(request.headers.get('X-Debug-Token', '').encode(), str(token).encode()):
+            return jsonify({"status": "error", "message": "Invalid debug token"}), 403
+    elif request.remote_addr not in LOOPBACK_ADDRS:
+        return jsonify({"status": "error", "message": "Profiling is only allowed from localhost"}), 403
+
+    try:
+        seconds = float(request.args['seconds']) if 'seconds' in request.args else 5.0
+        interval_ms = float(request.args['interval_ms']) if 'interval_ms' in request.args else 5.0
+        limit = int(request.args['limit']) if 'limit' in request.args else 50
+    except ValueError:
+        return jsonify({"status": "error", "message": "seconds, interval_ms and limit must be numbers"}), 400
+    max_seconds = debug_config.get('profiler_max_seconds', 30)
+    if not 0 < seconds <= max_seconds:
+        return jsonify({"status": "error", "message": f"seconds must be in (0, {max_seconds}]"}), 400
+    if not 0 < interval_ms < math.inf:
+        return jsonify({"status": "error", "message": "interval_ms must be positive"}), 400
+
+    try:
+        result = profiler.run(seconds, interval_ms / 1000.0)
+    except ProfilerBusy as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+
+    if request.args.get('format') == 'collapsed':
+        return Response(collapsed_text(result), mimetype='text/plain')
+    return jsonify({
+        "status": "success",
+        **result,
+        "collapsed": collapsed_text(result),
+        "top": result['top'][:limit]
+    })
+
 @app.route('/api/config/scenarios', methods=['GET'])
 def get_scenarios():
     """Get demo scenarios from config."""
+    config = config_service.current.raw
     if 'demo_scenarios' in config:
         return jsonify(config['demo_scenarios'])
     return jsonify({}), 404
@@ -480,6 +590,7 @@ def get_scenarios():
 @app.route('/api/config/thresholds', methods=['GET'])
 def get_thresholds():
     """Get risk thresholds from config."""
+    config = config_service.current.raw
     if 'risk_thresholds' in config:
         return jsonify(config['risk_thresholds'])
     return jsonify({}), 404
@@ -488,15 +599,25 @@ def get_thresholds():
 # STATIC FILE SERVING
 # ============================================
 
+# Hashed, precompressed copies of the dashboard files
+static_assets = StaticAssetCache(project_root)
+
 @app.route('/')
 def index():
     """Serve main HTML page."""
-    return send_from_directory(project_root, 'index.html')
+    return serve_static('index.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    """Serve static files (CSS, JS, images)."""
-    return send_from_directory(project_root, filename)
+    """
+    Serve static files (CSS, JS, images).
+    Cached assets get content-hash ETags and gzip/brotli variants;
+    anything else falls back to plain file serving.
+    """
+    asset = static_assets.get(filename)
+    if asset is None:
+        return send_from_directory(project_root, filename)
+    return asset_response(asset, request, app.response_class)
 
 # ============================================
 # MAIN ENTRY POINT
@@ -513,10 +634,16 @@ if __name__ == '__main__':
     print(f"🌐 Network: http://0.0.0.0:5000")
     print(f"📡 POST Endpoint: /data")
     print(f"📊 GET Endpoint: /api/current")
+    print(f"📈 Burst Endpoint: POST /data/burst")
     print(f"🌤️  Weather Control: POST /weather/set/<condition>")
+    print(f"🗺️  Plan Validation: POST /api/plan/validate")
+    print(f"🔔 Events: GET /api/events, /api/events/stream")
+    print(f"💾 Export: GET /api/export?format=csv|npz|parquet")
+    if ipc_server.start():
+        print(f"🔌 IPC Socket: {ipc_server.path}")
     print("="*70)
     print("✅ Real-time logging enabled")
-    print("✅ Cache disabled for live updates")
+    print("✅ Cache disabled for live updates (static assets: ETag + long-lived)")
     print("✅ CORS enabled for cross-origin requests")
     print("⚠️  Using NULL defaults - Real sensor data only")
     print("="*70 + "\n")
@@ -0,0 +1,203 @@
+"""
+Cacheable static asset serving for the dashboard.
+
+Files are read once per content version (re-read when mtime/size change),
+hashed, and kept in memory with gzip (and brotli, when the optional
+`brotli` package is installed) variants compressed up front. Responses
+carry a content-hash ETag so revalidation is a 304 with no body.
+
+HTML pages are rewritten so local scripts/stylesheets are referenced as
+`app.js?v=<hash>`. Versioned URLs are immutable and cached for a year;
+unversioned URLs (including the page itself) must revalidate. A page is
+rewritten again whenever one of its referenced assets changes, which
+changes the page's own ETag, so a new deploy is picked up on the next
+reload.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Below this size compression is not worth the extra header bytes
+MIN_COMPRESS_BYTES = 1024
+
+# Larger files are served straight from disk instead of being held in memory
+MAX_CACHED_BYTES = 4 * 1024 * 1024
+
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# Local (relative or root-relative) script/stylesheet references in HTML
+_ASSET_REF = re.compile(r'''((?:src|href)=["'])(/?[\w./-]+\.(?:js|css))(["'])''')
+
+
+class StaticAsset:
+    """
+    One file version: body, ETag and precompressed variants.
+    deps: (filename, etag) of assets versioned into an HTML body (etag
+    None for references that did not resolve).
+    """
+    __slots__ = ('path', 'stamp', 'mimetype', 'etag', 'variants', 'deps')
+
+    def __init__(self, path, stamp, body, mimetype, deps=()):
+        self.path = path
+        self.stamp = stamp
+        self.deps = deps
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {'identity': body}
+
+        if len(body) >= MIN_COMPRESS_BYTES and mimetype.startswith(COMPRESSIBLE):
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                self.variants['gzip'] = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.variants['br'] = br
+
+
+def parse_accept_encoding(header):
+    """Returns set of encodings the client accepts (q > 0)."""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class StaticAssetCache:
+    """In-memory, content-hashed view of a static directory."""
+
+    def __init__(self, root, max_entries=128):
+        self.root = root
+        self.max_entries = max_entries
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, filename):
+        """Current StaticAsset for filename, None if missing or too large to cache."""
+        path = safe_join(self.root, filename)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path) or st.st_size > MAX_CACHED_BYTES:
+            return None
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            asset = self._assets.get(path)
+        if asset and asset.stamp == stamp and self._deps_current(asset):
+            with self._lock:
+                self.hits += 1
+            return asset
+
+        asset = self._load(filename, path, stamp)
+        with self._lock:
+            if len(self._assets) >= self.max_entries and path not in self._assets:
+                self._assets.pop(next(iter(self._assets)))
+            self._assets[path] = asset
+            self.loads += 1
+        return asset
+
+    def _load(self, filename, path, stamp):
+        with open(path, 'rb') as f:
+            body = f.read()
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        deps = ()
+        if mimetype == 'text/html':
+            body, deps = self._version_refs(body, os.path.dirname(filename))
+        return StaticAsset(path, stamp, body, mimetype, deps)
+
+    def _deps_current(self, asset):
+        """True if every asset versioned into the page still has the same ETag."""
+        for filename, etag in asset.deps:
+            dep = self.get(filename)
+            if (dep.etag if dep else None) != etag:
+                return False
+        return True
+
+    def _version_refs(self, html, base):
+        """
+        Append ?v=<hash> to local script/stylesheet references.
+        Returns (body, deps) with deps as for StaticAsset.
+        """
+        deps = {}
+
+        def replace(match):
+            prefix, ref, suffix = match.groups()
+            target = ref.lstrip('/') if ref.startswith('/') else os.path.join(base, ref)
+            asset = self.get(target)
+            deps[target] = asset.etag if asset else None
+            if asset is None:
+                return match.group(0)
+            return f"{prefix}{ref}?v={asset.etag}{suffix}"
+
+        text = html.decode('utf-8')
+        body = _ASSET_REF.sub(replace, text).encode('utf-8')
+        return body, tuple(deps.items())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._assets),
+                'hits': self.hits,
+                'loads': self.loads,
+                'brotli': brotli is not None
+            }
+
+
+def asset_response(asset, request, response_class):
+    """
+    Build the response for a cached asset: 304 when the ETag matches,
+    otherwise the best variant for the client's Accept-Encoding.
+    """
+    accepted = parse_accept_encoding(request.headers.get('Accept-Encoding'))
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in asset.variants and candidate in accepted:
+            encoding = candidate
+            break
+
+    etag = asset.etag if encoding == 'identity' else f"{asset.etag}-{encoding}"
+    versioned = request.args.get('v') == asset.etag
+
+    if etag in request.if_none_match or asset.etag in request.if_none_match:
+        response = response_class(status=304)
+    else:
+        response = response_class(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE if versioned else REVALIDATE_CACHE
+    if len(asset.variants) > 1:
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
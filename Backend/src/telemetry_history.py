@@ -0,0 +1,461 @@
+"""
+Columnar telemetry history and chunked export.
+
+Every processed packet is appended as one row to a fixed-size chunk of
+NumPy column arrays. Full chunks are sealed, kept in memory for recent
+queries and spooled to disk as .npz by a writer thread, so ingest only
+ever pays for a row assignment. Exports walk the chunks one at a time
+(in memory or from the spool), filter by time range and drone, and
+stream NPZ, Parquet (when pyarrow is installed) or CSV output, so memory
+stays bounded by one chunk whatever the export size.
+
+Usage (offline, from the spool directory):
+    python telemetry_history.py --dir ../telemetry_history --format csv --out flight.csv
+    python telemetry_history.py --drone DRONE-1 --start 1760000000 --format npz --out d1.npz
+"""
+import argparse
+import csv
+import glob
+import io
+import os
+import queue
+import sys
+import threading
+import time
+import zipfile
+from collections import deque
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+# (name, dtype) of each column, in export order
+COLUMNS = (
+    ('timestamp', 'f8'),
+    ('drone_id', 'U32'),
+    ('source', 'U16'),
+    ('latitude', 'f8'),
+    ('longitude', 'f8'),
+    ('satellites', 'i2'),
+    ('hdop', 'f4'),
+    ('speed', 'f4'),
+    ('vibration_rms', 'f4'),
+    ('tilt_angle', 'f4'),
+    ('rpm', 'f4'),
+    ('temperature', 'f4'),
+    ('humidity', 'f4'),
+    ('wind_speed', 'f4'),
+    ('visibility', 'f4'),
+    ('weather', 'U16'),
+    ('geo_zone', 'U8'),
+    ('risk_score', 'i2'),
+    ('risk_level', 'U8')
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'npz': ('application/octet-stream', 'npz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def _missing(dtype):
+    """Fill value for an absent reading."""
+    kind = np.dtype(dtype).kind
+    if kind == 'f':
+        return np.nan
+    if kind == 'i':
+        return -1
+    return ''
+
+
+def row_from_record(record, state, timestamp=None):
+    """
+    History row from a TelemetryRecord (sensor readings) plus server.py's
+    sensor_data for the server-computed fields (weather, zone, risk).
+    """
+    weather, system = state['weather'], state['system']
+    return {
+        'timestamp': timestamp if timestamp is not None else time.time(),
+        'drone_id': system.get('drone_id'),
+        'source': system.get('source'),
+        'latitude': record.latitude,
+        'longitude': record.longitude,
+        'satellites': record.satellites,
+        'hdop': record.hdop,
+        'speed': record.speed,
+        'vibration_rms': record.vibration_rms,
+        'tilt_angle': record.tilt_angle,
+        'rpm': record.rpm,
+        'temperature': record.temperature,
+        'humidity': record.humidity,
+        'wind_speed': weather.get('wind_speed'),
+        'visibility': weather.get('visibility'),
+        'weather': weather.get('condition'),
+        'geo_zone': state['gps'].get('geo_zone'),
+        'risk_score': system.get('risk_score'),
+        'risk_level': system.get('risk_level')
+    }
+
+# ============================================
+# CHUNKS
+# ============================================
+
+class Chunk:
+    """Preallocated column arrays for up to `capacity` rows."""
+    __slots__ = ('seq', 'columns', 'size', 't_min', 't_max', 'path', 'spool_done')
+
+    def __init__(self, seq, capacity):
+        self.seq = seq
+        self.columns = {name: np.full(capacity, _missing(dtype), dtype=dtype) for name, dtype in COLUMNS}
+        self.size = 0
+        self.t_min = np.inf
+        self.t_max = -np.inf
+        self.path = None
+        self.spool_done = False  # spool writer finished with it (written or failed)
+
+    @property
+    def full(self):
+        return self.size == len(self.columns['timestamp'])
+
+    def append(self, row):
+        i = self.size
+        for name, value in row.items():
+            if value is not None:
+                self.columns[name][i] = value
+        t = row['timestamp']
+        self.t_min = min(self.t_min, t)
+        self.t_max = max(self.t_max, t)
+        self.size = i + 1
+
+    def view(self):
+        """Columns trimmed to the filled rows."""
+        return {name: col[:self.size] for name, col in self.columns.items()}
+
+
+def _spool_name(seq, t_min, t_max):
+    return f"chunk-{seq:08d}-{int(t_min)}-{int(np.ceil(t_max))}.npz"
+
+
+def _parse_spool_name(path):
+    """(seq, t_min, t_max) from a spool file name."""
+    _, seq, t_min, t_max = os.path.basename(path)[:-4].split('-')
+    return int(seq), float(t_min), float(t_max)
+
+
+def _filter(columns, start, end, drone_ids):
+    ts = columns['timestamp']
+    mask = np.ones(len(ts), dtype=bool)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts < end
+    if drone_ids:
+        mask &= np.isin(columns['drone_id'], list(drone_ids))
+    if mask.all():
+        return columns
+    return {name: col[mask] for name, col in columns.items()}
+
+# ============================================
+# STORE
+# ============================================
+
+class TelemetryHistory:
+    """
+    Append-only columnar history.
+    memory_chunks sealed chunks stay in RAM; with a spool_dir every sealed
+    chunk is also written to disk, keeping at most max_spool_chunks files,
+    and a chunk leaves RAM only once its write has finished (so a lagging
+    writer never hides rows from exports). Without a spool_dir history is
+    capped at the newest memory_chunks * chunk_rows rows (plus the active
+    chunk); see stats()['max_rows'].
+    """
+
+    def __init__(self, spool_dir=None, chunk_rows=4096, memory_chunks=16, max_spool_chunks=1024):
+        self.spool_dir = spool_dir
+        self.chunk_rows = chunk_rows
+        self.memory_chunks = memory_chunks
+        self.max_spool_chunks = max_spool_chunks
+        self._sealed = deque()
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.spooled = 0
+
+        seq = 0
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            existing = self._spool_files()
+            if existing:
+                seq = _parse_spool_name(existing[-1])[0] + 1
+            self._writes = queue.Queue()
+            self._writer_thread = threading.Thread(target=self._writer, name='history-spool', daemon=True)
+            self._writer_thread.start()
+        self._active = Chunk(seq, chunk_rows)
+
+    def append(self, row):
+        """Add one row (dict column -> value); O(1), never touches disk."""
+        with self._lock:
+            self._active.append(row)
+            self.rows += 1
+            if self._active.full:
+                self._seal()
+
+    def _seal(self):
+        chunk = self._active
+        self._sealed.append(chunk)
+        self._active = Chunk(chunk.seq + 1, self.chunk_rows)
+        if self.spool_dir:
+            self._writes.put(chunk)
+        self._evict()
+
+    def _evict(self):
+        """Drop the oldest sealed chunks beyond memory_chunks (caller holds the lock)."""
+        sealed = self._sealed
+        while len(sealed) > self.memory_chunks and (not self.spool_dir or sealed[0].spool_done):
+            sealed.popleft()
+
+    def _writer(self):
+        while True:
+            chunk = self._writes.get()
+            if chunk is None:
+                return
+            try:
+                self._write_chunk(chunk)
+            except OSError as e:
+                print(f"[History] ⚠️  Spool write failed: {e}")
+            with self._lock:
+                chunk.spool_done = True
+                self._evict()
+
+    def _write_chunk(self, chunk):
+        path = os.path.join(self.spool_dir, _spool_name(chunk.seq, chunk.t_min, chunk.t_max))
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **chunk.view())
+        os.replace(tmp, path)
+        chunk.path = path
+        self.spooled += 1
+
+        files = self._spool_files()
+        for old in files[:max(0, len(files) - self.max_spool_chunks)]:
+            os.remove(old)
+
+    def _spool_files(self):
+        return sorted(glob.glob(os.path.join(self.spool_dir, 'chunk-*.npz')))
+
+    def flush(self, timeout=5):
+        """Seal the partial active chunk and wait for the spool to catch up (on shutdown)."""
+        with self._lock:
+            if self._active.size:
+                self._seal()
+        if self.spool_dir and self._writer_thread.is_alive():
+            self._writes.put(None)
+            self._writer_thread.join(timeout)
+
+    def iter_chunks(self, start=None, end=None, drone_ids=None):
+        """
+        Yield filtered column dicts, oldest first, one chunk at a time.
+        The lock is held only to snapshot chunk references and copy the
+        (partial) active chunk, so ingest continues during an export.
+        """
+        with self._lock:
+            in_memory = list(self._sealed)
+            active = Chunk(self._active.seq, 0)
+            active.columns = {name: col.copy() for name, col in self._active.view().items()}
+            active.size, active.t_min, active.t_max = self._active.size, self._active.t_min, self._active.t_max
+
+        # Spooled chunks older than the oldest one still in memory
+        first_resident = in_memory[0].seq if in_memory else active.seq
+
+        sources = []
+        if self.spool_dir:
+            for path in self._spool_files():
+                seq, t_min, t_max = _parse_spool_name(path)
+                if seq < first_resident:
+                    sources.append((t_min, t_max, path))
+        sources += [(chunk.t_min, chunk.t_max, chunk) for chunk in in_memory + [active] if chunk.size]
+
+        for t_min, t_max, source in sources:
+            if (start is not None and t_max < start) or (end is not None and t_min >= end):
+                continue
+            if isinstance(source, Chunk):
+                columns = source.view()
+            else:
+                try:
+                    with np.load(source) as data:
+                        columns = {name: data[name] for name in COLUMN_NAMES}
+                except (OSError, KeyError):
+                    continue   # rotated away mid-export
+            columns = _filter(columns, start, end, drone_ids)
+            if len(columns['timestamp']):
+                yield columns
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': self.rows,
+                'memory_chunks': len(self._sealed) + 1,
+                'spooled_chunks': self.spooled,
+                'pending_writes': sum(1 for chunk in self._sealed if not chunk.spool_done) if self.spool_dir else 0,
+                # Rows retained without a spool (oldest are dropped beyond this)
+                'max_rows': None if self.spool_dir else (self.memory_chunks + 1) * self.chunk_rows,
+                'spool_dir': self.spool_dir,
+                'parquet': pyarrow is not None
+            }
+
+
+def iter_spool(spool_dir, start=None, end=None, drone_ids=None):
+    """Filtered chunks straight from a spool directory (no server needed)."""
+    for path in sorted(glob.glob(os.path.join(spool_dir, 'chunk-*.npz'))):
+        _, t_min, t_max = _parse_spool_name(path)
+        if (start is not None and t_max < start) or (end is not None and t_min >= end):
+            continue
+        with np.load(path) as data:
+            columns = _filter({name: data[name] for name in COLUMN_NAMES}, start, end, drone_ids)
+        if len(columns['timestamp']):
+            yield columns
+
+# ============================================
+# STREAMING WRITERS
+# ============================================
+
+class _StreamBuffer(io.RawIOBase):
+    """Unseekable sink whose contents are drained after each chunk."""
+
+    def __init__(self):
+        self._parts = []
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _csv_values(col):
+    """Column as CSV cells: shortest float repr per dtype, missing readings blank."""
+    if col.dtype.kind == 'f':
+        return np.where(np.isnan(col), '', col.astype(str)).tolist()
+    return col.tolist()
+
+
+def stream_csv(chunks):
+    """Yield CSV text: header, then one block per chunk."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMN_NAMES)
+    yield buf.getvalue()
+    for columns in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(zip(*(_csv_values(columns[name]) for name in COLUMN_NAMES)))
+        yield buf.getvalue()
+
+
+def stream_npz(chunks):
+    """
+    Yield an .npz (zip) archive with one array per column per chunk,
+    named "<column>.<chunk>"; read_npz_export() reassembles the columns.
+    """
+    buf = _StreamBuffer()
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for i, columns in enumerate(chunks):
+            for name in COLUMN_NAMES:
+                with zf.open(f"{name}.{i:05d}.npy", 'w', force_zip64=True) as f:
+                    np.lib.format.write_array(f, columns[name], allow_pickle=False)
+            yield buf.drain()
+    yield buf.drain()
+
+
+def stream_parquet(chunks):
+    """Yield a Parquet file with one row group per chunk (requires pyarrow)."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    buf = _StreamBuffer()
+    sink = pyarrow.PythonFile(buf, mode='w')
+    writer = None
+    for columns in chunks:
+        table = pyarrow.table({name: columns[name] for name in COLUMN_NAMES})
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield buf.drain()
+    if writer is not None:
+        writer.close()
+    yield buf.drain()
+
+
+def stream_export(chunks, fmt):
+    """Generator of output bytes/text for fmt in FORMATS."""
+    if fmt == 'csv':
+        return stream_csv(chunks)
+    if fmt == 'npz':
+        return stream_npz(chunks)
+    if fmt == 'parquet':
+        return stream_parquet(chunks)
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def read_npz_export(path):
+    """Load an exported .npz back into one concatenated array per column."""
+    with np.load(path) as data:
+        parts = {}
+        for key in sorted(data.files):
+            name, _ = key.rsplit('.', 1)
+            parts.setdefault(name, []).append(data[key])
+    return {name: np.concatenate(parts[name]) if name in parts else np.array([], dtype=dtype)
+            for name, dtype in COLUMNS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export AeroGuard telemetry history")
+    parser.add_argument('--dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      '..', 'telemetry_history'),
+                        help="Spool directory written by server.py")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--drone', action='append', help="Drone ID to include (repeatable)")
+    parser.add_argument('--start', type=float, help="Start time (Unix seconds)")
+    parser.add_argument('--end', type=float, help="End time (Unix seconds, exclusive)")
+    parser.add_argument('--out', help="Output file (default stdout for csv)")
+    args = parser.parse_args()
+
+    if args.format == 'parquet' and pyarrow is None:
+        print("❌ Parquet export requires pyarrow (pip install pyarrow)")
+        return 1
+    if args.format != 'csv' and not args.out:
+        print("❌ --out is required for binary formats")
+        return 1
+
+    chunks = iter_spool(args.dir, args.start, args.end, args.drone)
+    if not args.out:
+        sys.stdout.writelines(stream_export(chunks, 'csv'))
+        return 0
+
+    if args.format == 'csv':
+        out = open(args.out, 'w', newline='')
+    else:
+        out = open(args.out, 'wb')
+    with out:
+        out.writelines(stream_export(chunks, args.format))
+    print(f"✅ Exported to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
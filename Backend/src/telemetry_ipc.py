@@ -0,0 +1,351 @@
+"""
+Local telemetry transport between main.py and server.py.
+
+main.py publishes each packet as a length-prefixed frame (4-byte
+big-endian length + JSON) over a Unix domain socket; server.py reads the
+frames and feeds them straight to update_global_state, skipping HTTP
+request parsing and Flask routing on the same box.
+
+Backpressure: publish() never blocks the serial loop. Frames wait in a
+bounded queue drained by a sender thread; when it is full the oldest
+frame is dropped (fresh telemetry matters more than stale). On the
+server side the reader handles one frame at a time, so a slow consumer
+fills the socket buffer and pushes back into that queue. When the
+socket is unavailable (server down, or no AF_UNIX on this platform)
+publish() returns False and the caller falls back to HTTP.
+
+Usage:
+    python telemetry_ipc.py --bench 2000     # IPC vs requests.post per-sample cost
+"""
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+from latency import percentile
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'aeroguard-telemetry.sock')
+
+HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 1024 * 1024
+
+# How often a disconnected publisher retries the socket
+RECONNECT_INTERVAL_S = 1.0
+
+IPC_SUPPORTED = hasattr(socket, 'AF_UNIX')
+
+
+class FrameError(ValueError):
+    """Raised for oversized or truncated frames."""
+
+
+def encode_frame(packet):
+    """Length-prefixed frame for a dict (JSON-encoded) or bytes payload."""
+    payload = packet if isinstance(packet, bytes) else json.dumps(packet, separators=(',', ':')).encode()
+    if len(payload) > MAX_FRAME_BYTES:
+        raise FrameError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME_BYTES}")
+    return HEADER.pack(len(payload)) + payload
+
+
+def _recv_exactly(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            if buf:
+                raise FrameError("Connection closed mid-frame")
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def read_frames(sock):
+    """Yield decoded packets from a connected socket until it closes."""
+    while True:
+        header = _recv_exactly(sock, HEADER.size)
+        if header is None:
+            return
+        (length,) = HEADER.unpack(header)
+        if length > MAX_FRAME_BYTES:
+            raise FrameError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+        payload = _recv_exactly(sock, length)
+        if payload is None:
+            raise FrameError("Connection closed mid-frame")
+        yield json.loads(payload)
+
+# ============================================
+# PUBLISHER (main.py side)
+# ============================================
+
+class TelemetryPublisher:
+    """Non-blocking frame publisher with a bounded drop-oldest queue."""
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, max_pending=256):
+        self.path = path
+        self._pending = deque(maxlen=max_pending)
+        self._wake = threading.Condition()
+        self._sock = None
+        self._next_attempt = 0.0
+        self._stop = False
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name='telemetry-ipc', daemon=True)
+        if IPC_SUPPORTED:
+            self._thread.start()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def publish(self, packet):
+        """
+        Queue a packet for the server.
+        Returns False when the socket is not connected (use HTTP instead).
+        """
+        if not IPC_SUPPORTED:
+            return False
+        if self._sock is None:
+            self._try_connect()
+            if self._sock is None:
+                return False
+
+        frame = encode_frame(packet)
+        with self._wake:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(frame)
+            self._wake.notify()
+        return True
+
+    def _try_connect(self):
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return
+        self._next_attempt = now + RECONNECT_INTERVAL_S
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            return
+        self._sock = sock
+
+    def _disconnect(self):
+        sock, self._sock = self._sock, None
+        if sock:
+            sock.close()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._pending and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+                # Coalesce everything queued into one write
+                batch = list(self._pending)
+                self._pending.clear()
+
+            sock = self._sock
+            if sock is None:
+                self.dropped += len(batch)
+                continue
+            try:
+                sock.sendall(b''.join(batch))
+                self.sent += len(batch)
+            except OSError:
+                self.failures += 1
+                self.dropped += len(batch)
+                self._disconnect()
+
+    def close(self):
+        with self._wake:
+            self._stop = True
+            self._wake.notify()
+        self._disconnect()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'connected': self.connected,
+            'pending': len(self._pending),
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'failures': self.failures
+        }
+
+# ============================================
+# SERVER (server.py side)
+# ============================================
+
+class TelemetrySocketServer:
+    """
+    Accepts publisher connections and calls handler(packet, received_at)
+    for each frame, in order, on that connection's reader thread.
+    """
+
+    def __init__(self, handler, path=DEFAULT_SOCKET_PATH):
+        self.handler = handler
+        self.path = path
+        self.received = 0
+        self.errors = 0
+        self._sock = None
+
+    def start(self):
+        if not IPC_SUPPORTED:
+            return None
+        if os.path.exists(self.path):
+            os.unlink(self.path)   # stale socket from a previous run
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(4)
+        threading.Thread(target=self._accept, name='telemetry-ipc-accept', daemon=True).start()
+        return self
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), name='telemetry-ipc-conn',
+                             daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            for packet in read_frames(conn):
+                received_at = time.perf_counter()
+                self.received += 1
+                try:
+                    self.handler(packet, received_at)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[IPC] ⚠️  Handler failed: {e}")
+        except (FrameError, ValueError, OSError) as e:
+            self.errors += 1
+            print(f"[IPC] ⚠️  Dropping connection: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'received': self.received,
+            'errors': self.errors
+        }
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+SAMPLE_PACKET = {
+    'gps': {'latitude': 8.70123, 'longitude': 77.10456, 'satellites': 11, 'hdop': 90, 'speed': 4.2},
+    'mpu': {'ax': 0.01, 'ay': -0.02, 'az': 0.99, 'vibration_rms': 0.08, 'tilt_angle': 2.5},
+    'motor': {'rpm': 1450, 'hall_detected': True},
+    'environment': {'temperature': 28.4, 'humidity': 62, 'light_percent': 70},
+    'system': {'source': 'ESP32', 'risk_score': 12, 'risk_level': 'SAFE', 'scan_triggered': False}
+}
+
+
+def _summary(latencies_ms, cpu_s, count):
+    latencies_ms.sort()
+    return {
+        'samples': count,
+        'p50_us': round(percentile(latencies_ms, 50) * 1000, 1),
+        'p99_us': round(percentile(latencies_ms, 99) * 1000, 1),
+        'cpu_us_per_sample': round(cpu_s / count * 1e6, 1)
+    }
+
+
+def bench_http(count):
+    """requests.post to a Flask /data route that only decodes the body (current path)."""
+    import requests
+    from flask import Flask, request as flask_request, jsonify
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args):
+            pass
+
+    app = Flask('ipc-bench')
+
+    @app.route('/data', methods=['POST'])
+    def data():
+        flask_request.json
+        return jsonify({'status': 'success'})
+
+    httpd = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}/data"
+
+    latencies = []
+    cpu = time.process_time()
+    for _ in range(count):
+        start = time.perf_counter()
+        requests.post(url, json=SAMPLE_PACKET, timeout=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+    cpu = time.process_time() - cpu
+    httpd.shutdown()
+    return _summary(latencies, cpu, count)
+
+
+def bench_ipc(count):
+    """Publish → server handler delivery over the Unix socket."""
+    path = os.path.join(tempfile.gettempdir(), f'aeroguard-bench-{os.getpid()}.sock')
+    latencies = []
+    done = threading.Event()
+
+    def handler(packet, received_at):
+        latencies.append((received_at - packet['sent_at']) * 1000)
+        if len(latencies) == count:
+            done.set()
+
+    server = TelemetrySocketServer(handler, path).start()
+    publisher = TelemetryPublisher(path, max_pending=count)
+
+    cpu = time.process_time()
+    for _ in range(count):
+        publisher.publish(dict(SAMPLE_PACKET, sent_at=time.perf_counter()))
+        # Pace like a serial stream so we measure per-sample latency, not batching
+        time.sleep(0.0002)
+    done.wait(10)
+    cpu = time.process_time() - cpu
+
+    publisher.close()
+    server.stop()
+    result = _summary(latencies, cpu, count)
+    result['dropped'] = publisher.dropped
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroGuard telemetry IPC transport")
+    parser.add_argument('--bench', type=int, metavar='N', default=1000,
+                        help="Compare IPC with HTTP loopback over N samples")
+    args = parser.parse_args()
+
+    if not IPC_SUPPORTED:
+        print("❌ AF_UNIX sockets are not available on this platform; main.py will use HTTP")
+        return 1
+
+    report = {'ipc': bench_ipc(args.bench), 'http': bench_http(args.bench)}
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Fixed-layout telemetry record and single-pass packet parser.
+
+parse_packet() decodes a packet dict (as sent by the ESP32 / main.py)
+once into a TelemetryRecord: a __slots__ object with one attribute per
+known field, each validated (numbers must be finite, flags are bools)
+and normalized (HDOP in real units, GPS fix and quality label computed
+once). server.py's geofence, risk engine and history calls read the
+record attributes directly instead of re-walking nested dicts.
+
+Given a base record, fields the packet does not carry (or carries as
+null/invalid values) keep the base value, so the server folds partial
+packets into its running state in the same pass (in place, without
+allocating a record per packet).
+"""
+import math
+
+# HDOP for "no HDOP reported" (matches risk_engine)
+NO_HDOP = 99.99
+
+# Upper bounds (exclusive) of the GPS quality labels, in real HDOP units
+GPS_QUALITY = ((1.0, "IDEAL"), (2.0, "EXCELLENT"), (5.0, "GOOD"),
+               (10.0, "MODERATE"), (20.0, "FAIR"))
+
+# category -> field names, in sensor_data order (attribute name == packet key)
+LAYOUT = {
+    'mpu': ('ax', 'ay', 'az', 'vibration_rms', 'tilt_angle'),
+    'environment': ('temperature', 'humidity', 'light_percent'),
+    'motor': ('rpm', 'hall_detected'),
+    'gps': ('latitude', 'longitude', 'speed', 'satellites', 'hdop', 'raw_signal'),
+    'system': ('source', 'scan_triggered')
+}
+
+FIELDS = tuple(name for fields in LAYOUT.values() for name in fields)
+
+# Categories mirrored into server.py's sensor_data (system is server-owned)
+SENSOR_CATEGORIES = ('mpu', 'environment', 'motor', 'gps')
+
+# Categories the record carries across packets. Environment readings are
+# per packet (None = sensor not connected), so server.py stores them into
+# sensor_data as they arrive.
+CARRIED_CATEGORIES = ('mpu', 'motor', 'gps')
+
+# HDOP divisor for ESP32 packets (TinyGPS++ sends HDOP * 100)
+ESP32_HDOP_SCALE = 100.0
+
+
+def _number(value, fallback):
+    """value if it is a finite int/float (bools excluded), else fallback."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return value
+    return fallback
+
+
+def _flag(value, fallback):
+    if isinstance(value, bool):
+        return value
+    if value == 0 or value == 1:
+        return bool(value)
+    return fallback
+
+
+def normalize_hdop(raw, scale=None):
+    """
+    Real HDOP from a reported value. scale: divisor when the sender's unit
+    is known (ESP32_HDOP_SCALE for ESP32 packets). Without it the unit is
+    guessed: values above 50 are taken as HDOP * 100.
+    """
+    if scale is not None:
+        return raw / scale
+    return raw / 100.0 if raw > 50 else raw
+
+
+def gps_quality(hdop):
+    for limit, label in GPS_QUALITY:
+        if hdop < limit:
+            return label
+    return "POOR"
+
+
+class TelemetryRecord:
+    """
+    Decoded sensor fields plus per-packet facts:
+    categories (blocks the packet carried), has_fix and gps_quality
+    (from the packet's own GPS block). Environment readings and
+    scan_triggered are never inherited from the base (None = sensor not
+    connected / no scan request).
+    """
+    __slots__ = ('drone_id', 'categories', 'has_fix', 'gps_quality') + FIELDS
+
+    def __init__(self, drone_id=None):
+        self.drone_id = drone_id
+        self.categories = ()
+        self.has_fix = False
+        self.gps_quality = None
+        for name in FIELDS:
+            setattr(self, name, None)
+
+    def apply_to(self, state, categories=SENSOR_CATEGORIES):
+        """Write the record's readings into a nested sensor_data-shaped dict."""
+        for category in categories:
+            target = state[category]
+            for name in LAYOUT[category]:
+                value = getattr(self, name)
+                if value is not None:
+                    target[name] = value
+        if 'gps' in categories and self.gps_quality is not None:
+            state['gps']['gps_quality'] = self.gps_quality
+
+    def __repr__(self):
+        carried = ', '.join(f"{name}={getattr(self, name)!r}" for name in FIELDS
+                            if getattr(self, name) is not None)
+        return f"TelemetryRecord({carried})"
+
+
+_EMPTY = TelemetryRecord()
+
+
+def parse_packet(packet, base=None, into=None, hdop_scale=None):
+    """
+    Decode a packet dict into a TelemetryRecord in one pass.
+    base: previous state whose values fill fields the packet lacks.
+    into: record to overwrite instead of allocating one (may be base,
+    which updates a running state in place).
+    hdop_scale: HDOP divisor when the sender is known (see normalize_hdop).
+    Unknown keys are ignored; non-dict categories count as absent.
+    """
+    b = base or _EMPTY
+    # Every slot is assigned below, so skip __init__'s defaults
+    r = into if into is not None else TelemetryRecord.__new__(TelemetryRecord)
+    drone_id = packet.get('drone_id')
+    r.drone_id = drone_id if isinstance(drone_id, str) and drone_id else None
+    categories = []
+
+    mpu = packet.get('mpu')
+    if isinstance(mpu, dict):
+        categories.append('mpu')
+        r.ax = _number(mpu.get('ax'), b.ax)
+        r.ay = _number(mpu.get('ay'), b.ay)
+        r.az = _number(mpu.get('az'), b.az)
+        r.vibration_rms = _number(mpu.get('vibration_rms'), b.vibration_rms)
+        r.tilt_angle = _number(mpu.get('tilt_angle'), b.tilt_angle)
+    else:
+        r.ax, r.ay, r.az, r.vibration_rms, r.tilt_angle = b.ax, b.ay, b.az, b.vibration_rms, b.tilt_angle
+
+    env = packet.get('environment')
+    if isinstance(env, dict):
+        categories.append('environment')
+        r.temperature = _number(env.get('temperature'), None)
+        r.humidity = _number(env.get('humidity'), None)
+        r.light_percent = _number(env.get('light_percent'), None)
+    else:
+        r.temperature = r.humidity = r.light_percent = None
+
+    motor = packet.get('motor')
+    if isinstance(motor, dict):
+        categories.append('motor')
+        r.rpm = _number(motor.get('rpm'), b.rpm)
+        r.hall_detected = _flag(motor.get('hall_detected'), b.hall_detected)
+    else:
+        r.rpm, r.hall_detected = b.rpm, b.hall_detected
+
+    gps = packet.get('gps')
+    if isinstance(gps, dict):
+        categories.append('gps')
+        lat = _number(gps.get('latitude'), None)
+        lng = _number(gps.get('longitude'), None)
+        satellites = _number(gps.get('satellites'), None)
+        hdop = _number(gps.get('hdop'), None)
+        r.latitude = lat if lat is not None else b.latitude
+        r.longitude = lng if lng is not None else b.longitude
+        r.speed = _number(gps.get('speed'), b.speed)
+        r.satellites = int(satellites) if satellites is not None and satellites >= 0 else b.satellites
+        r.hdop = normalize_hdop(hdop, hdop_scale) if hdop is not None else NO_HDOP
+        r.raw_signal = _number(gps.get('raw_signal'), b.raw_signal)
+        r.has_fix = bool(lat and lng)
+        r.gps_quality = gps_quality(r.hdop) if r.has_fix else "NO_FIX"
+    else:
+        r.latitude, r.longitude, r.speed = b.latitude, b.longitude, b.speed
+        r.satellites, r.hdop, r.raw_signal = b.satellites, b.hdop, b.raw_signal
+        r.has_fix = False
+        r.gps_quality = b.gps_quality
+
+    system = packet.get('system')
+    if isinstance(system, dict):
+        categories.append('system')
+        source = system.get('source')
+        r.source = source if isinstance(source, str) and source else b.source
+        r.scan_triggered = _flag(system.get('scan_triggered'), None)
+    else:
+        r.source = b.source
+        r.scan_triggered = None
+
+    r.categories = tuple(categories)
+    return r
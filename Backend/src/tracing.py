@@ -0,0 +1,149 @@
+"""
+End-to-end per-packet latency tracing.
+
+A sampled packet carries {"trace": {"id": .., "stages": {stage: unix_s}}}.
+main.py stamps serial receipt and forward; server.py stamps receipt,
+weather, geofence, risk and publish; the dashboard reports when it
+rendered the packet's verdict. The Tracer turns consecutive stamps into
+per-stage latency distributions plus end-to-end (first stamp to render).
+
+Stamps are wall-clock seconds so they compare across processes on the
+same box. Unsampled packets carry no trace and cost one dict lookup.
+"""
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from latency import LatencyRecorder
+
+# Stage order along the pipeline
+STAGES = ('serial_rx', 'forwarded', 'received', 'weather_done', 'geofence_done',
+          'risk_done', 'published', 'rendered')
+
+
+def _valid_stages(stages):
+    """True if stages maps only known STAGES to finite timestamps."""
+    return isinstance(stages, dict) and all(
+        stage in STAGES and isinstance(t, (int, float)) and not isinstance(t, bool) and math.isfinite(t)
+        for stage, t in stages.items())
+
+
+def new_trace(stage, now=None):
+    return {'id': uuid.uuid4().hex[:16], 'stages': {stage: now if now is not None else time.time()}}
+
+
+def mark(trace, stage):
+    """Stamp a stage on a trace (no-op for untraced packets)."""
+    if trace is not None:
+        trace['stages'][stage] = time.time()
+
+
+def sample(rate):
+    """Start a trace at serial receipt with probability rate, else None."""
+    if rate and random.random() < rate:
+        return new_trace('serial_rx')
+    return None
+
+
+class Tracer:
+    """
+    Aggregates stage latencies for traced packets.
+    Traces wait (bounded) for the dashboard's render report after publish.
+    """
+
+    def __init__(self, sample_rate=0.0, history=1000, max_pending=256):
+        self.sample_rate = sample_rate
+        self.history = history
+        self.max_pending = max_pending
+        self._recorders = {}
+        self._pending = OrderedDict()
+        self._completed = OrderedDict()
+        self._lock = threading.Lock()
+        self.traced = 0
+        self.rendered = 0
+
+    def begin(self, incoming):
+        """
+        Trace for an incoming packet: the one it carries, a new one if
+        the server samples it, else None. Stamps 'received'.
+        A carried trace with unknown stages or non-numeric stamps is dropped.
+        """
+        trace = incoming.get('trace')
+        if trace is None:
+            if not self.sample_rate or random.random() >= self.sample_rate:
+                return None
+            trace = new_trace('received')
+        elif not isinstance(trace, dict) or 'id' not in trace or not _valid_stages(trace.get('stages')):
+            return None
+        else:
+            trace = {'id': str(trace['id'])[:64],
+                     'stages': {stage: float(t) for stage, t in trace['stages'].items()}}
+            mark(trace, 'received')
+        return trace
+
+    def _record(self, name, seconds):
+        recorder = self._recorders.get(name)
+        if recorder is None:
+            with self._lock:
+                recorder = self._recorders.setdefault(name, LatencyRecorder(self.history))
+        recorder.record(seconds * 1000)
+
+    def _record_stages(self, stages):
+        ordered = sorted(stages.items(), key=lambda item: item[1])
+        for (prev, t0), (stage, t1) in zip(ordered, ordered[1:]):
+            self._record(f"{prev}→{stage}", t1 - t0)
+
+    def published(self, trace):
+        """Server stages done: record them and wait for the render report."""
+        if trace is None:
+            return
+        mark(trace, 'published')
+        stages = trace['stages']
+        self._record_stages(stages)
+        if 'received' in stages:
+            self._record('server_total', stages['published'] - stages['received'])
+        with self._lock:
+            self.traced += 1
+            self._pending[trace['id']] = trace
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def rendered_at(self, trace_id, rendered_at):
+        """Dashboard render report; returns the completed trace or None if unknown."""
+        with self._lock:
+            trace = self._pending.pop(trace_id, None)
+            if trace is None:
+                return None
+            self.rendered += 1
+            trace['stages']['rendered'] = rendered_at
+            self._completed[trace_id] = trace
+            while len(self._completed) > self.max_pending:
+                self._completed.popitem(last=False)
+
+        stages = trace['stages']
+        self._record('published→rendered', rendered_at - stages['published'])
+        self._record('end_to_end', rendered_at - min(stages.values()))
+        return trace
+
+    def get(self, trace_id):
+        with self._lock:
+            return self._pending.get(trace_id) or self._completed.get(trace_id)
+
+    def stats(self):
+        """Per-stage and end-to-end latency summaries (ms), in pipeline order."""
+        with self._lock:
+            recorders = dict(self._recorders)
+            pending = len(self._pending)
+        order = {f"{a}→{b}": i for i, (a, b) in enumerate(
+            (a, b) for i, a in enumerate(STAGES) for b in STAGES[i + 1:])}
+        return {
+            'sample_rate': self.sample_rate,
+            'traced': self.traced,
+            'rendered': self.rendered,
+            'awaiting_render': pending,
+            'stages': [{'stage': name, **recorders[name].summary()}
+                       for name in sorted(recorders, key=lambda n: order.get(n, len(order)))]
+        }
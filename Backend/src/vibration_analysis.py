@@ -0,0 +1,211 @@
+"""
+High-rate accelerometer burst analysis.
+
+Raw MPU6050 ax/ay/az bursts (e.g. captured during a diagnostic scan) are
+decoded, queued and analyzed on a worker thread so /data is never blocked.
+Each burst gets a Hann-windowed NumPy FFT per axis, from which we report
+band energies, the dominant frequency and its amplitude. Prop imbalance
+and bearing faults show up as spectral peaks that vibration_rms hides.
+"""
+import base64
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Frequency bands (Hz) reported as energies
+DEFAULT_BANDS = ((0, 20), (20, 50), (50, 100), (100, 200), (200, 500))
+
+# MPU6050 at ±2g: 16384 LSB per g
+MPU6050_LSB_PER_G = 16384.0
+
+MIN_SAMPLES = 32
+MAX_SAMPLES = 16384
+DTYPES = {'int16': np.int16, 'float32': np.float32}
+
+
+class BurstError(ValueError):
+    """Raised for malformed burst payloads."""
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _decode_axis(value, dtype):
+    if isinstance(value, str):
+        try:
+            raw = base64.b64decode(value, validate=True)
+        except ValueError:
+            raise BurstError("Axis data is not valid base64")
+        np_dtype = np.dtype(dtype).newbyteorder('<')
+        if len(raw) % np_dtype.itemsize:
+            raise BurstError(f"Axis data is not a whole number of {np_dtype.name} samples")
+        return np.frombuffer(raw, dtype=np_dtype).astype(np.float32)
+    if not isinstance(value, list) or not all(_is_number(v) for v in value):
+        raise BurstError("Axis data must be a base64 string or a flat list of numbers")
+    return np.asarray(value, dtype=np.float32)
+
+
+def _check(samples, rate_hz):
+    if not rate_hz > 0 or not np.isfinite(rate_hz):
+        raise BurstError("sample_rate_hz must be positive")
+    if not MIN_SAMPLES <= len(samples) <= MAX_SAMPLES:
+        raise BurstError(f"Burst must have {MIN_SAMPLES}-{MAX_SAMPLES} samples, got {len(samples)}")
+    if not np.isfinite(samples).all():
+        raise BurstError("Burst contains non-finite samples")
+    return samples
+
+
+def parse_burst_json(body):
+    """
+    Decode a JSON burst:
+        {"drone_id": .., "sample_rate_hz": 500, "dtype": "int16"|"float32",
+         "scale": g per unit (default 1/16384 for int16, 1 for float32),
+         "ax": [...] | "<base64>", "ay": ..., "az": ...}
+    Returns: (drone_id, rate_hz, samples (N, 3) float32 in g)
+    Raises BurstError for anything malformed.
+    """
+    if not isinstance(body, dict):
+        raise BurstError("Burst must be a JSON object")
+    dtype = body.get('dtype', 'float32')
+    if not isinstance(dtype, str) or dtype not in DTYPES:
+        raise BurstError(f"Unsupported dtype: {dtype}")
+    drone_id = body.get('drone_id')
+    if drone_id is not None and not isinstance(drone_id, str):
+        raise BurstError("drone_id must be a string")
+    try:
+        axes = [_decode_axis(body[axis], DTYPES[dtype]) for axis in ('ax', 'ay', 'az')]
+    except KeyError as e:
+        raise BurstError(f"Missing axis {e}")
+    if len({len(a) for a in axes}) != 1:
+        raise BurstError("ax/ay/az must have the same length")
+
+    scale = body.get('scale', 1 / MPU6050_LSB_PER_G if dtype == 'int16' else 1.0)
+    if not _is_number(scale):
+        raise BurstError("scale must be a number")
+    rate_hz = body.get('sample_rate_hz', 0)
+    if not _is_number(rate_hz):
+        raise BurstError("sample_rate_hz must be a number")
+    samples = np.stack(axes, axis=1) * np.float32(scale)
+    return drone_id, float(rate_hz), _check(samples, float(rate_hz))
+
+
+def parse_burst_binary(data, rate_hz, dtype='int16', scale=None):
+    """
+    Decode a binary burst of interleaved little-endian x,y,z samples.
+    Returns: (N, 3) float32 samples in g
+    """
+    if dtype not in DTYPES:
+        raise BurstError(f"Unsupported dtype: {dtype}")
+    np_dtype = np.dtype(DTYPES[dtype]).newbyteorder('<')
+    if len(data) % (3 * np_dtype.itemsize):
+        raise BurstError("Binary burst length is not a whole number of x,y,z samples")
+    if scale is None:
+        scale = 1 / MPU6050_LSB_PER_G if dtype == 'int16' else 1.0
+    samples = np.frombuffer(data, dtype=np_dtype).reshape(-1, 3).astype(np.float32) * np.float32(scale)
+    return _check(samples, rate_hz)
+
+
+def analyze_burst(samples, rate_hz, bands=DEFAULT_BANDS):
+    """
+    Spectral features of one burst.
+
+    Returns dict with:
+        - dominant_hz / dominant_amplitude_g: largest non-DC peak of the
+          combined (vector) spectrum
+        - axis_peaks: per-axis dominant frequency
+        - band_energy: g^2 per band (sums to the AC mean power)
+        - rms_g: per-axis RMS after mean removal
+    """
+    n = len(samples)
+    x = samples - samples.mean(axis=0)
+    window = np.hanning(n).astype(np.float32)
+
+    spectrum = np.fft.rfft(x * window[:, None], axis=0)
+    freqs = np.fft.rfftfreq(n, 1.0 / rate_hz)
+
+    # Single-sided amplitude (g), corrected for the window's coherent gain
+    amplitude = 2 * np.abs(spectrum) / window.sum()
+    combined = np.sqrt((amplitude ** 2).sum(axis=1))
+    combined[0] = 0.0
+
+    # Power per bin, scaled so the bins sum to the time-domain mean power
+    power = (np.abs(spectrum) ** 2).sum(axis=1)
+    power[0] = 0.0
+    total_power = float((x ** 2).sum(axis=1).mean())
+    if power.sum() > 0:
+        power *= total_power / power.sum()
+
+    peak = int(np.argmax(combined))
+    axis_peaks = np.argmax(amplitude[1:], axis=0) + 1
+
+    return {
+        'samples': n,
+        'sample_rate_hz': rate_hz,
+        'resolution_hz': round(rate_hz / n, 3),
+        'dominant_hz': round(float(freqs[peak]), 2),
+        'dominant_amplitude_g': round(float(combined[peak]), 4),
+        'axis_peaks_hz': {axis: round(float(freqs[i]), 2) for axis, i in zip(('ax', 'ay', 'az'), axis_peaks)},
+        'band_energy': {
+            f"{lo}-{hi}Hz": round(float(power[(freqs >= lo) & (freqs < hi)].sum()), 6)
+            for lo, hi in bands if lo < rate_hz / 2
+        },
+        'rms_g': {axis: round(float(v), 4) for axis, v in zip(('ax', 'ay', 'az'), np.sqrt((x ** 2).mean(axis=0)))}
+    }
+
+
+class VibrationAnalyzer:
+    """
+    Bounded burst queue drained by one worker thread.
+    The latest features per drone are kept for the risk engine and dashboard.
+    """
+
+    def __init__(self, bands=DEFAULT_BANDS, max_pending=32):
+        self.bands = bands
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.analyzed = 0
+        self.rejected = 0
+        self._thread = threading.Thread(target=self._run, name='vibration-fft', daemon=True)
+        self._thread.start()
+
+    def submit(self, drone_id, rate_hz, samples):
+        """Queue a burst; returns False (and drops it) if the worker is saturated."""
+        try:
+            self._queue.put_nowait((drone_id, rate_hz, samples, time.perf_counter()))
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+
+    def _run(self):
+        while True:
+            drone_id, rate_hz, samples, queued_at = self._queue.get()
+            try:
+                features = analyze_burst(samples, rate_hz, self.bands)
+            except Exception as e:
+                print(f"[Vibration] ⚠️  Analysis failed for {drone_id}: {e}")
+                continue
+            features['analyzed_at'] = time.time()
+            features['latency_ms'] = round((time.perf_counter() - queued_at) * 1000, 3)
+            with self._lock:
+                self._latest[drone_id] = features
+                self.analyzed += 1
+
+    def latest(self, drone_id, max_age_s=None):
+        """Most recent features for a drone, or None if absent/older than max_age_s."""
+        with self._lock:
+            features = self._latest.get(drone_id)
+        if features and max_age_s is not None and time.time() - features['analyzed_at'] > max_age_s:
+            return None
+        return features
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize(),
+            'analyzed': self.analyzed,
+            'rejected': self.rejected
+        }
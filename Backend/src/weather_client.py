@@ -1,19 +1,508 @@
 import random
 import time
 import math
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config_service import PLACEHOLDER_API_KEYS, WeatherSettings
+from latency import LatencyRecorder
+
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# Fleet prefetch: drones seen within FLEET_ACTIVE_S count as active, and
+# their bounding box is re-warmed at most every FLEET_PREFETCH_INTERVAL_S
+FLEET_ACTIVE_S = 60
+FLEET_PREFETCH_INTERVAL_S = 5
+
+# Manual test scenarios for set_weather_condition
+WEATHER_SCENARIOS = {
+    'Clear': {'wind_speed': 3.5, 'visibility': 10000, 'weather_main': 'Clear'},
+    'Rain': {'wind_speed': 8.0, 'visibility': 7000, 'weather_main': 'Rain'},
+    'Thunderstorm': {'wind_speed': 15.0, 'visibility': 3000, 'weather_main': 'Thunderstorm'},
+    'Fog': {'wind_speed': 2.0, 'visibility': 1000, 'weather_main': 'Fog'},
+    'Snow': {'wind_speed': 6.0, 'visibility': 4000, 'weather_main': 'Snow'},
+    'High Wind': {'wind_speed': 12.0, 'visibility': 10000, 'weather_main': 'Clear'}
+}
+
+# ============================================
+# CIRCUIT BREAKER
+# ============================================
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider while its breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for a remote weather provider.
+
+    closed:    calls pass; the outcome of the last `window` calls is tracked
+               and the breaker trips once at least `min_calls` were seen
+               and the failure rate reaches `failure_rate`.
+    open:      calls are rejected until the retry time, open_s doubled per
+               consecutive failed probe (capped at max_open_s), with
+               ±jitter so several processes do not probe in lockstep.
+    half_open: exactly one probe call passes; success closes the breaker,
+               failure re-opens it with the longer backoff.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name='provider', window=20, min_calls=5, failure_rate=0.5,
+                 open_s=30, max_open_s=300, jitter=0.2, clock=time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_s = open_s
+        self.max_open_s = max_open_s
+        self.jitter = jitter
+        self.clock = clock
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)   # True = failure
+        self._retry_at = 0.0
+        self._reopens = 0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.failed_probes = 0
+        self.rejected = 0
+        self.last_trip = None
+
+    def configure(self, window=20, min_calls=5, failure_rate=0.5, open_s=30, max_open_s=300):
+        """Apply new settings in place, keeping state, recent outcomes and trip stats."""
+        with self._lock:
+            self.min_calls = min_calls
+            self.failure_rate = failure_rate
+            self.open_s = open_s
+            self.max_open_s = max_open_s
+            if self._outcomes.maxlen != window:
+                self._outcomes = deque(self._outcomes, maxlen=window)
+
+    def short_circuit(self):
+        """
+        Lock-free pre-check for callers: True (counted as rejected) while
+        open and not yet due for a probe.
+        """
+        if self.state == self.OPEN and self.clock() < self._retry_at:
+            self.rejected += 1
+            return True
+        return False
+
+    def allow(self):
+        """Whether a call may go ahead now; claims the probe slot when half-open."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() >= self._retry_at:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._reopens = 0
+                self._probing = False
+                self._outcomes.clear()
+                print(f"[Weather] ✅ {self.name} circuit closed (probe succeeded)")
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.failed_probes += 1
+                self._reopens += 1
+                self._open()
+                return
+            self._outcomes.append(True)
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls and \
+                    self._failure_rate() >= self.failure_rate:
+                self.trips += 1
+                self.last_trip = time.time()
+                self._open()
+                print(f"[Weather] ⚠️  {self.name} circuit OPEN after {self.trips} trip(s), "
+                      f"retry in {self._retry_at - self.clock():.1f}s")
+
+    def _failure_rate(self):
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def _open(self):
+        backoff = min(self.open_s * 2 ** self._reopens, self.max_open_s)
+        self._retry_at = self.clock() + backoff * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.state = self.OPEN
+        self._probing = False
+        self._outcomes.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failure_rate': round(self._failure_rate(), 3),
+                'trips': self.trips,
+                'failed_probes': self.failed_probes,
+                'rejected': self.rejected,
+                'retry_in_s': round(max(self._retry_at - self.clock(), 0), 1)
+                              if self.state == self.OPEN else None,
+                'last_trip': self.last_trip
+            }
+
+# ============================================
+# PROVIDERS
+# ============================================
+
+class WeatherProvider:
+    """
+    Base class for weather sources.
+    Subclasses implement _fetch(lat, lon); fetch() records per-call latency.
+    """
+    name = "base"
+    cacheable = True   # worth caching per area (remote, slow or rate-limited)
+    breaker = None     # CircuitBreaker, set by OpenWeatherClient for cacheable providers
+
+    def __init__(self, history=1000):
+        self.latency = LatencyRecorder(history)
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def fetch(self, lat, lon):
+        """
+        Fetch current weather at (lat, lon).
+        Returns dict with: temp, humidity, wind_speed, visibility, weather_main
+        Raises on provider failure, or CircuitOpenError while the breaker is open.
+        """
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        started = time.perf_counter()
+        try:
+            weather = self._fetch(lat, lon)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            self.latency.record((time.perf_counter() - started) * 1000)
+        if breaker is not None:
+            breaker.record_success()
+        return weather
+
+    def _fetch(self, lat, lon):
+        raise NotImplementedError
+
+    @property
+    def calls(self):
+        return self.latency.count
+
+    def stats(self):
+        """Per-call latency summary over the recent history."""
+        summary = self.latency.summary()
+        summary.pop('count')
+        stats = {'provider': self.name, 'calls': self.calls, 'errors': self.errors, **summary}
+        if self.breaker is not None:
+            stats['breaker'] = self.breaker.stats()
+        return stats
+
+
+class SimulatedWeatherProvider(WeatherProvider):
+    """Local simulation around a set of base conditions."""
+    name = "simulation"
+
+    def __init__(self, base_conditions=None, **kwargs):
+        super().__init__(**kwargs)
+        self.base_conditions = base_conditions if base_conditions is not None else {
+            'temp': 28.0,
+            'humidity': 65,
+            'wind_speed': 3.5,
+            'visibility': 10000,
+            'weather_main': 'Clear'
+        }
+
+    def _fetch(self, lat, lon):
+        """Generate realistic simulated weather."""
+        # Time-based temperature variation
+        hour = time.localtime().tm_hour
+        temp_variation = 5 * math.sin((hour - 6) * math.pi / 12)
+
+        # Random noise for realism
+        noise = random.uniform(-0.5, 0.5)
+
+        return {
+            'temp': round(self.base_conditions['temp'] + temp_variation + noise, 1),
+            'humidity': max(30, min(95, self.base_conditions['humidity'] + random.randint(-3, 3))),
+            'wind_speed': round(max(0, self.base_conditions['wind_speed'] + random.uniform(-0.5, 0.5)), 1),
+            'visibility': self.base_conditions['visibility'],
+            'weather_main': self.base_conditions['weather_main']
+        }
+
+
+class OpenWeatherProvider(WeatherProvider):
+    """
+    OpenWeather current-weather API over a pooled HTTP session.
+    base_url can point at a LocalWeatherServer for offline runs.
+    """
+    name = "openweather"
+
+    def __init__(self, api_key, base_url=OPENWEATHER_URL, timeout=5, pool_size=8, **kwargs):
+        super().__init__(**kwargs)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _fetch(self, lat, lon):
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.api_key,
+            'units': 'metric'
+        }
+
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"API Error {response.status_code}")
+
+        data = response.json()
+        return {
+            'temp': data['main'].get('temp'),
+            'humidity': data['main'].get('humidity'),
+            'wind_speed': data['wind'].get('speed'),
+            'visibility': data.get('visibility', 10000),
+            'weather_main': data['weather'][0]['main']
+        }
+
+
+class LocalWeatherServer:
+    """
+    Stand-in for the OpenWeather API on localhost.
+    Serves OpenWeather-shaped JSON from a simulated provider, with optional
+    artificial latency, so OpenWeatherProvider can be exercised offline.
+    """
+
+    def __init__(self, port=0, latency_s=0.0, base_conditions=None):
+        self.simulator = SimulatedWeatherProvider(base_conditions)
+        self.latency_s = latency_s
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                server.requests += 1
+                if server.latency_s:
+                    time.sleep(server.latency_s)
+                try:
+                    weather = server.simulator.fetch(float(query['lat'][0]), float(query['lon'][0]))
+                except (KeyError, ValueError):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                body = json.dumps({
+                    'main': {'temp': weather['temp'], 'humidity': weather['humidity']},
+                    'wind': {'speed': weather['wind_speed']},
+                    'visibility': weather['visibility'],
+                    'weather': [{'main': weather['weather_main']}]
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/data/2.5/weather"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ============================================
+# AREA PREFETCHER
+# ============================================
+
+class WeatherPrefetcher:
+    """
+    Caches weather per grid cell and fetches cells concurrently.
+
+    Drones in the same cell share one provider call, so a fleet in one area
+    costs a handful of requests per TTL instead of one per packet. Cells
+    older than the TTL are dropped on every prefetch, and the cache never
+    holds more than max_cells (oldest first), so a moving fleet does not
+    grow it without bound.
+    """
+
+    def __init__(self, provider, cell_deg=0.1, ttl_s=600, max_workers=4, max_cells=256):
+        self.provider = provider
+        self.cell_deg = cell_deg
+        self.ttl_s = ttl_s
+        self.max_cells = max_cells
+        self._cache = {}      # cell -> (fetched_at, weather)
+        self._inflight = {}   # cell -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='weather')
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def cell_of(self, lat, lon):
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def _cell_center(self, cell):
+        return ((cell[0] + 0.5) * self.cell_deg, (cell[1] + 0.5) * self.cell_deg)
+
+    def _fetch_cell(self, cell):
+        try:
+            weather = self.provider.fetch(*self._cell_center(cell))
+            with self._lock:
+                now = time.time()
+                self._cache[cell] = (now, weather)
+                if len(self._cache) > self.max_cells:
+                    self._evict(now)
+            return weather
+        finally:
+            with self._lock:
+                self._inflight.pop(cell, None)
+
+    def _evict(self, now):
+        """Drop stale cells, then the oldest beyond max_cells. Caller holds self._lock."""
+        cutoff = now - self.ttl_s
+        drop = [cell for cell, (fetched_at, _) in self._cache.items() if fetched_at < cutoff]
+        excess = len(self._cache) - len(drop) - self.max_cells
+        if excess > 0:
+            fresh = sorted((fetched_at, cell) for cell, (fetched_at, _) in self._cache.items()
+                           if fetched_at >= cutoff)
+            drop.extend(cell for _, cell in fresh[:excess])
+        for cell in drop:
+            del self._cache[cell]
+        self.evicted += len(drop)
+
+    def _submit(self, cell):
+        """Start fetching a cell unless it is fresh or already in flight."""
+        with self._lock:
+            cached = self._cache.get(cell)
+            if cached and time.time() - cached[0] < self.ttl_s:
+                return None
+            future = self._inflight.get(cell)
+            if future is None:
+                future = self._pool.submit(self._fetch_cell, cell)
+                self._inflight[cell] = future
+            return future
+
+    def prefetch_bbox(self, min_lat, min_lon, max_lat, max_lon, wait=False, timeout=None):
+        """
+        Fetch every stale cell covering the bounding box.
+        Returns number of cells submitted.
+        """
+        lo = self.cell_of(min_lat, min_lon)
+        hi = self.cell_of(max_lat, max_lon)
+        cells = [(i, j) for i in range(lo[0], hi[0] + 1) for j in range(lo[1], hi[1] + 1)]
+        if len(cells) > self.max_cells:
+            print(f"[Weather] Prefetch area too large ({len(cells)} cells), limiting to {self.max_cells}")
+            cells = cells[:self.max_cells]
+
+        with self._lock:
+            self._evict(time.time())
+        futures = [f for f in (self._submit(cell) for cell in cells) if f is not None]
+        if wait:
+            for future in futures:
+                try:
+                    future.result(timeout=timeout)
+                except Exception:
+                    pass
+        return len(futures)
+
+    def prefetch_points(self, points, wait=False, timeout=None):
+        """Prefetch the bounding box of (lat, lon) points, e.g. the active fleet."""
+        points = [(lat, lon) for lat, lon in points if lat is not None and lon is not None]
+        if not points:
+            return 0
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        return self.prefetch_bbox(min(lats), min(lons), max(lats), max(lons), wait, timeout)
+
+    def get(self, lat, lon, timeout=None):
+        """
+        Cached weather for the cell containing (lat, lon), fetching on a miss.
+        Raises if the provider call fails.
+        """
+        cell = self.cell_of(lat, lon)
+        with self._lock:
+            cached = self._cache.get(cell)
+            if cached and time.time() - cached[0] < self.ttl_s:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        future = self._submit(cell)
+        if future is None:
+            return self._cache[cell][1]
+        return future.result(timeout=timeout)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        """Stop the worker pool once in-flight fetches finish."""
+        self._pool.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cells_cached': len(self._cache),
+                'evicted': self.evicted,
+                'in_flight': len(self._inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'provider': self.provider.stats()
+            }
+
+# ============================================
+# CLIENT
+# ============================================
 
 class OpenWeatherClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, provider=None, prefetch=True, settings=None):
         """
         Weather client that works with or without API key.
         Falls back to local simulation if no API key provided.
+        A custom provider (e.g. OpenWeatherProvider against a
+        LocalWeatherServer) can be passed instead of a key.
+        settings (WeatherSettings) supplies the key and cache tuning.
         """
-        self.api_key = api_key
-        self.use_api = (api_key and 
-                       api_key != "YOUR_KEY_HERE" and 
-                       api_key != "" and 
-                       len(api_key) > 10)
-        
+        self.settings = settings or WeatherSettings(api_key=api_key or '')
+        self.custom_provider = provider is not None
+        self.prefetch = prefetch
+        self.deadline_misses = 0
+        self.fleet = {}  # drone_id -> (lat, lon, seen_at)
+        self._fleet_prefetched_at = 0.0
+        self._fleet_lock = threading.Lock()
+
         # Simulated weather base conditions
         self.base_conditions = {
             'temp': 28.0,
@@ -22,84 +511,156 @@ class OpenWeatherClient:
             'visibility': 10000,
             'weather_main': 'Clear'
         }
-        
-        mode = "API Mode" if self.use_api else "Local Simulation"
+        self.simulator = SimulatedWeatherProvider(self.base_conditions)
+
+        self._configure(provider)
+        mode = f"Provider: {self.provider.name}" if self.provider else "Local Simulation"
         print(f"[Weather Client] Initialized in {mode}")
 
-    def get_weather(self, lat, lon):
+    def _configure(self, provider=None):
+        """Build provider and prefetcher from self.settings."""
+        s = self.settings
+        api_key = s.api_key
+        self.api_key = api_key
+        self.use_api = bool(api_key and
+                            api_key not in PLACEHOLDER_API_KEYS and
+                            len(api_key) > 10)
+
+        if provider is None and self.use_api:
+            provider = OpenWeatherProvider(api_key, timeout=s.timeout_s, pool_size=s.max_workers)
+        elif provider is None and s.synthetic_field:
+            from weather_field import WeatherField, FieldWeatherProvider
+            provider = FieldWeatherProvider(WeatherField(s.synthetic_field, self.base_conditions))
+
+        # Only remote providers are worth caching per area or guarding with a breaker.
+        # On reload the provider's existing breaker is kept (open state, trip stats)
+        prefetcher = None
+        if provider and provider.cacheable:
+            breaker_settings = dict(window=s.breaker_window, min_calls=s.breaker_min_calls,
+                                    failure_rate=s.breaker_failure_rate, open_s=s.breaker_open_s,
+                                    max_open_s=s.breaker_max_open_s)
+            old_breaker = getattr(getattr(self, 'provider', None), 'breaker', None)
+            if old_breaker is not None and old_breaker.name == provider.name:
+                old_breaker.configure(**breaker_settings)
+                provider.breaker = old_breaker
+            else:
+                provider.breaker = CircuitBreaker(provider.name, **breaker_settings)
+            if self.prefetch:
+                prefetcher = WeatherPrefetcher(provider, cell_deg=s.cell_deg, ttl_s=s.ttl_s,
+                                               max_workers=s.max_workers)
+
+        old = getattr(self, 'prefetcher', None)
+        self.prefetcher = prefetcher
+        self.provider = provider
+        if old:
+            old.shutdown()
+
+    def apply_config(self, app_config):
+        """Config subscriber: rebuild provider and cache if weather settings changed."""
+        if app_config.weather == self.settings:
+            return
+        self.settings = app_config.weather
+        self._configure(self.provider if self.custom_provider else None)
+        print(f"[Weather Client] Reloaded settings "
+              f"(cell {self.settings.cell_deg}°, TTL {self.settings.ttl_s}s)")
+
+    def get_weather(self, lat, lon, budget_ms=None):
         """
         Fetch current weather at (lat, lon).
         Returns dict with: temp, humidity, wind_speed, visibility, weather_main
+
+        budget_ms bounds how long the caller waits for a cache miss (0: not
+        at all, None: until the provider's own timeout); the
+        fetch keeps running in the prefetcher and fills the cache for the
+        next packet. Without a prefetcher the provider call is synchronous
+        and only its own timeout applies. While the provider's breaker is
+        open, simulation is returned without touching the provider.
         """
-        
-        # Try real API if key is valid
-        if self.use_api:
+
+        if self.provider:
+            breaker = self.provider.breaker
+            if breaker is not None and breaker.short_circuit():
+                return self._simulate_weather(lat, lon)
             try:
-                import requests
-                # FIXED: Use correct free API endpoint
-                base_url = "https://api.openweathermap.org/data/2.5/weather"
-                params = {
-                    'lat': lat,
-                    'lon': lon,
-                    'appid': self.api_key,
-                    'units': 'metric'
-                }
-                
-                response = requests.get(base_url, params=params, timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        'temp': data['main'].get('temp'),
-                        'humidity': data['main'].get('humidity'),
-                        'wind_speed': data['wind'].get('speed'),
-                        'visibility': data.get('visibility', 10000),
-                        'weather_main': data['weather'][0]['main']
-                    }
-                else:
-                    print(f"[Weather] API Error {response.status_code}, using simulation")
+                if self.prefetcher:
+                    # budget_ms=0 means "don't wait"; only None waits without limit
+                    return self.prefetcher.get(lat, lon, budget_ms / 1000 if budget_ms is not None else None)
+                return self.provider.fetch(lat, lon)
+            except FutureTimeout:
+                self.deadline_misses += 1
+            except CircuitOpenError:
+                pass
             except Exception as e:
-                print(f"[Weather] API failed: {e}, using simulation")
-        
+                print(f"[Weather] {self.provider.name} failed: {e}, using simulation")
+
         # Local simulation fallback
         return self._simulate_weather(lat, lon)
-    
+
+    def track(self, drone_id, lat, lon, now=None):
+        """
+        Record a drone's position (call per packet with a GPS fix). Every
+        FLEET_PREFETCH_INTERVAL_S, the bounding box of the drones active in
+        the last FLEET_ACTIVE_S is prefetched in the background, so a drone
+        entering a new cell usually finds its weather already cached.
+        Returns number of cells being fetched (0 between prefetches).
+        """
+        if not self.prefetcher:
+            return 0
+        now = now if now is not None else time.time()
+        with self._fleet_lock:
+            self.fleet[drone_id] = (lat, lon, now)
+            if now - self._fleet_prefetched_at < FLEET_PREFETCH_INTERVAL_S:
+                return 0
+            self._fleet_prefetched_at = now
+            cutoff = now - FLEET_ACTIVE_S
+            for stale in [d for d, (_, _, seen_at) in self.fleet.items() if seen_at < cutoff]:
+                del self.fleet[stale]
+            positions = [(lat, lon) for lat, lon, _ in self.fleet.values()]
+        return self.prefetch_fleet(positions)
+
+    def prefetch_fleet(self, positions):
+        """
+        Warm the cache for the bounding box of active drone positions.
+        positions: iterable of (lat, lon)
+        Returns number of cells being fetched.
+        """
+        if not self.prefetcher:
+            return 0
+        return self.prefetcher.prefetch_points(positions)
+
+    def stats(self):
+        """Provider latency, breaker and cache statistics."""
+        if self.prefetcher:
+            stats = self.prefetcher.stats()
+        else:
+            stats = {'provider': (self.provider or self.simulator).stats()}
+        stats['deadline_misses'] = self.deadline_misses
+        return stats
+
     def _simulate_weather(self, lat, lon):
         """Generate realistic simulated weather."""
-        # Time-based temperature variation
-        hour = time.localtime().tm_hour
-        temp_variation = 5 * math.sin((hour - 6) * math.pi / 12)
-        
-        # Random noise for realism
-        noise = random.uniform(-0.5, 0.5)
-        
-        weather_data = {
-            'temp': round(self.base_conditions['temp'] + temp_variation + noise, 1),
-            'humidity': max(30, min(95, self.base_conditions['humidity'] + random.randint(-3, 3))),
-            'wind_speed': round(max(0, self.base_conditions['wind_speed'] + random.uniform(-0.5, 0.5)), 1),
-            'visibility': self.base_conditions['visibility'],
-            'weather_main': self.base_conditions['weather_main']
-        }
-        
-        return weather_data
-    
-    def set_weather_condition(self, condition):
+        return self.simulator.fetch(lat, lon)
+
+    def set_weather_condition(self, condition, lat=None, lon=None, radius_km=None):
         """
         Manually set weather conditions for testing.
         Examples: 'Clear', 'Rain', 'Thunderstorm', 'Fog', 'Snow'
+        With a synthetic field, lat/lon/radius_km limit the scenario to a
+        region (omitted = everywhere).
         """
-        conditions_map = {
-            'Clear': {'wind_speed': 3.5, 'visibility': 10000, 'weather_main': 'Clear'},
-            'Rain': {'wind_speed': 8.0, 'visibility': 7000, 'weather_main': 'Rain'},
-            'Thunderstorm': {'wind_speed': 15.0, 'visibility': 3000, 'weather_main': 'Thunderstorm'},
-            'Fog': {'wind_speed': 2.0, 'visibility': 1000, 'weather_main': 'Fog'},
-            'Snow': {'wind_speed': 6.0, 'visibility': 4000, 'weather_main': 'Snow'},
-            'High Wind': {'wind_speed': 12.0, 'visibility': 10000, 'weather_main': 'Clear'}
-        }
-        
-        if condition in conditions_map:
-            self.base_conditions.update(conditions_map[condition])
-            print(f"[Weather] Condition set to: {condition}")
-            return True
-        else:
+        if condition not in WEATHER_SCENARIOS:
             print(f"[Weather] Unknown condition: {condition}")
-            return False
\ No newline at end of file
+            return False
+
+        field = getattr(self.provider, 'field', None)
+        if field is not None:
+            if condition == 'Clear' and radius_km is None:
+                field.clear_overlays()
+            else:
+                field.apply_scenario(condition, lat, lon, radius_km)
+        if radius_km is None:
+            self.base_conditions.update(WEATHER_SCENARIOS[condition])
+
+        where = f" within {radius_km}km of ({lat}, {lon})" if radius_km is not None else ""
+        print(f"[Weather] Condition set to: {condition}{where}")
+        return True
@@ -0,0 +1,255 @@
+"""
+Seeded synthetic weather field for fleet-scale simulation.
+
+Temperature, humidity, wind, visibility and condition are generated for a
+whole lat/lon grid and time window in one vectorized NumPy pass. Each
+field is a sum of random travelling waves (fixed by the seed) evaluated
+at absolute time, so it is smooth in space and time and identical across
+runs. Temperature follows the same diurnal curve as the point simulator.
+
+The grid covers duration_s from t0. Once the clock leaves that window the
+field rolls forward: it is regenerated from the current step, and since
+the waves depend on absolute time it continues seamlessly instead of
+replaying the same hour.
+
+Per-drone queries are O(1) array lookups. Scenarios from
+set_weather_condition can be applied to a region and time span as
+overlays; they are re-applied whenever the field is regenerated.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+
+from config_service import WeatherFieldSettings
+from weather_client import WeatherProvider, WEATHER_SCENARIOS
+
+# Condition codes stored in the field (index into CONDITIONS)
+CONDITIONS = ('Clear', 'Clouds', 'Rain', 'Thunderstorm', 'Fog', 'Snow')
+_CODE = {name: i for i, name in enumerate(CONDITIONS)}
+
+KM_PER_DEG = 111.32
+
+# Moisture anomaly above which rain/thunderstorms form (unit-variance field)
+CLOUD_LEVEL = 0.5
+RAIN_LEVEL = 1.0
+STORM_LEVEL = 1.7
+FOG_LEVEL = 1.8
+
+
+def _wave_field(rng, lat, lng, t, wavelength_deg, period_s, modes=12):
+    """
+    Unit-variance sum of `modes` travelling cosine waves on the (t, lat, lng) grid.
+    cos(ky*y + kx*x - w*t + phi) is separable as a product of complex
+    exponentials, so the sum over modes is a single einsum.
+    """
+    direction = rng.uniform(0, 2 * math.pi, modes)
+    k = 2 * math.pi / (wavelength_deg * rng.uniform(0.6, 1.6, modes))
+    omega = 2 * math.pi / (period_s * rng.uniform(0.6, 1.6, modes))
+    phase = rng.uniform(0, 2 * math.pi, modes)
+
+    e_t = np.exp(1j * (phase[:, None] - omega[:, None] * t[None, :]))
+    e_y = np.exp(1j * (k * np.sin(direction))[:, None] * lat[None, :])
+    e_x = np.exp(1j * (k * np.cos(direction))[:, None] * lng[None, :])
+
+    total = np.einsum('mt,my,mx->tyx', e_t, e_y, e_x, optimize=True).real
+    return (total * math.sqrt(2.0 / modes)).astype(np.float32)
+
+
+class WeatherField:
+    """
+    Gridded weather over settings' bounding box and a time window starting
+    at t0. Positions outside the box use the nearest edge cell; times
+    outside the window roll the window forward (or back) to them.
+    """
+
+    def __init__(self, settings=None, base_conditions=None, t0=None):
+        self.settings = settings or WeatherFieldSettings()
+        self.base_conditions = {'temp': 28.0, 'humidity': 65, **WEATHER_SCENARIOS['Clear'],
+                                **(base_conditions or {})}
+        s = self.settings
+
+        self.lat = np.arange(s.min_lat, s.max_lat + s.cell_deg / 2, s.cell_deg)
+        self.lng = np.arange(s.min_lng, s.max_lng + s.cell_deg / 2, s.cell_deg)
+        self.t = np.arange(0, s.duration_s, s.step_s, dtype=np.float64)
+        self.span_s = len(self.t) * s.step_s
+        self.overlays = []  # (condition, lat, lng, radius_km, start, end) in absolute time
+        self.rolls = 0
+        self._lock = threading.Lock()
+        self._roll_lock = threading.Lock()
+        self.generate(t0 if t0 is not None else time.time())
+
+    @property
+    def shape(self):
+        return (len(self.t), len(self.lat), len(self.lng))
+
+    def generate(self, t0=None):
+        """
+        (Re)build all fields from the seed for the window starting at t0
+        (rounded down to a step; default: current t0), then re-apply overlays.
+        """
+        s = self.settings
+        t0 = self.t0 if t0 is None else t0 // s.step_s * s.step_s
+        base = self.base_conditions
+        rng = np.random.default_rng(s.seed)
+        lat, lng, t = self.lat - s.min_lat, self.lng - s.min_lng, t0 + self.t
+
+        temp_noise = _wave_field(rng, lat, lng, t, wavelength_deg=0.8, period_s=6 * 3600)
+        wind_noise = _wave_field(rng, lat, lng, t, wavelength_deg=0.3, period_s=1800)
+        moisture = _wave_field(rng, lat, lng, t, wavelength_deg=0.25, period_s=2 * 3600)
+        fog = _wave_field(rng, lat, lng, t, wavelength_deg=0.15, period_s=3 * 3600)
+
+        # Diurnal cycle from local time of day, as in the point simulator
+        tm = time.localtime(t0)
+        hours = ((tm.tm_hour * 3600 + tm.tm_min * 60 + tm.tm_sec + self.t) / 3600.0) % 24
+        diurnal = (5 * np.sin((hours - 6) * np.pi / 12)).astype(np.float32)[:, None, None]
+
+        storm = moisture > STORM_LEVEL
+        rain = moisture > RAIN_LEVEL
+        wind = np.maximum(0, base['wind_speed'] + 2.0 * wind_noise + 6.0 * storm)
+        foggy = (fog > FOG_LEVEL) & (wind < 4.0) & ~rain
+
+        condition = np.zeros(self.shape, dtype=np.uint8)
+        condition[moisture > CLOUD_LEVEL] = _CODE['Clouds']
+        condition[rain] = _CODE['Rain']
+        condition[storm] = _CODE['Thunderstorm']
+        condition[foggy] = _CODE['Fog']
+
+        visibility = base['visibility'] * np.clip(1.0 - 0.3 * np.maximum(moisture - CLOUD_LEVEL, 0), 0.25, 1.0)
+        visibility[foggy] = 1000
+
+        fields = {
+            'temp': (base['temp'] + diurnal + 1.5 * temp_noise - 2.0 * rain).astype(np.float32),
+            'humidity': np.clip(base['humidity'] + 12 * moisture, 30, 95).astype(np.float32),
+            'wind_speed': wind.astype(np.float32),
+            'visibility': visibility.astype(np.float32),
+            'condition': condition
+        }
+
+        with self._lock:
+            # Overlays that ended before the window are done for good
+            self.overlays = [o for o in self.overlays if o[5] > t0]
+            for overlay in self.overlays:
+                self._apply(overlay, fields, t0)
+            self.t0, self.fields = t0, fields
+            self._window = (t0, fields)
+
+    def _current(self, t):
+        """(t0, fields) of a window containing t, rolling the field if needed."""
+        t0, fields = self._window
+        if 0 <= t - t0 < self.span_s:
+            return t0, fields
+        with self._roll_lock:
+            t0, fields = self._window
+            if not 0 <= t - t0 < self.span_s:
+                self.generate(t)
+                self.rolls += 1
+                t0, fields = self._window
+        return t0, fields
+
+    # ============================================
+    # OVERLAYS
+    # ============================================
+
+    def apply_scenario(self, condition, lat=None, lng=None, radius_km=None,
+                       start_s=0, end_s=None):
+        """
+        Impose a set_weather_condition scenario on a circular region
+        (or everywhere when lat/lng/radius_km are omitted) for seconds
+        [start_s, end_s) from the start of the current window (end_s None:
+        until cleared). The span is fixed in absolute time, so it survives
+        the window rolling forward.
+        Returns False for unknown conditions.
+        """
+        if condition not in WEATHER_SCENARIOS:
+            return False
+        with self._lock:
+            t0 = self.t0
+            overlay = (condition, lat, lng, radius_km, t0 + start_s,
+                       t0 + end_s if end_s is not None else math.inf)
+            self.overlays.append(overlay)
+            self._apply(overlay, self.fields, t0)
+        return True
+
+    def clear_overlays(self):
+        with self._lock:
+            self.overlays = []
+        self.generate()
+
+    def _apply(self, overlay, fields, t0):
+        condition, lat, lng, radius_km, start, end = overlay
+        scenario = WEATHER_SCENARIOS[condition]
+
+        t = t0 + self.t
+        times = (t >= start) & (t < end)
+        if lat is None or lng is None or radius_km is None:
+            region = np.ones((len(self.lat), len(self.lng)), dtype=bool)
+        else:
+            dy = (self.lat - lat) * KM_PER_DEG
+            dx = (self.lng - lng) * KM_PER_DEG * math.cos(math.radians(lat))
+            region = dy[:, None] ** 2 + dx[None, :] ** 2 <= radius_km ** 2
+        mask = times[:, None, None] & region[None, :, :]
+
+        f = fields
+        f['wind_speed'][mask] = scenario['wind_speed']
+        f['visibility'][mask] = scenario['visibility']
+        f['condition'][mask] = _CODE.get(scenario['weather_main'], 0)
+
+    # ============================================
+    # LOOKUP
+    # ============================================
+
+    def _index(self, t0, lat, lng, t):
+        s = self.settings
+        it = min(int((t - t0) // s.step_s), len(self.t) - 1)
+        iy = min(max(int(round((lat - s.min_lat) / s.cell_deg)), 0), len(self.lat) - 1)
+        ix = min(max(int(round((lng - s.min_lng) / s.cell_deg)), 0), len(self.lng) - 1)
+        return it, iy, ix
+
+    def index(self, lat, lng, t=None):
+        """Grid index (it, iy, ix) for a position and wall-clock time (rolls the window if needed)."""
+        t = time.time() if t is None else t
+        return self._index(self._current(t)[0], lat, lng, t)
+
+    def sample(self, lat, lng, t=None):
+        """
+        Weather at one position.
+        Returns dict with: temp, humidity, wind_speed, visibility, weather_main
+        """
+        t = time.time() if t is None else t
+        t0, f = self._current(t)
+        i = self._index(t0, lat, lng, t)
+        return {
+            'temp': round(float(f['temp'][i]), 1),
+            'humidity': int(f['humidity'][i]),
+            'wind_speed': round(float(f['wind_speed'][i]), 1),
+            'visibility': int(f['visibility'][i]),
+            'weather_main': CONDITIONS[f['condition'][i]]
+        }
+
+    def sample_many(self, lats, lngs, t=None):
+        """Vectorized lookup for a fleet; returns dict of arrays keyed like sample()."""
+        s = self.settings
+        t = time.time() if t is None else t
+        t0, f = self._current(t)
+        it = min(int((t - t0) // s.step_s), len(self.t) - 1)
+        iy = np.clip(np.rint((np.asarray(lats) - s.min_lat) / s.cell_deg).astype(int), 0, len(self.lat) - 1)
+        ix = np.clip(np.rint((np.asarray(lngs) - s.min_lng) / s.cell_deg).astype(int), 0, len(self.lng) - 1)
+        result = {name: f[name][it, iy, ix] for name in ('temp', 'humidity', 'wind_speed', 'visibility')}
+        result['weather_main'] = np.array(CONDITIONS)[f['condition'][it, iy, ix]]
+        return result
+
+
+class FieldWeatherProvider(WeatherProvider):
+    """Serves lookups from a WeatherField at the current wall-clock time."""
+    name = "synthetic_field"
+    cacheable = False
+
+    def __init__(self, field, clock=time.time, **kwargs):
+        super().__init__(**kwargs)
+        self.field = field
+        self.clock = clock
+
+    def _fetch(self, lat, lon):
+        return self.field.sample(lat, lon, self.clock())
@@ -0,0 +1,97 @@
+"""
+compile_config validation and ConfigService reload.
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config_service import ConfigError, ConfigService, compile_config
+
+SQUARE = {'name': 'plant', 'zone': 'RED',
+          'polygon': [[9.9, 19.9], [9.9, 20.1], [10.1, 20.1], [10.1, 19.9]]}
+
+
+class CompileConfigTest(unittest.TestCase):
+    def assertRejected(self, raw, message):
+        with self.assertRaises(ConfigError) as caught:
+            compile_config(raw)
+        self.assertIn(message, str(caught.exception))
+
+    def test_defaults(self):
+        config = compile_config({})
+        self.assertEqual(config.risk.vib_warning, 0.5)
+        self.assertEqual(config.risk_window.windows_s, (10.0, 60.0))
+
+    def test_bad_thresholds(self):
+        self.assertRejected({'risk_thresholds': {'vibration': {'warning': 0.9, 'critical': 0.8}}},
+                            "vibration: warning exceeds critical")
+        self.assertRejected({'risk_thresholds': {'vibration': {'warning': 'high'}}},
+                            "RiskSettings.vib_warning must be a number")
+        self.assertRejected({'geofence': {'red_radius_km': 12, 'yellow_radius_km': 10}},
+                            "red_radius_km <= yellow_radius_km")
+
+    def test_placeholder_api_key_is_absent(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(compile_config({'OPENWEATHER_API_KEY': 'your_api_key_here'}).weather.api_key, '')
+            self.assertEqual(compile_config({'OPENWEATHER_API_KEY': 'k' * 32}).weather.api_key, 'k' * 32)
+        with mock.patch.dict(os.environ, {'OPENWEATHER_API_KEY': 'e' * 32}):
+            self.assertEqual(compile_config({'OPENWEATHER_API_KEY': 'your_api_key_here'}).weather.api_key, 'e' * 32)
+
+    def test_polygons(self):
+        compile_config({'geofence_polygons': [SQUARE]})
+        self.assertRejected({'geofence_polygons': {}}, "geofence_polygons must be a list")
+        self.assertRejected({'geofence_polygons': [dict(SQUARE, zone='BLUE')]},
+                            "geofence_polygons[0].zone must be RED or YELLOW")
+        self.assertRejected({'geofence_polygons': [dict(SQUARE, polygon=SQUARE['polygon'][:2])]},
+                            "at least 3 [lat, lng] pairs")
+        self.assertRejected({'geofence_polygons': [dict(SQUARE, polygon=[[95, 0], [0, 1], [1, 1]])]},
+                            "vertex out of range")
+        self.assertRejected({'geofence_polygons': [dict(SQUARE, name='')]},
+                            "name must be a non-empty string")
+
+
+class ConfigReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'config.json')
+        self.write({'risk_thresholds': {'vibration': {'warning': 0.4, 'critical': 0.9}}})
+        self.service = ConfigService(self.path)
+        self.seen = []
+        self.service.subscribe(self.seen.append)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, raw):
+        with open(self.path, 'w') as f:
+            json.dump(raw, f)
+
+    def test_invalid_config_keeps_previous(self):
+        before = self.service.current
+        self.write({'risk_thresholds': {'vibration': {'warning': 0.9, 'critical': 0.8}},
+                    'geofence_polygons': [dict(SQUARE, zone='BLUE')]})
+        self.assertFalse(self.service.reload(force=True))
+        self.assertEqual(self.service.current.version, before.version)
+        self.assertEqual(self.service.current.risk, before.risk)
+        self.assertEqual(len(self.seen), 1)
+
+        # A bad file is not re-parsed until it changes again
+        self.assertFalse(self.service.reload())
+
+    def test_valid_config_reaches_subscribers(self):
+        self.write({'risk_thresholds': {'vibration': {'warning': 0.3, 'critical': 0.7}}})
+        self.assertTrue(self.service.reload(force=True))
+        self.assertEqual(self.service.current.version, 2)
+        self.assertEqual(self.seen[-1].risk.vib_warning, 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Transition detection, bounded subscriptions and webhook delivery against a
+LocalWebhookReceiver (no network needed).
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from event_bus import (GPS_FIX_LOST, LEVEL_CHANGED, ZONE_ENTERED, EventBus,
+                       LocalWebhookReceiver, Subscription, TransitionDetector, WebhookDispatcher)
+
+
+class TransitionDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+        self.sub = self.bus.subscribe('test')
+        self.detector = TransitionDetector(self.bus)
+
+    def observe(self, level, zone='GREEN', gps_valid=True, drone_id='d1'):
+        return self.detector.observe(drone_id, level, zone, gps_valid, False)
+
+    def test_one_event_per_level_change(self):
+        self.assertEqual(self.observe('LOW'), [])   # first sighting is the baseline
+        levels = ['LOW', 'MEDIUM', 'MEDIUM', 'MEDIUM', 'HIGH', 'HIGH', 'LOW', 'LOW']
+        emitted = [self.observe(level) for level in levels]
+
+        self.assertEqual([len(events) for events in emitted], [0, 1, 0, 0, 1, 0, 1, 0])
+        changes = [(e.previous, e.current) for events in emitted for e in events]
+        self.assertEqual(changes, [('LOW', 'MEDIUM'), ('MEDIUM', 'HIGH'), ('HIGH', 'LOW')])
+        self.assertEqual(self.bus.published, 3)
+        self.assertEqual(self.sub.queue.qsize(), 3)
+
+    def test_drones_are_tracked_separately(self):
+        self.observe('LOW', drone_id='d1')
+        self.observe('HIGH', drone_id='d2')
+        self.assertEqual(self.observe('LOW', drone_id='d1'), [])
+        self.assertEqual(self.observe('HIGH', drone_id='d2'), [])
+
+    def test_simultaneous_changes(self):
+        self.observe('LOW')
+        events = self.observe('HIGH', zone='RED', gps_valid=False)
+        self.assertEqual([e.type for e in events], [GPS_FIX_LOST, ZONE_ENTERED, LEVEL_CHANGED])
+        self.assertEqual([e.seq for e in events], [1, 2, 3])
+
+
+class SubscriptionTest(unittest.TestCase):
+    def test_overflow_drops_oldest(self):
+        bus = EventBus()
+        sub = bus.subscribe('slow', maxsize=3)
+        for i in range(5):
+            bus.publish(LEVEL_CHANGED, 'd1', i, i + 1, time.perf_counter())
+
+        self.assertEqual(sub.dropped, 2)
+        self.assertEqual([sub.get(timeout=0).current for _ in range(3)], [3, 4, 5])
+        self.assertIsNone(sub.get(timeout=0))
+        self.assertEqual(sub.stats()['delivery_latency']['count'], 3)
+
+    def test_type_filter(self):
+        sub = Subscription('zones', types=[ZONE_ENTERED])
+        bus = EventBus()
+        sub.offer(bus.publish(LEVEL_CHANGED, 'd1', 'LOW', 'HIGH', time.perf_counter()))
+        sub.offer(bus.publish(ZONE_ENTERED, 'd1', 'GREEN', 'RED', time.perf_counter()))
+        self.assertEqual(sub.queue.qsize(), 1)
+        self.assertEqual(sub.get(timeout=0).type, ZONE_ENTERED)
+
+
+class WebhookDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+        self.dispatcher = None
+
+    def tearDown(self):
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        self.receiver.stop()
+
+    def dispatch(self, fail_first=0, **kwargs):
+        self.receiver = LocalWebhookReceiver(fail_first=fail_first).start()
+        self.dispatcher = WebhookDispatcher(self.bus, self.receiver.url, backoff_s=0.01, **kwargs)
+        return self.dispatcher
+
+    def publish(self, count):
+        for i in range(count):
+            self.bus.publish(LEVEL_CHANGED, 'd1', i, i + 1, time.perf_counter())
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out waiting for webhook delivery")
+            time.sleep(0.01)
+
+    def test_batches_flush_at_max_batch(self):
+        dispatcher = self.dispatch(max_batch=3)
+        self.publish(7)   # queued before the thread starts, so batches are full
+        dispatcher.start()
+        self.wait_for(lambda: dispatcher.batches_sent == 3)
+
+        self.assertEqual([len(batch) for batch in self.receiver.batches], [3, 3, 1])
+        self.assertEqual([e['current'] for e in self.receiver.events], list(range(1, 8)))
+        self.assertNotIn('received_at', self.receiver.events[0])
+        self.assertEqual(dispatcher.stats()['delivery_latency']['count'], 7)
+
+    def test_partial_batch_flushes_after_max_wait(self):
+        dispatcher = self.dispatch(max_batch=50, max_wait_s=0.02).start()
+        self.publish(2)
+        self.wait_for(lambda: dispatcher.batches_sent == 1)
+        self.assertEqual(len(self.receiver.events), 2)
+
+    def test_retries_until_delivered(self):
+        dispatcher = self.dispatch(fail_first=2, max_retries=3)
+        self.publish(4)
+        dispatcher.start()
+        self.wait_for(lambda: dispatcher.batches_sent == 1)
+
+        self.assertEqual(dispatcher.retries, 2)
+        self.assertEqual(dispatcher.batches_failed, 0)
+        self.assertEqual(self.receiver.posts, 3)
+        self.assertEqual(len(self.receiver.events), 4)
+
+    def test_batch_dropped_after_retries_exhausted(self):
+        dispatcher = self.dispatch(fail_first=100, max_retries=2)
+        self.publish(1)
+        dispatcher.start()
+        self.wait_for(lambda: dispatcher.batches_failed == 1)
+
+        self.assertEqual(self.receiver.posts, 3)
+        self.assertEqual(dispatcher.retries, 2)
+        self.assertEqual(self.receiver.events, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Segment-circle and segment-polygon intersection in flight-plan validation.
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from flight_plan import FlightPlanValidator, _circle_intervals, _polygon_intervals, parse_waypoints
+
+
+class _Circles:
+    """Geospace stand-in exposing only get_zones()."""
+
+    def __init__(self, zones=()):
+        self.zones = list(zones)
+
+    def get_zones(self):
+        return list(self.zones)
+
+
+RED_CIRCLE = {'name': 'red', 'zone': 'RED', 'lat': 10.0, 'lng': 20.0, 'radius_km': 5.0}
+RED_SQUARE = {'name': 'square', 'zone': 'RED',
+              'polygon': [[9.9, 19.9], [9.9, 20.1], [10.1, 20.1], [10.1, 19.9]]}
+
+
+class CircleIntervalTest(unittest.TestCase):
+    def test_tangent_segment_misses(self):
+        # y = 1 touches the unit circle at (0, 1) only; inside is strict
+        t_enter, t_exit = _circle_intervals(np.array([-1.0, 1.0]), np.array([1.0, 1.0]), 1.0)
+        self.assertFalse(t_enter[0] < t_exit[0])
+
+    def test_chord_enters_and_exits(self):
+        t_enter, t_exit = _circle_intervals(np.array([-2.0, 2.0]), np.array([0.0, 0.0]), 1.0)
+        self.assertAlmostEqual(t_enter[0], 0.25)
+        self.assertAlmostEqual(t_exit[0], 0.75)
+
+    def test_zero_length_segment(self):
+        inside = _circle_intervals(np.array([0.5, 0.5]), np.array([0.0, 0.0]), 1.0)
+        outside = _circle_intervals(np.array([2.0, 2.0]), np.array([0.0, 0.0]), 1.0)
+        self.assertTrue(inside[0][0] < inside[1][0])
+        self.assertFalse(outside[0][0] < outside[1][0])
+
+
+class PolygonIntervalTest(unittest.TestCase):
+    SQUARE_X = np.array([-1.0, 1.0, 1.0, -1.0])
+    SQUARE_Y = np.array([-1.0, -1.0, 1.0, 1.0])
+
+    def test_segment_fully_inside(self):
+        t_enter, t_exit, fraction = _polygon_intervals(
+            np.array([-0.5, 0.5]), np.array([0.0, 0.2]), self.SQUARE_X, self.SQUARE_Y)
+        self.assertEqual((t_enter[0], t_exit[0]), (0.0, 1.0))
+        self.assertAlmostEqual(fraction[0], 1.0)
+
+    def test_segment_crossing(self):
+        t_enter, t_exit, fraction = _polygon_intervals(
+            np.array([-2.0, 2.0]), np.array([0.0, 0.0]), self.SQUARE_X, self.SQUARE_Y)
+        self.assertAlmostEqual(t_enter[0], 0.25)
+        self.assertAlmostEqual(t_exit[0], 0.75)
+        self.assertAlmostEqual(fraction[0], 0.5)
+
+    def test_zero_length_segment(self):
+        _, _, inside = _polygon_intervals(np.array([0.0, 0.0]), np.array([0.0, 0.0]),
+                                          self.SQUARE_X, self.SQUARE_Y)
+        t_enter, t_exit, _ = _polygon_intervals(np.array([3.0, 3.0]), np.array([0.0, 0.0]),
+                                                self.SQUARE_X, self.SQUARE_Y)
+        self.assertAlmostEqual(inside[0], 1.0)
+        self.assertFalse(t_enter[0] < t_exit[0])
+
+
+class FlightPlanValidatorTest(unittest.TestCase):
+    def test_plan_inside_polygon(self):
+        validator = FlightPlanValidator(_Circles(), polygons=[RED_SQUARE])
+        result = validator.validate([[9.95, 19.95], [10.05, 20.05]])
+        self.assertFalse(result['valid'])
+        self.assertEqual(result['first_violation']['segment'], 0)
+        self.assertEqual(result['first_violation']['t'], 0.0)
+        self.assertEqual(result['segments']['max_zone'], ['RED'])
+        self.assertAlmostEqual(result['segments']['exposure_km']['square'][0],
+                               result['segments']['length_km'][0], places=2)
+
+    def test_repeated_waypoint(self):
+        validator = FlightPlanValidator(_Circles([RED_CIRCLE]))
+        clear = validator.validate([[10.2, 20.0], [10.2, 20.0], [10.3, 20.0]])
+        self.assertTrue(clear['valid'])
+        self.assertEqual(clear['segments']['length_km'][0], 0.0)
+
+        # Hovering inside the zone is a violation at the hover point
+        inside = validator.validate([[10.01, 20.0], [10.01, 20.0], [10.2, 20.0]])
+        self.assertFalse(inside['valid'])
+        self.assertEqual(inside['first_violation']['segment'], 0)
+        self.assertEqual(inside['first_violation']['distance_along_km'], 0.0)
+
+    def test_rejects_malformed_waypoints(self):
+        for raw in (None, [[10, 20]], [[10, 20], {'lat': 10, 'lng': 20}],
+                    [[10, 'x'], [10, 20]], [[10, True], [10, 20]], [[91, 20], [10, 20]]):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ValueError):
+                    parse_waypoints(raw)
+
+
+if __name__ == '__main__':
+    unittest.main()
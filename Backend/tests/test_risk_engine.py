@@ -0,0 +1,70 @@
+"""
+Noise suppression in calculate_risk_index with streaming sensor stats.
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import risk_engine
+from config_service import compile_config
+from risk_engine import calculate_risk_index
+from sensor_stats import SensorStatsStore
+
+
+def packet(vibration=0.1, tilt=2.0):
+    return {
+        'gps': {'latitude': 8.7, 'longitude': 77.1, 'satellites': 10, 'hdop': 90},
+        'mpu': {'vibration_rms': vibration, 'tilt_angle': tilt},
+        'motor': {'rpm': 3000, 'hall_detected': True}
+    }
+
+
+class SmoothedPenaltyTest(unittest.TestCase):
+    def setUp(self):
+        # Default thresholds (vibration warning 0.5 / critical 0.8, EWMA alpha 0.3)
+        self.saved = risk_engine._RISK
+        risk_engine.apply_config(compile_config({}))
+        self.stats = SensorStatsStore()
+        self.t = 0.0
+        for _ in range(10):
+            self.judge(packet())
+
+    def tearDown(self):
+        risk_engine._RISK = self.saved
+
+    def judge(self, data):
+        self.t += 0.1
+        mpu = data['mpu']
+        stats = self.stats.update('d1', {'vibration_rms': mpu['vibration_rms'],
+                                         'tilt_angle': mpu['tilt_angle'], 'rpm': 3000}, self.t)
+        return calculate_risk_index(data, 'GREEN', stats=stats)
+
+    def test_single_noisy_packet_is_damped(self):
+        score, reason, _ = self.judge(packet(vibration=0.7, tilt=20))
+        self.assertEqual(score, 0)
+        self.assertEqual(reason, "All Systems Normal")
+
+        # Without stats the same packet is penalized
+        score, reason, _ = calculate_risk_index(packet(vibration=0.7, tilt=20), 'GREEN')
+        self.assertIn("High Vibration", reason)
+        self.assertIn("High Tilt Angle", reason)
+
+    def test_sustained_warning_is_penalized(self):
+        reasons = [self.judge(packet(vibration=0.7, tilt=20))[1] for _ in range(5)]
+        self.assertNotIn("High Vibration", reasons[0])
+        self.assertIn("High Vibration", reasons[-1])
+        self.assertIn("High Tilt Angle", reasons[-1])
+
+    def test_critical_spike_counts_at_once(self):
+        score, reason, _ = self.judge(packet(vibration=1.2, tilt=40))
+        self.assertIn("Critical Vibration", reason)
+        self.assertIn("Excessive Tilt (40.0°)", reason)
+        self.assertEqual(score, 65)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Risk window hysteresis, dwell, rolling aggregates and config reloads.
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import risk_engine
+from config_service import RiskWindowSettings, compile_config
+from risk_window import RiskWindowStore
+
+
+class RiskWindowTest(unittest.TestCase):
+    def setUp(self):
+        # Default levels: SAFE < 40 <= CAUTION < 75 <= ABORT
+        self.saved = risk_engine._RISK
+        risk_engine.apply_config(compile_config({}))
+        self.store = RiskWindowStore(RiskWindowSettings(windows_s=(10.0, 60.0), hysteresis=5.0,
+                                                        min_dwell_s=3.0))
+
+    def tearDown(self):
+        risk_engine._RISK = self.saved
+
+    def update(self, score, now):
+        return self.store.update('d1', score, risk_engine.risk_level(score), now)
+
+    def snapshot(self, now):
+        return self.store.snapshot('d1', now)
+
+    def test_escalates_immediately(self):
+        self.assertEqual(self.update(20, 0.0), 'SAFE')
+        self.assertEqual(self.update(50, 0.1), 'CAUTION')
+        self.assertEqual(self.update(90, 0.2), 'ABORT')
+        snapshot = self.snapshot(0.5)
+        self.assertEqual(snapshot['level_for_s'], 0.3)
+        self.assertEqual(snapshot['suppressed'], 0)
+
+    def test_deescalates_after_margin_and_dwell(self):
+        self.update(90, 0.0)
+
+        # 72 is CAUTION, but 72 + hysteresis is still ABORT
+        self.assertEqual(self.update(72, 1.0), 'ABORT')
+        self.assertEqual(self.update(72, 10.0), 'ABORT')
+
+        # Clear of the band, but not for min_dwell_s yet
+        self.assertEqual(self.update(60, 11.0), 'ABORT')
+        self.assertEqual(self.update(60, 13.9), 'ABORT')
+        # Back into the band restarts the dwell timer
+        self.assertEqual(self.update(71, 14.0), 'ABORT')
+        self.assertEqual(self.update(60, 15.0), 'ABORT')
+        self.assertEqual(self.update(60, 17.0), 'ABORT')
+        self.assertEqual(self.update(60, 18.0), 'CAUTION')
+
+        snapshot = self.snapshot(18.0)
+        self.assertEqual(snapshot['suppressed'], 7)
+        self.assertEqual(snapshot['raw_level'], 'CAUTION')
+        self.assertEqual(snapshot['time_in_level']['ABORT'], 18.0)
+
+    def test_rolling_max_expires(self):
+        self.update(90, 0.0)
+        for t in range(1, 10):
+            self.update(20, float(t))
+        self.assertEqual(self.snapshot(9.0)['windows']['10s']['max'], 90)
+
+        self.update(20, 10.0)
+        self.update(20, 11.0)
+        windows = self.snapshot(11.0)['windows']
+        self.assertEqual(windows['10s']['max'], 20)
+        self.assertEqual(windows['10s']['samples'], 11)
+        self.assertEqual(windows['60s']['max'], 90)
+        self.assertEqual(windows['60s']['samples'], 12)
+        self.assertEqual(windows['60s']['mean'], round((90 + 11 * 20) / 12, 2))
+
+        # Nothing left in the short window once the drone goes quiet
+        windows = self.snapshot(30.0)['windows']
+        self.assertIsNone(windows['10s']['max'])
+        self.assertEqual(windows['60s']['max'], 90)
+
+    def test_reload_keeps_level_and_times(self):
+        self.update(20, 0.0)
+        self.update(90, 4.0)
+        self.update(90, 6.0)
+        before = self.snapshot(6.0)
+
+        self.store.apply_config(SimpleNamespace(risk_window=RiskWindowSettings(
+            windows_s=(5.0,), hysteresis=10.0, min_dwell_s=1.0)))
+        after = self.snapshot(6.0)
+        self.assertEqual(after['level'], 'ABORT')
+        self.assertEqual(after['level_for_s'], before['level_for_s'])
+        self.assertEqual(after['time_in_level'], before['time_in_level'])
+        self.assertEqual(list(after['windows']), ['5s'])
+        self.assertEqual(after['windows']['5s']['samples'], 0)
+
+        # The new margin and dwell apply to the held level
+        self.assertEqual(self.update(68, 7.0), 'ABORT')    # 68 + 10 is still ABORT
+        self.assertEqual(self.update(60, 8.0), 'ABORT')
+        self.assertEqual(self.update(60, 9.0), 'CAUTION')
+        self.assertEqual(self.snapshot(9.0)['time_in_level'], {'SAFE': 4.0, 'CAUTION': 0.0, 'ABORT': 5.0})
+
+    def test_peek_adds_no_sample(self):
+        self.assertEqual(self.store.peek('d1', 90, 'ABORT', 0.0), 'ABORT')   # no window yet
+        self.update(90, 0.0)
+        self.update(60, 1.0)
+        before = self.snapshot(2.0)
+
+        self.assertEqual(self.store.peek('d1', 60, 'CAUTION', 2.0), 'ABORT')
+        self.assertEqual(self.store.peek('d1', 60, 'CAUTION', 4.0), 'CAUTION')
+        self.assertEqual(self.store.peek('d1', 20, 'STANDBY', 4.0), 'STANDBY')
+        self.assertEqual(self.snapshot(2.0), before)
+
+        # The dwell started by the real sample at t=1 is still running
+        self.assertEqual(self.update(60, 4.0), 'CAUTION')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+TelemetryHistory chunking, spooling and export round trips.
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from telemetry_history import TelemetryHistory, read_npz_export, stream_export
+
+
+def row(i):
+    return {
+        'timestamp': 1000.0 + i,
+        'drone_id': 'D1' if i % 2 else 'D2',
+        'source': 'ESP32',
+        'latitude': 8.5 + i / 1000,
+        'longitude': 77.0,
+        'satellites': 9,
+        'hdop': None if i % 3 == 0 else 0.9,
+        'risk_score': i,
+        'risk_level': 'LOW'
+    }
+
+
+def concat(chunks):
+    chunks = list(chunks)
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+
+
+class _GatedHistory(TelemetryHistory):
+    """Spool writer that blocks until the test opens the gate."""
+
+    def __init__(self, *args, **kwargs):
+        self.gate = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write_chunk(self, chunk):
+        self.gate.wait(5)
+        super()._write_chunk(chunk)
+
+
+class ChunkBoundaryTest(unittest.TestCase):
+    def test_rows_span_sealed_and_active_chunks(self):
+        history = TelemetryHistory(chunk_rows=4, memory_chunks=4)
+        for i in range(6):
+            history.append(row(i))
+
+        chunks = list(history.iter_chunks())
+        self.assertEqual([len(c['timestamp']) for c in chunks], [4, 2])
+        columns = concat(chunks)
+        np.testing.assert_array_equal(columns['timestamp'], [1000.0 + i for i in range(6)])
+        self.assertTrue(np.isnan(columns['hdop'][3]))
+        self.assertEqual(columns['satellites'][0], 9)
+        self.assertTrue(np.isnan(columns['speed']).all())
+
+    def test_filters_by_time_and_drone(self):
+        history = TelemetryHistory(chunk_rows=4, memory_chunks=4)
+        for i in range(10):
+            history.append(row(i))
+        columns = concat(history.iter_chunks(start=1003, end=1008, drone_ids=['D1']))
+        np.testing.assert_array_equal(columns['timestamp'], [1003.0, 1005.0, 1007.0])
+
+    def test_memory_only_history_is_capped(self):
+        history = TelemetryHistory(chunk_rows=4, memory_chunks=1)
+        for i in range(13):
+            history.append(row(i))
+        columns = concat(history.iter_chunks())
+        np.testing.assert_array_equal(columns['timestamp'], [1008.0 + i for i in range(5)])
+        self.assertEqual(history.stats()['max_rows'], 8)
+
+
+class SpoolRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.history = _GatedHistory(spool_dir=os.path.join(self.dir, 'spool'),
+                                     chunk_rows=4, memory_chunks=1)
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(self.history.gate.set)
+
+    def test_chunks_leave_memory_only_after_spooling(self):
+        for i in range(14):
+            self.history.append(row(i))
+
+        # Writer is blocked: every sealed chunk stays resident and exportable
+        stats = self.history.stats()
+        self.assertEqual(stats['memory_chunks'], 4)
+        self.assertEqual(stats['pending_writes'], 3)
+        self.assertEqual(stats['spooled_chunks'], 0)
+        self.assertEqual(len(concat(self.history.iter_chunks())['timestamp']), 14)
+
+        self.history.gate.set()
+        self.history.flush()
+        stats = self.history.stats()
+        self.assertEqual(stats['spooled_chunks'], 4)
+        self.assertEqual(stats['pending_writes'], 0)
+        self.assertEqual(stats['memory_chunks'], 2)
+
+        # Evicted chunks are read back from the spool
+        columns = concat(self.history.iter_chunks())
+        np.testing.assert_array_equal(columns['timestamp'], [1000.0 + i for i in range(14)])
+
+    def test_csv_and_npz_exports_match_appended_rows(self):
+        self.history.gate.set()
+        rows = [row(i) for i in range(10)]
+        for r in rows:
+            self.history.append(r)
+        self.history.flush()
+
+        text = ''.join(stream_export(self.history.iter_chunks(), 'csv'))
+        exported = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(len(exported), len(rows))
+        for r, out in zip(rows, exported):
+            self.assertEqual(float(out['timestamp']), r['timestamp'])
+            self.assertEqual(out['drone_id'], r['drone_id'])
+            self.assertEqual(int(out['risk_score']), r['risk_score'])
+            self.assertEqual(out['hdop'], '' if r['hdop'] is None else '0.9')
+            self.assertEqual(out['speed'], '')
+
+        path = os.path.join(self.dir, 'export.npz')
+        with open(path, 'wb') as f:
+            f.writelines(stream_export(self.history.iter_chunks(start=1002, drone_ids=['D2']), 'npz'))
+        columns = read_npz_export(path)
+        expected = [r for r in rows if r['timestamp'] >= 1002 and r['drone_id'] == 'D2']
+        np.testing.assert_array_equal(columns['timestamp'], [r['timestamp'] for r in expected])
+        np.testing.assert_array_equal(columns['latitude'], [r['latitude'] for r in expected])
+        self.assertEqual(set(columns['drone_id']), {'D2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Weather client against a LocalWeatherServer (no network needed).
+
+Run from Backend/: python -m pytest tests  (or python -m unittest discover tests)
+"""
+import os
+import sys
+import time
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from config_service import WeatherFieldSettings, WeatherSettings
+from weather_client import (FLEET_PREFETCH_INTERVAL_S, CircuitBreaker, LocalWeatherServer,
+                            OpenWeatherClient, OpenWeatherProvider,
+                            SimulatedWeatherProvider, WeatherPrefetcher)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FleetPrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalWeatherServer().start()
+        provider = OpenWeatherProvider('test-key', base_url=self.server.url, timeout=2)
+        self.client = OpenWeatherClient(provider=provider, settings=WeatherSettings(cell_deg=0.1))
+
+    def tearDown(self):
+        self.client.prefetcher.shutdown()
+        self.server.stop()
+
+    def wait_idle(self):
+        for future in list(self.client.prefetcher._inflight.values()):
+            future.result(timeout=5)
+
+    def test_track_prefetches_fleet_bbox(self):
+        self.client.track('d1', 8.55, 76.95, now=1000.0)
+        self.client.track('d2', 8.75, 76.95, now=1001.0)  # inside the interval: no prefetch
+        self.wait_idle()
+        self.assertEqual(self.server.requests, 1)
+
+        # Next interval covers both drones: cells 85..87 x 769
+        fetched = self.client.track('d2', 8.75, 76.95, now=1000.0 + FLEET_PREFETCH_INTERVAL_S)
+        self.assertEqual(fetched, 2)
+        self.wait_idle()
+        self.assertEqual(self.server.requests, 3)
+
+        # Lookups anywhere in the box are now cache hits
+        weather = self.client.get_weather(8.65, 76.95, budget_ms=50)
+        self.assertEqual(weather['weather_main'], 'Clear')
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.client.prefetcher.hits, 1)
+
+    def test_prefetch_fleet_without_prefetcher(self):
+        client = OpenWeatherClient(prefetch=False)
+        self.assertEqual(client.prefetch_fleet([(8.5, 76.9)]), 0)
+        self.assertEqual(client.track('d1', 8.5, 76.9), 0)
+
+
+class ProviderSelectionTest(unittest.TestCase):
+    def test_placeholder_key_uses_synthetic_field(self):
+        settings = WeatherSettings(api_key='your_api_key_here', synthetic_field=WeatherFieldSettings())
+        client = OpenWeatherClient(settings=settings)
+        self.assertFalse(client.use_api)
+        self.assertEqual(client.provider.name, 'synthetic_field')
+        self.assertIsNone(client.prefetcher)
+
+    def test_real_key_uses_openweather(self):
+        client = OpenWeatherClient(settings=WeatherSettings(api_key='k' * 32))
+        self.assertTrue(client.use_api)
+        self.assertEqual(client.provider.name, 'openweather')
+        client.prefetcher.shutdown()
+
+
+class PrefetchCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.prefetcher = WeatherPrefetcher(SimulatedWeatherProvider(), cell_deg=0.1,
+                                            ttl_s=600, max_workers=1, max_cells=4)
+
+    def tearDown(self):
+        self.prefetcher.shutdown()
+
+    def test_prefetch_drops_stale_cells(self):
+        stale = time.time() - 1000
+        for i in range(3):
+            self.prefetcher._cache[(i, 0)] = (stale, {})
+        self.prefetcher.prefetch_points([(8.55, 76.95)], wait=True, timeout=5)
+        self.assertEqual(list(self.prefetcher._cache), [(85, 769)])
+        self.assertEqual(self.prefetcher.evicted, 3)
+
+    def test_moving_fleet_is_capped(self):
+        for step in range(10):
+            self.prefetcher.prefetch_points([(8.05 + step * 0.1, 76.95)], wait=True, timeout=5)
+        self.assertLessEqual(len(self.prefetcher._cache), 4)
+        self.assertIn(self.prefetcher.cell_of(8.05 + 9 * 0.1, 76.95), self.prefetcher._cache)
+        self.assertEqual(self.prefetcher.stats()['evicted'], 6)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('test', window=4, min_calls=3, failure_rate=0.5,
+                                      open_s=10, max_open_s=25, jitter=0.2, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+
+    def test_trips_on_failure_rate(self):
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)  # below min_calls
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)    # 2 of 4 failed
+        self.assertEqual(self.breaker.trips, 1)
+
+    def test_open_half_open_closed(self):
+        self.trip()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        # Retry time is open_s with +/-20% jitter
+        retry_in = self.breaker._retry_at - self.clock.now
+        self.assertTrue(8 <= retry_in <= 12, retry_in)
+        self.assertTrue(self.breaker.short_circuit())
+        self.assertFalse(self.breaker.allow())
+
+        # One probe once due; concurrent callers are still rejected
+        self.clock.now += 12
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        # Failed probe doubles the backoff
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        retry_in = self.breaker._retry_at - self.clock.now
+        self.assertTrue(16 <= retry_in <= 24, retry_in)
+
+        # ... capped at max_open_s (before jitter) on the next failure
+        self.clock.now += 24
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        retry_in = self.breaker._retry_at - self.clock.now
+        self.assertTrue(20 <= retry_in <= 30, retry_in)
+
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failed_probes, 2)
+        self.assertEqual(self.breaker.stats()['failure_rate'], 0.0)
+
+    def test_jitter_spreads_retries(self):
+        retries = set()
+        for _ in range(20):
+            breaker = CircuitBreaker('test', min_calls=1, open_s=10, jitter=0.2, clock=self.clock)
+            breaker.record_failure()
+            retries.add(round(breaker._retry_at - self.clock.now, 6))
+        self.assertGreater(len(retries), 1)
+        self.assertTrue(all(8 <= r <= 12 for r in retries))
+
+
+class WeatherBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalWeatherServer(latency_s=0.3).start()
+        self.provider = OpenWeatherProvider('test-key', base_url=self.server.url, timeout=2)
+        self.settings = WeatherSettings(cell_deg=0.1, breaker_min_calls=2, breaker_window=2)
+        self.client = OpenWeatherClient(provider=self.provider, settings=self.settings)
+        self.client.simulator.base_conditions = dict(self.client.base_conditions, weather_main='Simulated')
+
+    def tearDown(self):
+        self.client.prefetcher.shutdown()
+        self.server.stop()
+
+    def test_zero_budget_does_not_wait(self):
+        started = time.perf_counter()
+        weather = self.client.get_weather(8.55, 76.95, budget_ms=0)
+        self.assertLess(time.perf_counter() - started, 0.2)
+        self.assertEqual(weather['weather_main'], 'Simulated')
+        self.assertEqual(self.client.deadline_misses, 1)
+
+        # The fetch kept running and fills the cache for the next packet
+        for future in list(self.client.prefetcher._inflight.values()):
+            future.result(timeout=5)
+        weather = self.client.get_weather(8.55, 76.95, budget_ms=0)
+        self.assertEqual(weather['weather_main'], 'Clear')
+        self.assertEqual(self.client.prefetcher.hits, 1)
+
+    def test_breaker_survives_reload(self):
+        breaker = self.provider.breaker
+        for _ in range(2):
+            breaker.allow()
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        new_settings = replace(self.settings, ttl_s=300, breaker_open_s=60, breaker_max_open_s=600)
+        self.client.apply_config(SimpleNamespace(weather=new_settings))
+        self.assertIs(self.provider.breaker, breaker)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual((breaker.trips, breaker.open_s), (1, 60))
+
+        # While open, lookups are simulated without calling the provider
+        requests = self.server.requests
+        weather = self.client.get_weather(8.55, 76.95, budget_ms=50)
+        self.assertEqual(weather['weather_main'], 'Simulated')
+        self.assertEqual(self.server.requests, requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ lucide.createIcons();
 let history = { ax: [], ay: [], az: [], labels: [] };
 const MAX_DATAPOINTS = 50;
 let lastDataTimestamp = null;
+let lastTraceId = null;
 
 // --- CHART INITIALIZATION ---
 const chart = new ApexCharts(document.querySelector("#chart"), {
@@ -264,6 +265,13 @@ async function sync() {
         setVal('val-vib', d.mpu.vibration_rms.toFixed(3));
         setVal('val-tilt', `${d.mpu.tilt_angle.toFixed(1)}°`);
         
+        // Spectral peak from the latest raw accelerometer burst
+        if (d.spectrum) {
+            setVal('val-spectrum', `Peak: ${d.spectrum.dominant_hz.toFixed(1)} Hz @ ${d.spectrum.dominant_amplitude_g.toFixed(2)} G`);
+        } else {
+            setVal('val-spectrum', 'Spectrum: --');
+        }
+        
         // ============================================
         // MOTOR DATA
         // ============================================
@@ -534,6 +542,22 @@ async function sync() {
             { data: history.az }
         ]);
 
+        // ============================================
+        // LATENCY TRACE (report when this verdict hits the screen)
+        // ============================================
+        
+        if (d.system.trace_id && d.system.trace_id !== lastTraceId) {
+            const traceId = d.system.trace_id;
+            lastTraceId = traceId;
+            requestAnimationFrame(() => {
+                fetch('/api/trace/render', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ trace_id: traceId, rendered_at: Date.now() / 1000 })
+                }).catch(() => {});
+            });
+        }
+
     } catch (err) {
         console.error('❌ Sync error:', err);
         